@@ -2,13 +2,14 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from firebase.firebase_config import initialize_firebase
+from firebase.firebase_config import get_firestore
+from utils.realtime_utils import watch_user_data, stop_watching
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
-# Inicializa o Firebase
-firebase_app = initialize_firebase()
+# Inicializa o Firebase (cliente compartilhado por todas as sessões)
+firebase_app = get_firestore()
 
 # Configuração da página
 st.set_page_config(
@@ -224,6 +225,9 @@ if not st.session_state.logged_in:
 
 # Se usuário estiver logado, exibir uma página inicial com boas-vindas
 else:
+    # Recarrega a sessão quando os dados do usuário mudarem em outro dispositivo
+    watch_user_data(st.session_state.user_id)
+    
     # Cabeçalho principal
     st.markdown("<h1 class='main-header'>Finance Tracker</h1>", unsafe_allow_html=True)
     
@@ -273,6 +277,7 @@ else:
     
     # Botão de logout
     if st.button("Sair"):
+        stop_watching()
         st.session_state.logged_in = False
         st.session_state.user_id = None
         st.session_state.user_name = None
@@ -0,0 +1,2 @@
+# Os módulos de benchmark não são importados aqui: o backend de armazenamento
+# (STORAGE_BACKEND) precisa ser definido antes da importação dos serviços.
@@ -0,0 +1,162 @@
+import datetime
+import random
+from typing import Dict, List, Optional
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar os serviços
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from services.transaction_service import TransactionService
+from services.category_service import CategoryService
+from services.goal_service import GoalService
+
+# Faixas de valores (mínimo, máximo) por categoria padrão
+CATEGORY_AMOUNTS = {
+    "Alimentação": (15, 400),
+    "Moradia": (300, 3000),
+    "Transporte": (5, 350),
+    "Saúde": (20, 800),
+    "Educação": (50, 1500),
+    "Lazer": (10, 600),
+    "Vestuário": (30, 700),
+    "Salário": (2500, 12000),
+    "Freelance": (200, 4000),
+    "Investimentos": (10, 2000),
+    "Presentes": (50, 1000)
+}
+
+# Descrições de exemplo por categoria
+CATEGORY_DESCRIPTIONS = {
+    "Alimentação": ["Supermercado", "Restaurante", "Padaria", "Delivery", "Feira"],
+    "Moradia": ["Aluguel", "Condomínio", "Energia", "Água", "Internet"],
+    "Transporte": ["Combustível", "Ônibus", "Aplicativo de transporte", "Estacionamento"],
+    "Saúde": ["Farmácia", "Consulta", "Plano de saúde", "Exames"],
+    "Educação": ["Mensalidade", "Curso online", "Livros"],
+    "Lazer": ["Cinema", "Streaming", "Viagem", "Show"],
+    "Vestuário": ["Roupas", "Calçados", "Acessórios"],
+    "Salário": ["Salário", "Bônus"],
+    "Freelance": ["Projeto freelance", "Consultoria"],
+    "Investimentos": ["Dividendos", "Rendimento CDB", "Juros"],
+    "Presentes": ["Presente de aniversário", "Presente"]
+}
+
+PAYMENT_METHODS = ["Cartão de crédito", "Cartão de débito", "PIX", "Dinheiro", "Boleto"]
+
+# Proporção de receitas entre as transações geradas
+INCOME_RATIO = 0.15
+
+# Tamanho dos lotes de inserção
+INSERT_CHUNK_SIZE = 5000
+
+def generate_transactions(
+    user_id: str,
+    count: int,
+    categories: List[Dict],
+    seed: int = 42,
+    days: int = 730,
+    end_date: Optional[datetime.date] = None
+) -> List[Dict]:
+    """
+    Gera transações sintéticas determinísticas para um usuário.
+    
+    Args:
+        user_id: ID do usuário
+        count: Número de transações
+        categories: Categorias do usuário (name e type)
+        seed: Semente do gerador aleatório
+        days: Número de dias de histórico
+        end_date: Data mais recente do histórico (padrão: hoje)
+    
+    Returns:
+        Lista de dicionários com os argumentos de TransactionService.add_transaction
+    """
+    rng = random.Random(seed)
+    end_date = end_date or datetime.date.today()
+    
+    income_categories = [c["name"] for c in categories if c.get("type") == "income"]
+    expense_categories = [c["name"] for c in categories if c.get("type") == "expense"]
+    
+    transactions = []
+    
+    for _ in range(count):
+        if income_categories and rng.random() < INCOME_RATIO:
+            transaction_type = "income"
+            category = rng.choice(income_categories)
+        else:
+            transaction_type = "expense"
+            category = rng.choice(expense_categories)
+        
+        low, high = CATEGORY_AMOUNTS.get(category, (10, 500))
+        
+        transactions.append({
+            "description": rng.choice(CATEGORY_DESCRIPTIONS.get(category, [category])),
+            "transaction_type": transaction_type,
+            "category": category,
+            "amount": round(rng.uniform(low, high), 2),
+            "date": end_date - datetime.timedelta(days=rng.randrange(days)),
+            "user_id": user_id,
+            "payment_method": rng.choice(PAYMENT_METHODS)
+        })
+    
+    return transactions
+
+def generate_user_data(
+    user_id: str,
+    transaction_count: int,
+    seed: int = 42,
+    goal_count: int = 10
+) -> Dict:
+    """
+    Cria um usuário sintético completo no backend configurado: categorias padrão,
+    transações e metas.
+    
+    Args:
+        user_id: ID do usuário
+        transaction_count: Número de transações a gerar
+        seed: Semente do gerador aleatório
+        goal_count: Número de metas a gerar
+    
+    Returns:
+        Dicionário com o número de categorias, transações e metas criadas
+    """
+    rng = random.Random(seed)
+    
+    # Categorias padrão do usuário
+    CategoryService.create_default_categories(user_id)
+    categories = CategoryService.list_categories(user_id, include_default=False)
+    
+    # Transações inseridas em lotes
+    transactions = generate_transactions(user_id, transaction_count, categories, seed=seed)
+    created_transactions = 0
+    
+    for start in range(0, len(transactions), INSERT_CHUNK_SIZE):
+        chunk = transactions[start:start + INSERT_CHUNK_SIZE]
+        created_transactions += sum(
+            1 for transaction_id in TransactionService.add_transactions(chunk)
+            if transaction_id
+        )
+    
+    # Metas com prazos e progresso variados
+    today = datetime.date.today()
+    created_goals = 0
+    
+    for i in range(goal_count):
+        target = round(rng.uniform(1000, 50000), 2)
+        goal_id = GoalService.add_goal(
+            name=f"Meta {i + 1}",
+            target_amount=target,
+            current_amount=round(target * rng.uniform(0, 1.1), 2),
+            deadline=today + datetime.timedelta(days=rng.randrange(-30, 365)),
+            user_id=user_id,
+            priority=rng.choice(["high", "medium", "low"])
+        )
+        if goal_id:
+            created_goals += 1
+    
+    return {
+        "categories": len(categories),
+        "transactions": created_transactions,
+        "goals": created_goals
+    }
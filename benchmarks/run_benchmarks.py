@@ -0,0 +1,230 @@
+"""
+Benchmark da camada de serviços.
+
+Gera usuários sintéticos com volumes crescentes de transações em um backend local
+e mede o tempo das principais consultas de TransactionService e GoalService.
+
+Uso:
+    python -m benchmarks.run_benchmarks --backend memory --sizes 1000,10000
+    python -m benchmarks.run_benchmarks --output atual.json --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Adiciona o diretório raiz ao path para importar os serviços
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Tolerância padrão antes de considerar uma operação como regressão (20% mais lenta)
+DEFAULT_THRESHOLD = 1.2
+
+def time_operation(operation: Callable, repeat: int) -> Dict:
+    """
+    Executa uma operação várias vezes e resume os tempos em milissegundos.
+    
+    Args:
+        operation: Função sem argumentos a ser medida
+        repeat: Número de execuções
+    
+    Returns:
+        Dicionário com min, mediana, média e máximo em milissegundos
+    """
+    timings = []
+    
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": repeat
+    }
+
+def benchmark_user(user_id: str, repeat: int) -> Dict:
+    """
+    Mede as consultas da camada de serviços para um usuário.
+    
+    Args:
+        user_id: ID do usuário já populado
+        repeat: Número de execuções por operação
+    
+    Returns:
+        Dicionário com os tempos de cada operação
+    """
+    from services.transaction_service import TransactionService
+    from services.goal_service import GoalService
+    
+    today = datetime.date.today()
+    month_start = today.replace(day=1)
+    year_start = today.replace(month=1, day=1)
+    
+    operations = {
+        "list_transactions": lambda: TransactionService.list_transactions(user_id),
+        "list_transactions_month": lambda: TransactionService.list_transactions(
+            user_id, start_date=month_start, end_date=today
+        ),
+        "get_summary": lambda: TransactionService.get_summary(user_id, year_start, today),
+        "get_category_summary": lambda: TransactionService.get_category_summary(
+            user_id, "expense", year_start, today
+        ),
+        "get_monthly_summary": lambda: TransactionService.get_monthly_summary(user_id, 12),
+        "get_goals_summary": lambda: GoalService.get_goals_summary(user_id)
+    }
+    
+    return {
+        name: time_operation(operation, repeat)
+        for name, operation in operations.items()
+    }
+
+def get_git_commit() -> Optional[str]:
+    """
+    Retorna o commit atual do repositório, se disponível.
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root_dir,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def run_benchmarks(sizes: List[int], repeat: int, seed: int) -> Dict:
+    """
+    Popula um usuário por tamanho e mede as operações de cada um.
+    
+    Args:
+        sizes: Números de transações por usuário
+        repeat: Número de execuções por operação
+        seed: Semente do gerador de dados
+    
+    Returns:
+        Dicionário com metadados e resultados por tamanho
+    """
+    from benchmarks.data_generator import generate_user_data
+    
+    results = {}
+    
+    for size in sizes:
+        user_id = f"bench_user_{size}"
+        
+        print(f"Gerando {size} transações para {user_id}...")
+        start = time.perf_counter()
+        created = generate_user_data(user_id, size, seed=seed)
+        generation_seconds = time.perf_counter() - start
+        
+        print(f"Medindo operações para {size} transações...")
+        results[str(size)] = {
+            "generated": created,
+            "generation_seconds": round(generation_seconds, 3),
+            "operations": benchmark_user(user_id, repeat)
+        }
+    
+    return {
+        "metadata": {
+            "backend": os.getenv("STORAGE_BACKEND"),
+            "use_monthly_rollups": os.getenv("USE_MONTHLY_ROLLUPS", "false"),
+            "seed": seed,
+            "repeat": repeat,
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.datetime.now().isoformat()
+        },
+        "results": results
+    }
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compara as medianas com um resultado anterior.
+    
+    Args:
+        current: Resultado atual
+        baseline: Resultado de referência
+        threshold: Razão máxima aceitável entre a mediana atual e a de referência
+    
+    Returns:
+        Lista de descrições das regressões encontradas
+    """
+    regressions = []
+    
+    for size, result in current["results"].items():
+        baseline_result = baseline.get("results", {}).get(size)
+        if not baseline_result:
+            continue
+        
+        for name, timing in result["operations"].items():
+            baseline_timing = baseline_result["operations"].get(name)
+            if not baseline_timing or baseline_timing["median_ms"] <= 0:
+                continue
+            
+            ratio = timing["median_ms"] / baseline_timing["median_ms"]
+            print(f"{size:>8} {name:<26} {baseline_timing['median_ms']:>10.3f} ms -> "
+                  f"{timing['median_ms']:>10.3f} ms ({ratio:.2f}x)")
+            
+            if ratio > threshold:
+                regressions.append(f"{name} com {size} transações: {ratio:.2f}x mais lento")
+    
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da camada de serviços.")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory",
+                        help="Backend de armazenamento local (padrão: memory)")
+    parser.add_argument("--sqlite-path", default=":memory:",
+                        help="Arquivo do banco SQLite (padrão: banco em memória)")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Números de transações por usuário, separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Execuções por operação (padrão: 5)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Semente do gerador de dados (padrão: 42)")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="Arquivo JSON de saída")
+    parser.add_argument("--compare", help="Arquivo JSON de referência para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Razão máxima aceitável em relação à referência (padrão: 1.2)")
+    args = parser.parse_args()
+    
+    # O backend precisa ser definido antes da importação dos serviços
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["SQLITE_DB_PATH"] = args.sqlite_path
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_benchmarks(sizes, args.repeat, args.seed)
+    
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare_results(report, json.load(baseline_file), args.threshold)
+        
+        if regressions:
+            print("Regressões encontradas:")
+            for regression in regressions:
+                print(f"- {regression}")
+            return 1
+        
+        print("Nenhuma regressão encontrada.")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
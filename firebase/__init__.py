@@ -1,22 +1,52 @@
 from firebase.firebase_config import (
     initialize_firebase,
     get_firestore,
+    close_firestore,
+    get_client_stats,
     get_collection,
     add_document,
     get_document,
     update_document,
+    set_document,
+    increment_document,
+    transactional_increment,
     delete_document,
-    query_documents
+    get_documents,
+    bulk_add,
+    bulk_update,
+    bulk_set,
+    bulk_delete,
+    build_query,
+    query_documents,
+    stream_documents,
+    query_page,
+    use_backend,
+    get_backend
 )
 
 # Exportar todas as funções disponíveis no pacote
 __all__ = [
     'initialize_firebase',
     'get_firestore',
+    'close_firestore',
+    'get_client_stats',
     'get_collection',
     'add_document',
     'get_document',
     'update_document',
+    'set_document',
+    'increment_document',
+    'transactional_increment',
     'delete_document',
-    'query_documents'
+    'get_documents',
+    'bulk_add',
+    'bulk_update',
+    'bulk_set',
+    'bulk_delete',
+    'build_query',
+    'query_documents',
+    'stream_documents',
+    'query_page',
+    'use_backend',
+    'get_backend'
 ] 
\ No newline at end of file
@@ -1,12 +1,33 @@
 import os
+import atexit
+import threading
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import AlreadyExists
 from dotenv import load_dotenv
 from pathlib import Path
 
+from firebase import instrumentation
+from firebase.instrumentation import report_error
+from storage.base import encode_cursor, decode_cursor
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
+# Número máximo de operações por WriteBatch do Firestore
+BATCH_LIMIT = 500
+
+# Cliente Firestore e referências de coleção compartilhados por todas as sessões do processo
+_client = None
+_collections = {}
+_client_lock = threading.Lock()
+_client_stats = {
+    "clients_created": 0,
+    "client_reuses": 0,
+    "collections_created": 0,
+    "collection_reuses": 0
+}
+
 # Verifica se já existe uma instância do Firebase inicializada
 def initialize_firebase():
     """
@@ -42,9 +63,68 @@ def initialize_firebase():
 # Função para obter uma referência ao Firestore
 def get_firestore():
     """
-    Retorna uma instância do cliente Firestore, inicializando o Firebase se necessário.
+    Retorna o cliente Firestore compartilhado pelo processo, inicializando o Firebase
+    na primeira chamada.
+    
+    O cliente é criado uma única vez (de forma segura entre threads) e reutilizado por
+    todas as sessões do Streamlit, evitando reinicializações e novos canais gRPC.
+    """
+    global _client
+    
+    # Caminho rápido: cliente já criado (os contadores são apenas estatísticas e
+    # não usam o lock; sob concorrência podem perder incrementos)
+    client = _client
+    if client is not None:
+        _client_stats["client_reuses"] += 1
+        return client
+    
+    with _client_lock:
+        # Outra thread pode ter criado o cliente enquanto aguardávamos o lock
+        if _client is None:
+            _client = initialize_firebase()
+            if _client is not None:
+                _client_stats["clients_created"] += 1
+        else:
+            _client_stats["client_reuses"] += 1
+        return _client
+
+def close_firestore():
+    """
+    Encerra o cliente Firestore compartilhado e limpa o cache de coleções.
+    
+    O app do Firebase também é removido, pois firestore.client() guarda o cliente
+    por app; assim a próxima chamada a get_firestore cria um novo cliente.
+    """
+    global _client
+    
+    with _client_lock:
+        if _client is not None:
+            try:
+                _client.close()
+            except Exception as e:
+                print(f"Erro ao encerrar cliente Firestore: {e}")
+        
+        if firebase_admin._apps:
+            try:
+                firebase_admin.delete_app(firebase_admin.get_app())
+            except Exception as e:
+                print(f"Erro ao remover app do Firebase: {e}")
+        
+        _client = None
+        _collections.clear()
+
+def get_client_stats():
+    """
+    Retorna os contadores de criação e reutilização do cliente e das coleções.
+    
+    Returns:
+        dict: Cópia dos contadores atuais.
     """
-    return initialize_firebase()
+    with _client_lock:
+        return dict(_client_stats)
+
+# Encerra o cliente ao finalizar o processo
+atexit.register(close_firestore)
 
 # Funções utilitárias para operações no Firestore
 
@@ -52,15 +132,30 @@ def get_collection(collection_name):
     """
     Retorna uma referência para a coleção especificada.
     
+    As referências são mantidas em cache junto com o cliente compartilhado.
+    
     Args:
         collection_name (str): Nome da coleção no Firestore.
         
     Returns:
         firestore.CollectionReference: Referência para a coleção.
     """
+    collection_ref = _collections.get(collection_name)
+    if collection_ref is not None:
+        _client_stats["collection_reuses"] += 1
+        return collection_ref
+    
     db = get_firestore()
     if db:
-        return db.collection(collection_name)
+        with _client_lock:
+            collection_ref = _collections.get(collection_name)
+            if collection_ref is None:
+                collection_ref = db.collection(collection_name)
+                _collections[collection_name] = collection_ref
+                _client_stats["collections_created"] += 1
+            else:
+                _client_stats["collection_reuses"] += 1
+        return collection_ref
     return None
 
 def add_document(collection_name, data):
@@ -80,7 +175,7 @@ def add_document(collection_name, data):
             doc_ref = collection_ref.add(data)[1]
             return doc_ref.id
         except Exception as e:
-            print(f"Erro ao adicionar documento: {e}")
+            report_error(f"Erro ao adicionar documento: {e}")
     return None
 
 def get_document(collection_name, document_id):
@@ -101,7 +196,7 @@ def get_document(collection_name, document_id):
             if doc.exists:
                 return doc.to_dict()
         except Exception as e:
-            print(f"Erro ao obter documento: {e}")
+            report_error(f"Erro ao obter documento: {e}")
     return None
 
 def update_document(collection_name, document_id, data):
@@ -122,9 +217,137 @@ def update_document(collection_name, document_id, data):
             collection_ref.document(document_id).update(data)
             return True
         except Exception as e:
-            print(f"Erro ao atualizar documento: {e}")
+            report_error(f"Erro ao atualizar documento: {e}")
+    return False
+
+def set_document(collection_name, document_id, data, merge=False):
+    """
+    Cria ou sobrescreve um documento com ID conhecido.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_id (str): ID do documento.
+        data (dict): Dados a serem gravados.
+        merge (bool): Se True, mescla com os dados existentes em vez de sobrescrever.
+        
+    Returns:
+        bool: True se a gravação for bem-sucedida, False caso contrário.
+    """
+    return _set_document_impl(collection_name, document_id, data, merge)
+
+def create_document(collection_name, document_id, data):
+    """
+    Cria um documento com ID conhecido apenas se ele ainda não existir (operação
+    atômica no servidor, ex: para reservar uma chave única).
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_id (str): ID do documento.
+        data (dict): Dados do documento.
+        
+    Returns:
+        bool: True se o documento foi criado, False se já existia ou houve erro.
+    """
+    collection_ref = get_collection(collection_name)
+    if collection_ref:
+        try:
+            collection_ref.document(document_id).create(data)
+            return True
+        except AlreadyExists:
+            return False
+        except Exception as e:
+            report_error(f"Erro ao criar documento: {e}")
+    return False
+
+def _set_document_impl(collection_name, document_id, data, merge):
+    # Implementação sem instrumentação, compartilhada com increment_document para que
+    # cada chamada pública registre um único evento nas métricas
+    collection_ref = get_collection(collection_name)
+    if collection_ref:
+        try:
+            collection_ref.document(document_id).set(data, merge=merge)
+            return True
+        except Exception as e:
+            report_error(f"Erro ao gravar documento: {e}")
     return False
 
+def _to_increments(values):
+    """
+    Converte recursivamente os valores numéricos de um dicionário em firestore.Increment.
+    """
+    return {
+        key: _to_increments(value) if isinstance(value, dict) else firestore.Increment(value)
+        for key, value in values.items()
+    }
+
+def increment_document(collection_name, document_id, increments, data=None):
+    """
+    Aplica incrementos atômicos no servidor, criando o documento se necessário.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_id (str): ID do documento.
+        increments (dict): Campos numéricos (podem ser aninhados) e os deltas a aplicar.
+        data (dict, optional): Campos adicionais gravados sem incremento.
+        
+    Returns:
+        bool: True se a gravação for bem-sucedida, False caso contrário.
+    """
+    payload = dict(data or {})
+    payload.update(_to_increments(increments))
+    return _set_document_impl(collection_name, document_id, payload, merge=True)
+
+def transactional_increment(collection_name, document_id, increments, derive=None):
+    """
+    Incrementa campos numéricos de um documento dentro de uma transação do Firestore.
+    
+    O incremento é gravado com firestore.Increment e os campos derivados são calculados
+    a partir dos valores lidos na mesma transação, que é repetida automaticamente em caso
+    de conflito com gravações concorrentes.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_id (str): ID do documento.
+        increments (dict): Campos numéricos e os deltas a aplicar.
+        derive (callable, optional): Função que recebe os dados do documento já com os
+            incrementos aplicados e retorna um dicionário de campos adicionais a gravar.
+        
+    Returns:
+        bool: True se a atualização for bem-sucedida, False caso contrário.
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return False
+    
+    doc_ref = collection_ref.document(document_id)
+    
+    @firestore.transactional
+    def apply(transaction):
+        snapshot = doc_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            report_error(f"Documento não encontrado: {document_id}")
+            return False
+        
+        # Valores resultantes, usados apenas para derivar os demais campos
+        data = snapshot.to_dict()
+        for field, delta in increments.items():
+            data[field] = data.get(field, 0) + delta
+        
+        update_data = derive(data) if derive else {}
+        update_data.update({
+            field: firestore.Increment(delta)
+            for field, delta in increments.items()
+        })
+        
+        transaction.update(doc_ref, update_data)
+        return True
+    
+    try:
+        return apply(get_firestore().transaction())
+    except Exception as e:
+        report_error(f"Erro ao incrementar documento: {e}")
+        return False
+
 def delete_document(collection_name, document_id):
     """
     Exclui um documento pelo ID.
@@ -142,10 +365,224 @@ def delete_document(collection_name, document_id):
             collection_ref.document(document_id).delete()
             return True
         except Exception as e:
-            print(f"Erro ao excluir documento: {e}")
+            report_error(f"Erro ao excluir documento: {e}")
     return False
 
-def query_documents(collection_name, field=None, operator=None, value=None):
+def get_documents(collection_name, document_ids):
+    """
+    Obtém vários documentos pelo ID em uma única chamada (get_all).
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_ids (list): IDs dos documentos.
+        
+    Returns:
+        dict: Mapa de ID para dados do documento (documentos inexistentes são omitidos).
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref or not document_ids:
+        return {}
+    
+    try:
+        refs = [collection_ref.document(document_id) for document_id in document_ids]
+        return {
+            doc.id: doc.to_dict()
+            for doc in get_firestore().get_all(refs)
+            if doc.exists
+        }
+    except Exception as e:
+        report_error(f"Erro ao obter documentos: {e}")
+        return {}
+
+def _commit_in_batches(operations):
+    """
+    Executa operações de escrita em WriteBatches de até BATCH_LIMIT operações.
+    
+    Args:
+        operations (list): Lista de tuplas (operação, referência do documento, dados),
+            onde operação é 'set', 'update' ou 'delete'.
+        
+    Returns:
+        list: Lista de bool, na ordem das operações, indicando se cada uma foi gravada.
+    """
+    results = []
+    db = get_firestore()
+    
+    for start in range(0, len(operations), BATCH_LIMIT):
+        chunk = operations[start:start + BATCH_LIMIT]
+        try:
+            batch = db.batch()
+            for operation, doc_ref, data in chunk:
+                if operation == "delete":
+                    batch.delete(doc_ref)
+                elif operation == "update":
+                    batch.update(doc_ref, data)
+                else:
+                    batch.set(doc_ref, data)
+            batch.commit()
+            results.extend([True] * len(chunk))
+        except Exception as e:
+            # Um batch é atômico: se falhar, nenhuma operação do bloco foi gravada
+            report_error(f"Erro ao gravar lote de documentos: {e}")
+            results.extend([False] * len(chunk))
+    
+    return results
+
+def bulk_add(collection_name, items):
+    """
+    Adiciona vários documentos usando gravações em lote.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        items (list): Lista de dicionários a serem adicionados.
+        
+    Returns:
+        list: IDs dos documentos adicionados, na ordem de entrada (None para itens com erro).
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return [None] * len(items)
+    
+    # IDs gerados no cliente para permitir gravação em lote
+    doc_refs = [collection_ref.document() for _ in items]
+    results = _commit_in_batches([
+        ("set", doc_ref, data)
+        for doc_ref, data in zip(doc_refs, items)
+    ])
+    
+    return [doc_ref.id if ok else None for doc_ref, ok in zip(doc_refs, results)]
+
+def bulk_update(collection_name, updates):
+    """
+    Atualiza vários documentos usando gravações em lote.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        updates (list): Lista de tuplas (document_id, dados).
+        
+    Returns:
+        list: Lista de bool, na ordem de entrada, indicando o sucesso de cada atualização.
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return [False] * len(updates)
+    
+    return _commit_in_batches([
+        ("update", collection_ref.document(document_id), data)
+        for document_id, data in updates
+    ])
+
+def bulk_set(collection_name, documents):
+    """
+    Grava (sobrescrevendo) vários documentos com IDs conhecidos usando gravações em lote.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        documents (list): Lista de tuplas (document_id, dados).
+    
+    Returns:
+        list: Lista de bool, na ordem de entrada, indicando o sucesso de cada gravação.
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return [False] * len(documents)
+    
+    return _commit_in_batches([
+        ("set", collection_ref.document(document_id), data)
+        for document_id, data in documents
+    ])
+
+def bulk_delete(collection_name, document_ids):
+    """
+    Exclui vários documentos usando gravações em lote.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        document_ids (list): IDs dos documentos a excluir.
+        
+    Returns:
+        list: Lista de bool, na ordem de entrada, indicando o sucesso de cada exclusão.
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return [False] * len(document_ids)
+    
+    return _commit_in_batches([
+        ("delete", collection_ref.document(document_id), None)
+        for document_id in document_ids
+    ])
+
+def build_query(
+    collection_ref,
+    field=None,
+    operator=None,
+    value=None,
+    filters=None,
+    order_by=None,
+    descending=False,
+    limit=None,
+    start_after=None,
+    select=None
+):
+    """
+    Monta uma consulta composta sobre uma referência de coleção.
+    
+    Args:
+        collection_ref (firestore.CollectionReference): Coleção a ser consultada.
+        field (str, optional): Campo para um filtro simples.
+        operator (str, optional): Operador do filtro simples.
+        value (any, optional): Valor do filtro simples.
+        filters (list, optional): Lista de tuplas (campo, operador, valor) combinadas com AND.
+        order_by (str, optional): Campo usado para ordenar os resultados.
+        descending (bool): Se True, ordena de forma decrescente.
+        limit (int, optional): Número máximo de documentos retornados pelo servidor.
+        start_after (firestore.DocumentSnapshot, optional): Documento após o qual a consulta começa.
+        select (list, optional): Campos retornados pelo servidor (projeção); o ID é sempre incluído.
+        
+    Returns:
+        firestore.Query: Consulta pronta para execução.
+    """
+    query = collection_ref
+    
+    # Filtro simples (mantido por compatibilidade)
+    if field and operator and value is not None:
+        query = query.where(field, operator, value)
+    
+    # Filtros compostos
+    for filter_field, filter_operator, filter_value in filters or []:
+        if filter_value is not None:
+            query = query.where(filter_field, filter_operator, filter_value)
+    
+    # Ordenação no servidor
+    if order_by:
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        query = query.order_by(order_by, direction=direction)
+    
+    # Cursor de paginação
+    if start_after is not None:
+        query = query.start_after(start_after)
+    
+    # Limite no servidor
+    if limit and limit > 0:
+        query = query.limit(limit)
+    
+    # Projeção: apenas os campos selecionados são transferidos
+    if select:
+        query = query.select(list(select))
+    
+    return query
+
+def query_documents(
+    collection_name,
+    field=None,
+    operator=None,
+    value=None,
+    filters=None,
+    order_by=None,
+    descending=False,
+    limit=None,
+    select=None
+):
     """
     Consulta documentos em uma coleção com filtros opcionais.
     
@@ -154,6 +591,11 @@ def query_documents(collection_name, field=None, operator=None, value=None):
         field (str, optional): Campo para filtrar.
         operator (str, optional): Operador para o filtro ('==', '>', '<', '>=', '<=', 'array_contains').
         value (any, optional): Valor para comparar.
+        filters (list, optional): Lista de tuplas (campo, operador, valor) aplicadas no servidor.
+        order_by (str, optional): Campo para ordenação no servidor.
+        descending (bool): Se True, ordena de forma decrescente.
+        limit (int, optional): Número máximo de documentos a retornar.
+        select (list, optional): Campos retornados pelo servidor (padrão: todos).
         
     Returns:
         list: Lista de documentos que atendem aos critérios ou lista vazia se nenhum for encontrado.
@@ -163,11 +605,18 @@ def query_documents(collection_name, field=None, operator=None, value=None):
         return []
     
     try:
-        # Se houver filtros, aplica-os
-        if field and operator and value is not None:
-            query = collection_ref.where(field, operator, value)
-        else:
-            query = collection_ref
+        # Monta a consulta com filtros, ordenação e limite
+        query = build_query(
+            collection_ref,
+            field=field,
+            operator=operator,
+            value=value,
+            filters=filters,
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            select=select
+        )
             
         # Executa a consulta
         docs = query.stream()
@@ -181,9 +630,199 @@ def query_documents(collection_name, field=None, operator=None, value=None):
             
         return result
     except Exception as e:
-        print(f"Erro ao consultar documentos: {e}")
+        report_error(f"Erro ao consultar documentos: {e}")
         return []
 
+def stream_documents(
+    collection_name,
+    field=None,
+    operator=None,
+    value=None,
+    filters=None,
+    order_by=None,
+    descending=False,
+    limit=None,
+    select=None
+):
+    """
+    Consulta documentos e os retorna um a um, sem materializar o resultado em memória.
+    
+    Aceita os mesmos argumentos de query_documents.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        field (str, optional): Campo para filtrar.
+        operator (str, optional): Operador para o filtro.
+        value (any, optional): Valor para comparar.
+        filters (list, optional): Lista de tuplas (campo, operador, valor) aplicadas no servidor.
+        order_by (str, optional): Campo para ordenação no servidor.
+        descending (bool): Se True, ordena de forma decrescente.
+        limit (int, optional): Número máximo de documentos a retornar.
+        select (list, optional): Campos retornados pelo servidor (padrão: todos).
+        
+    Yields:
+        dict: Dados de cada documento, incluindo o campo 'id'.
+    """
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return
+    
+    try:
+        query = build_query(
+            collection_ref,
+            field=field,
+            operator=operator,
+            value=value,
+            filters=filters,
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            select=select
+        )
+        
+        for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id  # Adiciona o ID do documento aos dados
+            yield data
+    except Exception as e:
+        report_error(f"Erro ao consultar documentos: {e}")
+
+def query_page(
+    collection_name,
+    filters=None,
+    order_by=None,
+    descending=False,
+    page_size=20,
+    cursor=None,
+    select=None
+):
+    """
+    Consulta uma página de documentos usando cursores do Firestore (start_after).
+    
+    Cada página custa uma leitura limitada a page_size + 1 documentos (mais a leitura
+    do documento do cursor), independentemente do tamanho da coleção.
+    
+    Args:
+        collection_name (str): Nome da coleção.
+        filters (list, optional): Lista de tuplas (campo, operador, valor).
+        order_by (str, optional): Campo para ordenação no servidor.
+        descending (bool): Se True, ordena de forma decrescente.
+        page_size (int): Número de documentos por página.
+        cursor (str, optional): Token retornado pela página anterior.
+        select (list, optional): Campos retornados pelo servidor (padrão: todos).
+        
+    Returns:
+        dict: {'documents': lista de documentos, 'next_cursor': token da próxima página ou None}.
+    """
+    empty_page = {"documents": [], "next_cursor": None}
+    
+    collection_ref = get_collection(collection_name)
+    if not collection_ref:
+        return empty_page
+    
+    try:
+        # Resolve o cursor para o snapshot do último documento da página anterior
+        start_after = None
+        if cursor:
+            document_id = decode_cursor(cursor)
+            # Com projeção, o cursor só precisa do campo de ordenação
+            field_paths = ([order_by] if order_by else list(select)) if select else None
+            start_after = (
+                collection_ref.document(document_id).get(field_paths=field_paths)
+                if document_id else None
+            )
+            if start_after is None or not start_after.exists:
+                report_error("Cursor de paginação inválido")
+                return empty_page
+        
+        # Busca um documento a mais para saber se existe próxima página
+        query = build_query(
+            collection_ref,
+            filters=filters,
+            order_by=order_by,
+            descending=descending,
+            limit=page_size + 1,
+            start_after=start_after,
+            select=select
+        )
+        
+        documents = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            documents.append(data)
+        
+        next_cursor = None
+        if len(documents) > page_size:
+            documents = documents[:page_size]
+            next_cursor = encode_cursor(documents[-1]['id'])
+        
+        return {"documents": documents, "next_cursor": next_cursor}
+    except Exception as e:
+        report_error(f"Erro ao consultar página de documentos: {e}")
+        return empty_page
+
+# Backend de armazenamento alternativo
+
+# Funções de documento que podem ser atendidas por outro backend
+BACKEND_FUNCTIONS = (
+    'add_document',
+    'get_document',
+    'get_documents',
+    'update_document',
+    'set_document',
+    'create_document',
+    'increment_document',
+    'transactional_increment',
+    'delete_document',
+    'bulk_add',
+    'bulk_update',
+    'bulk_set',
+    'bulk_delete',
+    'query_documents',
+    'stream_documents',
+    'query_page'
+)
+
+_backend = None
+
+def use_backend(backend):
+    """
+    Substitui as funções de documento deste módulo pelos métodos de um backend.
+    
+    Os serviços importam essas funções diretamente, então a troca precisa acontecer
+    antes da importação dos serviços (o que ocorre automaticamente via STORAGE_BACKEND).
+    
+    Args:
+        backend (storage.StorageBackend): Backend de armazenamento a ser usado.
+    """
+    global _backend
+    _backend = backend
+    _install_functions({name: getattr(backend, name) for name in BACKEND_FUNCTIONS})
+
+def _install_functions(functions):
+    # Instrumenta as funções quando FIRESTORE_METRICS estiver habilitado
+    for name, function in functions.items():
+        if instrumentation.is_enabled():
+            function = instrumentation.instrument(name, function)
+        globals()[name] = function
+
+def get_backend():
+    """
+    Retorna o backend alternativo em uso ou None se o Firestore estiver sendo usado.
+    """
+    return _backend
+
+# Seleciona o backend configurado em STORAGE_BACKEND ('firestore', 'memory' ou 'sqlite')
+if os.getenv("STORAGE_BACKEND", "firestore").lower() != "firestore":
+    from storage import create_backend
+    use_backend(create_backend())
+elif instrumentation.is_enabled():
+    _install_functions({name: globals()[name] for name in BACKEND_FUNCTIONS})
+
+if instrumentation.is_enabled():
+    instrumentation.configure()
+
 # Para testes
 if __name__ == "__main__":
     # Teste de conexão
@@ -0,0 +1,378 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Limites (em segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Diretórios cujas chamadas não são consideradas a origem de uma operação
+_INTERNAL_DIRS = (
+    str(Path(__file__).parent),
+    str(Path(__file__).parent.parent / "storage")
+)
+
+# Página atual da sessão (cada sessão do Streamlit roda em sua própria thread)
+_current_page = contextvars.ContextVar("firestore_page", default="")
+
+# Operação em andamento, usada para associar erros reportados à operação
+_current_event = contextvars.ContextVar("firestore_event", default=None)
+
+logger = logging.getLogger("firestore.metrics")
+
+def set_page(page: str) -> None:
+    """
+    Define a página responsável pelas próximas operações da sessão atual.
+    
+    Args:
+        page: Nome da página (ex: "Dashboard")
+    """
+    _current_page.set(page)
+
+def report_error(message: str) -> None:
+    """
+    Exibe uma mensagem de erro e marca a operação em andamento como falha.
+    
+    Args:
+        message: Mensagem de erro
+    """
+    print(message)
+    event = _current_event.get()
+    if event is not None:
+        event["error"] = True
+
+def _find_caller() -> str:
+    """
+    Identifica a função fora da camada de armazenamento que originou a operação.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        if not frame.f_code.co_filename.startswith(_INTERNAL_DIRS):
+            function_name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            return f"{frame.f_globals.get('__name__', '')}.{function_name}"
+        frame = frame.f_back
+    return ""
+
+class MetricsRegistry:
+    """
+    Agregador de métricas das operações do Firestore em memória, exportado no
+    formato de texto do Prometheus.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[tuple, Dict[str, float]] = {}
+        self._histograms: Dict[tuple, Dict] = {}
+    
+    def __call__(self, event: Dict) -> None:
+        counter_key = (event["operation"], event["collection"], event["page"], event["caller"])
+        histogram_key = (event["operation"], event["collection"])
+        
+        with self._lock:
+            counters = self._counters.setdefault(counter_key, {
+                "operations": 0,
+                "errors": 0,
+                "documents_read": 0,
+                "documents_written": 0
+            })
+            counters["operations"] += 1
+            counters["errors"] += 1 if event["error"] else 0
+            counters["documents_read"] += event["documents_read"]
+            counters["documents_written"] += event["documents_written"]
+            
+            histogram = self._histograms.setdefault(histogram_key, {
+                "buckets": [0] * len(LATENCY_BUCKETS),
+                "sum": 0.0,
+                "count": 0
+            })
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if event["latency_seconds"] <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += event["latency_seconds"]
+            histogram["count"] += 1
+    
+    def snapshot(self) -> Dict:
+        """
+        Retorna uma cópia das métricas acumuladas.
+        
+        Returns:
+            Dicionário com contadores e histogramas
+        """
+        with self._lock:
+            return {
+                "counters": {key: dict(value) for key, value in self._counters.items()},
+                "histograms": {
+                    key: {**value, "buckets": list(value["buckets"])}
+                    for key, value in self._histograms.items()
+                }
+            }
+    
+    def reset(self) -> None:
+        """
+        Zera todas as métricas.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def render_prometheus(self) -> str:
+        """
+        Gera as métricas no formato de texto do Prometheus.
+        
+        Returns:
+            Texto de exposição das métricas
+        """
+        snapshot = self.snapshot()
+        lines = []
+        
+        counter_metrics = (
+            ("operations", "firestore_operations_total", "Operações executadas"),
+            ("errors", "firestore_operation_errors_total", "Operações com erro"),
+            ("documents_read", "firestore_documents_read_total", "Documentos lidos"),
+            ("documents_written", "firestore_documents_written_total", "Documentos gravados")
+        )
+        
+        for field, name, description in counter_metrics:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for (operation, collection, page, caller), counters in snapshot["counters"].items():
+                labels = _format_labels(
+                    operation=operation, collection=collection, page=page, caller=caller
+                )
+                lines.append(f"{name}{{{labels}}} {counters[field]}")
+        
+        name = "firestore_operation_latency_seconds"
+        lines.append(f"# HELP {name} Latência das operações")
+        lines.append(f"# TYPE {name} histogram")
+        for (operation, collection), histogram in snapshot["histograms"].items():
+            labels = _format_labels(operation=operation, collection=collection)
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+        
+        return "\n".join(lines) + "\n"
+
+def _format_labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+    
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+def log_sink(event: Dict) -> None:
+    """
+    Sink que registra cada operação como uma linha de log JSON estruturada.
+    
+    Args:
+        event: Dados da operação
+    """
+    logger.info(json.dumps(event, ensure_ascii=False))
+
+# Registro padrão e sinks ativos
+registry = MetricsRegistry()
+_sinks: List[Callable[[Dict], None]] = [registry]
+
+def add_sink(sink: Callable[[Dict], None]) -> None:
+    """
+    Registra uma função que recebe cada operação instrumentada.
+    
+    Args:
+        sink: Função que recebe o dicionário do evento
+    """
+    _sinks.append(sink)
+
+def remove_sink(sink: Callable[[Dict], None]) -> None:
+    """
+    Remove um sink registrado.
+    
+    Args:
+        sink: Função registrada com add_sink
+    """
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+def _emit(event: Dict) -> None:
+    for sink in list(_sinks):
+        try:
+            sink(event)
+        except Exception as e:
+            print(f"Erro ao registrar métrica: {e}")
+
+# Contagem de documentos lidos e gravados a partir do resultado de cada operação
+def _one_if(result) -> int:
+    return 1 if result else 0
+
+def _count_true(result) -> int:
+    return sum(1 for item in result or [] if item)
+
+DOCUMENT_COUNTERS = {
+    "add_document": (lambda r: 0, _one_if),
+    "get_document": (_one_if, lambda r: 0),
+    "get_documents": (lambda r: len(r or {}), lambda r: 0),
+    "update_document": (lambda r: 0, _one_if),
+    "set_document": (lambda r: 0, _one_if),
+    "increment_document": (lambda r: 0, _one_if),
+    "transactional_increment": (_one_if, _one_if),
+    "delete_document": (lambda r: 0, _one_if),
+    "bulk_add": (lambda r: 0, _count_true),
+    "bulk_update": (lambda r: 0, _count_true),
+    "bulk_set": (lambda r: 0, _count_true),
+    "bulk_delete": (lambda r: 0, _count_true),
+    "query_documents": (lambda r: len(r or []), lambda r: 0),
+    "query_page": (lambda r: len((r or {}).get("documents", [])), lambda r: 0)
+}
+
+# Operações de escrita cujo resultado falso indica erro
+WRITE_OPERATIONS = {
+    "add_document", "update_document", "set_document", "increment_document",
+    "transactional_increment", "delete_document"
+}
+
+def instrument(operation: str, function: Callable) -> Callable:
+    """
+    Envolve uma função de acesso a documentos registrando latência, documentos lidos
+    e gravados e erros.
+    
+    Args:
+        operation: Nome da operação
+        function: Função a instrumentar (primeiro argumento: nome da coleção)
+    
+    Returns:
+        Função instrumentada
+    """
+    if operation == "stream_documents":
+        return _instrument_stream(function)
+    
+    count_read, count_written = DOCUMENT_COUNTERS.get(operation, (lambda r: 0, lambda r: 0))
+    
+    @functools.wraps(function)
+    def wrapper(collection_name, *args, **kwargs):
+        event = _new_event(operation, collection_name)
+        token = _current_event.set(event)
+        start = time.perf_counter()
+        try:
+            result = function(collection_name, *args, **kwargs)
+        except Exception:
+            event["error"] = True
+            raise
+        else:
+            event["documents_read"] = count_read(result)
+            event["documents_written"] = count_written(result)
+            if operation in WRITE_OPERATIONS and not result:
+                event["error"] = True
+            return result
+        finally:
+            event["latency_seconds"] = time.perf_counter() - start
+            _current_event.reset(token)
+            _emit(event)
+    
+    return wrapper
+
+def _instrument_stream(function: Callable) -> Callable:
+    @functools.wraps(function)
+    def wrapper(collection_name, *args, **kwargs):
+        event = _new_event("stream_documents", collection_name)
+        start = time.perf_counter()
+        iterator = function(collection_name, *args, **kwargs)
+        try:
+            while True:
+                # A operação fica ativa apenas enquanto o stream original executa
+                token = _current_event.set(event)
+                try:
+                    document = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    _current_event.reset(token)
+                event["documents_read"] += 1
+                yield document
+        except Exception:
+            event["error"] = True
+            raise
+        finally:
+            # A latência cobre todo o consumo do stream
+            event["latency_seconds"] = time.perf_counter() - start
+            _emit(event)
+    
+    return wrapper
+
+def _new_event(operation: str, collection_name: str) -> Dict:
+    return {
+        "operation": operation,
+        "collection": collection_name,
+        "page": _current_page.get(),
+        "caller": _find_caller(),
+        "latency_seconds": 0.0,
+        "documents_read": 0,
+        "documents_written": 0,
+        "error": False
+    }
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Inicia (uma única vez por processo) um servidor HTTP que expõe /metrics.
+    
+    Args:
+        port: Porta do servidor
+        host: Endereço de escuta (padrão: apenas a máquina local)
+    
+    Returns:
+        Servidor iniciado ou None em caso de erro
+    """
+    global _server
+    
+    if _server is None:
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        except OSError as e:
+            print(f"Erro ao iniciar servidor de métricas: {e}")
+            return None
+    
+    return _server
+
+def is_enabled() -> bool:
+    """
+    Indica se a instrumentação está habilitada (variável FIRESTORE_METRICS).
+    """
+    return os.getenv("FIRESTORE_METRICS", "false").lower() in ("1", "true", "yes")
+
+def configure() -> None:
+    """
+    Configura os sinks a partir das variáveis de ambiente.
+    
+    FIRESTORE_METRICS_LOG habilita o log JSON estruturado e FIRESTORE_METRICS_PORT
+    inicia o endpoint /metrics no formato do Prometheus, no endereço
+    FIRESTORE_METRICS_HOST (padrão: 127.0.0.1).
+    """
+    if os.getenv("FIRESTORE_METRICS_LOG", "false").lower() in ("1", "true", "yes"):
+        add_sink(log_sink)
+    
+    port = os.getenv("FIRESTORE_METRICS_PORT")
+    if port:
+        start_metrics_server(int(port), os.getenv("FIRESTORE_METRICS_HOST") or "127.0.0.1")
@@ -8,10 +8,15 @@ import sys
 # Adiciona o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from firebase.instrumentation import set_page
+
 # Importações futuras dos serviços
 # from services.transaction_service import get_transactions_by_user
 # from services.auth_service import check_authentication
 
+# Identifica a página nas métricas de acesso ao banco
+set_page("Dashboard")
+
 # Configuração da página
 st.set_page_config(
     page_title="Dashboard | Finance Tracker",
@@ -7,11 +7,28 @@ import sys
 # Adiciona o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from firebase.instrumentation import set_page
+from services.transaction_service import TransactionService
+from services.duplicate_service import DuplicateTransactionError
+from services.export_service import ExportService
+from services.import_service import ImportService
+from utils.currency_utils import CurrencyConverter, format_currency_series
+from utils.download_utils import download_button, keep_download
+from utils.realtime_utils import watch_user_data
+
 # Importações futuras dos serviços
-# from services.transaction_service import get_transactions, save_transaction, delete_transaction
 # from services.category_service import get_categories
 # from services.auth_service import check_authentication
 
+# Número de transações por página na listagem
+TAMANHO_PAGINA = 50
+
+# Conversão entre os rótulos da interface e os tipos armazenados
+TIPOS_TRANSACAO = {"Despesa": "expense", "Receita": "income"}
+
+# Identifica a página nas métricas de acesso ao banco
+set_page("Transações")
+
 # Configuração da página
 st.set_page_config(
     page_title="Transações | Finance Tracker",
@@ -48,7 +65,7 @@ st.markdown("""
 st.markdown('<h1 class="main-header">Gerenciar Transações</h1>', unsafe_allow_html=True)
 
 # Tabs para alternar entre registro e lista
-tab1, tab2 = st.tabs(["Registrar Transação", "Listar Transações"])
+tab1, tab2, tab3 = st.tabs(["Registrar Transação", "Listar Transações", "Importar Extrato"])
 
 # Tab de Registro de Transação
 with tab1:
@@ -78,11 +95,60 @@ with tab1:
             observacao = st.text_area("Observação (opcional)", height=95)
         
         submitted = st.form_submit_button("Salvar Transação")
+    
+    if submitted:
+        st.session_state.pop("transacao_duplicada", None)
         
-        if submitted:
-            st.success(f"Transação {tipo} de R$ {valor:.2f} registrada com sucesso!")
-            # Aqui entra a lógica para salvar no Firebase
-            # save_transaction(user_id, descricao, valor, data, tipo, categoria, observacao)
+        if not st.session_state.get("user_id"):
+            st.error("Faça login para registrar transações.")
+        else:
+            nova_transacao = {
+                "description": descricao,
+                "transaction_type": TIPOS_TRANSACAO[tipo],
+                "category": categoria,
+                "amount": valor,
+                "date": data,
+                "user_id": st.session_state.user_id,
+                "notes": observacao or None
+            }
+            
+            try:
+                if TransactionService.add_transaction(**nova_transacao):
+                    st.success(f"Transação {tipo} de R$ {valor:.2f} registrada com sucesso!")
+                else:
+                    st.error("Erro ao registrar a transação.")
+            except DuplicateTransactionError:
+                # Confirmação antes de gravar uma repetição (ex: duas compras iguais)
+                st.session_state.transacao_duplicada = {**nova_transacao, "tipo": tipo}
+    
+    transacao_duplicada = st.session_state.get("transacao_duplicada")
+    if transacao_duplicada:
+        aviso_duplicada = st.empty()
+        aviso_duplicada.warning(
+            f"Já existe uma transação \"{transacao_duplicada['description']}\" de "
+            f"R$ {transacao_duplicada['amount']:.2f} em {transacao_duplicada['date']:%d/%m/%Y}."
+        )
+        
+        col_salvar, col_cancelar = st.columns(2)
+        
+        with col_salvar:
+            if st.button("Salvar mesmo assim", key="salvar_duplicada"):
+                tipo_duplicada = transacao_duplicada.pop("tipo")
+                st.session_state.pop("transacao_duplicada")
+                aviso_duplicada.empty()
+                
+                if TransactionService.add_transaction(**transacao_duplicada, allow_duplicate=True):
+                    st.success(
+                        f"Transação {tipo_duplicada} de R$ {transacao_duplicada['amount']:.2f} "
+                        "registrada com sucesso!"
+                    )
+                else:
+                    st.error("Erro ao registrar a transação.")
+        
+        with col_cancelar:
+            if st.button("Cancelar", key="cancelar_duplicada"):
+                st.session_state.pop("transacao_duplicada")
+                st.rerun()
 
 # Tab de Listagem de Transações
 with tab2:
@@ -122,46 +188,70 @@ with tab2:
     
     st.markdown("---")
     
-    # Dados de exemplo para a tabela de transações
-    dados_exemplo = {
-        'id': ['1', '2', '3', '4', '5', '6', '7', '8'],
-        'descricao': ['Supermercado', 'Aluguel', 'Salário', 'Restaurante', 'Cinema', 'Farmácia', 'Freelance', 'Gasolina'],
-        'valor': [250.00, 1200.00, 5000.00, 75.50, 45.00, 120.00, 800.00, 180.00],
-        'data': [
-            datetime.date(2023, 3, 1),
-            datetime.date(2023, 3, 5),
-            datetime.date(2023, 3, 5),
-            datetime.date(2023, 3, 10),
-            datetime.date(2023, 3, 12),
-            datetime.date(2023, 3, 15),
-            datetime.date(2023, 3, 20),
-            datetime.date(2023, 3, 25),
-        ],
-        'tipo': ['Despesa', 'Despesa', 'Receita', 'Despesa', 'Despesa', 'Despesa', 'Receita', 'Despesa'],
-        'categoria': ['Alimentação', 'Moradia', 'Trabalho', 'Alimentação', 'Lazer', 'Saúde', 'Trabalho', 'Transporte']
+    user_id = st.session_state.get("user_id")
+    
+    # Recarrega a página quando as transações mudarem em outra sessão
+    watch_user_data(user_id)
+    
+    # Filtros enviados ao serviço (aplicados no servidor)
+    filtros = {
+        "start_date": data_inicial,
+        "end_date": data_final,
+        "transaction_type": TIPOS_TRANSACAO.get(filtro_tipo),
+        "category": filtro_categoria if filtro_categoria != "Todos" else None
     }
     
-    df = pd.DataFrame(dados_exemplo)
+    # Pilha de cursores: o topo é o cursor da página atual.
+    # Qualquer mudança de filtro volta para a primeira página.
+    if st.session_state.get("transacoes_filtros") != filtros:
+        st.session_state.transacoes_filtros = filtros
+        st.session_state.transacoes_cursores = [None]
+    
+    cursores = st.session_state.transacoes_cursores
     
-    # Aplicando filtros
-    if filtro_tipo != "Todos":
-        df = df[df['tipo'] == filtro_tipo]
+    pagina = {"transactions": [], "next_cursor": None}
+    if user_id:
+        pagina = TransactionService.list_transactions_page(
+            user_id,
+            filters=filtros,
+            page_size=TAMANHO_PAGINA,
+            cursor=cursores[-1]
+        )
+    else:
+        st.info("Faça login para visualizar suas transações.")
+    
+    tipos_rotulo = {valor: rotulo for rotulo, valor in TIPOS_TRANSACAO.items()}
     
-    if filtro_categoria != "Todos":
-        df = df[df['categoria'] == filtro_categoria]
+    df = pd.DataFrame(
+        [
+            {
+                'id': t.get('id'),
+                'descricao': t.get('description', ''),
+                'valor': t.get('amount', 0),
+                'data': datetime.date.fromisoformat(t['date']) if t.get('date') else None,
+                'tipo': tipos_rotulo.get(t.get('type'), t.get('type')),
+                'categoria': t.get('category', ''),
+                'moeda': t.get('currency') or CurrencyConverter.BASE_CURRENCY
+            }
+            for t in pagina["transactions"]
+        ],
+        columns=['id', 'descricao', 'valor', 'data', 'tipo', 'categoria', 'moeda']
+    )
     
-    df = df[(df['data'] >= data_inicial) & (df['data'] <= data_final)]
+    # Valores formatados de uma vez por moeda (mesmo resultado de format_currency)
+    valores = pd.Series('', index=df.index, dtype=object)
+    for moeda, grupo in df.groupby('moeda'):
+        valores.loc[grupo.index] = format_currency_series(grupo['valor'], moeda)
+    df['valor'] = valores
     
     # Tabela de transações
     st.dataframe(
         df,
         column_config={
             "id": None,  # Esconde a coluna ID
+            "moeda": None,
             "descricao": "Descrição",
-            "valor": st.column_config.NumberColumn(
-                "Valor (R$)",
-                format="R$ %.2f",
-            ),
+            "valor": st.column_config.TextColumn("Valor"),
             "data": st.column_config.DateColumn(
                 "Data",
                 format="DD/MM/YYYY",
@@ -177,9 +267,36 @@ with tab2:
         use_container_width=True,
     )
     
-    # Resumo
-    receitas = df[df['tipo'] == 'Receita']['valor'].sum()
-    despesas = df[df['tipo'] == 'Despesa']['valor'].sum()
+    # Navegação entre páginas
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("← Anterior", disabled=len(cursores) <= 1, use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    
+    with col2:
+        st.markdown(
+            f"<p style='text-align: center;'>Página {len(cursores)}</p>",
+            unsafe_allow_html=True
+        )
+    
+    with col3:
+        if st.button("Próxima →", disabled=not pagina["next_cursor"], use_container_width=True):
+            cursores.append(pagina["next_cursor"])
+            st.rerun()
+    
+    # Resumo do período calculado no serviço (não depende da página exibida)
+    receitas = 0
+    despesas = 0
+    if user_id:
+        resumo = TransactionService.get_summary(
+            user_id, data_inicial, data_final, category=filtros["category"]
+        )
+        if filtros["transaction_type"] != "expense":
+            receitas = resumo["total_income"]
+        if filtros["transaction_type"] != "income":
+            despesas = resumo["total_expenses"]
     saldo = receitas - despesas
     
     st.markdown("---")
@@ -199,16 +316,102 @@ with tab2:
         else:
             st.markdown(f"<h3 class='expense'>Saldo: R$ {saldo:.2f}</h3>", unsafe_allow_html=True)
     
-    # Opções de exportação
+    # Opções de exportação (todas as transações dos filtros, não apenas a página atual)
     st.markdown("### Exportar dados")
     col1, col2 = st.columns(2)
     
-    with col1:
-        if st.button("Exportar para CSV", use_container_width=True):
-            st.success("Arquivo CSV gerado com sucesso!")
-            # Logic para download do CSV
+    formatos_exportacao = {
+        "csv": ("Exportar para CSV", ExportService.export_transactions_csv, "text/csv"),
+        "xlsx": (
+            "Exportar para Excel",
+            ExportService.export_transactions_excel,
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    }
     
-    with col2:
-        if st.button("Exportar para Excel", use_container_width=True):
-            st.success("Arquivo Excel gerado com sucesso!")
-            # Logic para download do Excel 
\ No newline at end of file
+    for coluna, (extensao, (rotulo, exportar, mime)) in zip([col1, col2], formatos_exportacao.items()):
+        with coluna:
+            if st.button(rotulo, use_container_width=True, disabled=not user_id):
+                with st.spinner("Gerando arquivo..."):
+                    caminho = exportar(user_id, **filtros)
+                
+                if caminho:
+                    # Apenas o caminho fica na sessão; o arquivo é removido após o download
+                    keep_download(f"exportacao_{extensao}", caminho)
+                else:
+                    st.error("Não foi possível gerar o arquivo.")
+            
+            download_button(
+                f"exportacao_{extensao}",
+                "Baixar arquivo",
+                file_name=f"transacoes_{data_inicial}_{data_final}.{extensao}",
+                mime=mime,
+                use_container_width=True,
+                key=f"download_{extensao}"
+            )
+
+# Tab de importação de extratos bancários
+with tab3:
+    st.markdown("### Importar Extrato")
+    st.caption("Arquivos CSV ou OFX exportados pelo banco. As transações são validadas e gravadas em lotes.")
+    
+    user_id = st.session_state.get("user_id")
+    arquivo_extrato = st.file_uploader("Selecione o extrato", type=["csv", "ofx"], key="arquivo_extrato")
+    
+    mapeamento = None
+    if arquivo_extrato is not None and ImportService.detect_format(arquivo_extrato.name) == "csv":
+        # Mapeamento das colunas do arquivo para os campos da transação
+        colunas = ImportService.read_csv_columns(arquivo_extrato)
+        sugestao = ImportService.suggest_mapping(colunas)
+        campos = {
+            "date": "Data",
+            "description": "Descrição",
+            "amount": "Valor",
+            "category": "Categoria",
+            "type": "Tipo"
+        }
+        opcoes = ["(não importar)"] + colunas
+        
+        st.markdown("#### Colunas do arquivo")
+        mapeamento = {}
+        for coluna_ui, (campo, rotulo) in zip(st.columns(len(campos)), campos.items()):
+            with coluna_ui:
+                escolha = st.selectbox(
+                    rotulo,
+                    options=opcoes,
+                    index=opcoes.index(sugestao[campo]) if campo in sugestao else 0,
+                    key=f"mapeamento_{campo}"
+                )
+            if escolha != "(não importar)":
+                mapeamento[campo] = escolha
+    
+    if arquivo_extrato is not None and st.button("Importar", type="primary", disabled=not user_id):
+        barra_progresso = st.progress(0.0, text="Importando...")
+        
+        def atualizar_progresso(fracao, parcial):
+            barra_progresso.progress(
+                fracao,
+                text=f"{parcial['imported']} transações importadas, {parcial['failed']} com erro"
+            )
+        
+        resultado = ImportService.import_file(
+            user_id,
+            arquivo_extrato,
+            arquivo_extrato.name,
+            column_mapping=mapeamento,
+            progress_callback=atualizar_progresso
+        )
+        
+        if resultado["imported"]:
+            st.success(f"{resultado['imported']} transações importadas com sucesso!")
+        
+        if resultado["failed"]:
+            st.warning(f"{resultado['failed']} linhas não foram importadas.")
+        
+        if resultado["errors"]:
+            st.dataframe(
+                pd.DataFrame(resultado["errors"]),
+                column_config={"line": "Linha", "error": "Erro"},
+                hide_index=True,
+                use_container_width=True
+            )
@@ -7,10 +7,31 @@ import datetime
 # Adiciona o diretório raiz ao path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from firebase.instrumentation import set_page
+from services.export_service import ExportService
+from utils.download_utils import download_button, keep_download
+
 # Importações futuras dos serviços
 # from services.category_service import get_categories, save_category, delete_category
 # from services.auth_service import update_user_profile, get_user_profile
-# from services.backup_service import export_data, import_data
+# from services.backup_service import import_data
+
+# Conjuntos de dados do backup (rótulo da interface -> conjunto do ExportService)
+CONJUNTOS_BACKUP = {
+    "Transações": "transactions",
+    "Categorias": "categories",
+    "Configurações": "settings"
+}
+
+# Tipo MIME de cada formato de backup
+TIPOS_BACKUP = {
+    ".json": "application/json",
+    ".zip": "application/zip",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+# Identifica a página nas métricas de acesso ao banco
+set_page("Configurações")
 
 # Configuração da página
 st.set_page_config(
@@ -195,6 +216,8 @@ with tab3:
     
     st.info("Os backups são importantes para garantir a segurança dos seus dados financeiros. Recomendamos fazer backup regularmente.")
     
+    user_id = st.session_state.get("user_id")
+    
     # Backup
     st.markdown("### Exportar Dados")
     
@@ -223,10 +246,47 @@ with tab3:
         with col2:
             data_fim_backup = st.date_input("Data final", value=datetime.date.today())
     
-    if st.button("Exportar Dados", type="primary"):
-        st.success("Backup realizado com sucesso!")
-        # Lógica para exportar dados
-        # export_data(user_id, formato_backup, dados_backup, periodo_backup)
+    if st.button("Exportar Dados", type="primary", disabled=not user_id):
+        # Período das transações exportadas
+        hoje = datetime.date.today()
+        inicio_periodo = {
+            "Último mês": hoje - datetime.timedelta(days=30),
+            "Últimos 3 meses": hoje - datetime.timedelta(days=90),
+            "Último ano": hoje - datetime.timedelta(days=365)
+        }.get(periodo_backup)
+        fim_periodo = hoje if inicio_periodo else None
+        
+        if periodo_backup == "Personalizado":
+            inicio_periodo, fim_periodo = data_inicio_backup, data_fim_backup
+        
+        conjuntos = None
+        if "Todos" not in dados_backup:
+            conjuntos = [CONJUNTOS_BACKUP[rotulo] for rotulo in dados_backup]
+        
+        with st.spinner("Gerando backup..."):
+            caminho = ExportService.export_backup(
+                user_id,
+                formato_backup,
+                conjuntos,
+                inicio_periodo,
+                fim_periodo
+            )
+        
+        if caminho:
+            # Apenas o caminho fica na sessão; o arquivo é removido após o download
+            keep_download("backup_arquivo", caminho)
+            st.success("Backup realizado com sucesso!")
+        else:
+            st.error("Não foi possível gerar o backup.")
+    
+    if st.session_state.get("backup_arquivo"):
+        extensao = Path(st.session_state.backup_arquivo).suffix
+        download_button(
+            "backup_arquivo",
+            "Baixar backup",
+            file_name=f"backup_finance_tracker_{datetime.date.today()}{extensao}",
+            mime=TIPOS_BACKUP[extensao]
+        )
     
     # Restauração
     st.markdown("### Importar Dados")
@@ -11,9 +11,14 @@ import json
 root_dir = Path(__file__).parent.parent
 sys.path.append(str(root_dir))
 
+from firebase.instrumentation import set_page
 from services.goal_service import GoalService
 from utils.currency_utils import format_currency, format_percentage
 from utils.date_utils import format_date, parse_date, get_today
+from utils.realtime_utils import watch_user_data
+
+# Identifica a página nas métricas de acesso ao banco
+set_page("Metas")
 
 # Configuração da página
 st.set_page_config(
@@ -149,6 +154,10 @@ st.markdown('<h1 class="main-header">Metas Financeiras 🎯</h1>', unsafe_allow_
 if 'user_id' not in st.session_state:
     st.session_state.user_id = "user123"
 
+# Recarrega a página quando as metas mudarem em outra sessão (apenas com usuário logado)
+if st.session_state.get("logged_in"):
+    watch_user_data(st.session_state.user_id)
+
 # Inicialização de variáveis de estado da sessão
 if 'goals' not in st.session_state:
     st.session_state.goals = []
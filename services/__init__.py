@@ -1,12 +1,34 @@
 from services.auth_service import AuthService
 from services.transaction_service import TransactionService
+from services.transaction_schema import TransactionSchema
 from services.category_service import CategoryService
 from services.goal_service import GoalService
+from services.rollup_service import RollupService
+from services.transaction_cache import TransactionCache
+from services.sync_service import SyncService
+from services.subscription_service import SubscriptionService
+from services.export_service import ExportService
+from services.import_service import ImportService
+from services.duplicate_service import DuplicateService, DuplicateTransactionError
+from services.user_directory import UserDirectory
+from services.password_hasher import PasswordHasher, create_password_hasher
 
 # Exportar todas as classes de serviço disponíveis no pacote
 __all__ = [
     'AuthService',
     'TransactionService',
+    'TransactionSchema',
     'CategoryService',
-    'GoalService'
+    'GoalService',
+    'RollupService',
+    'TransactionCache',
+    'SyncService',
+    'SubscriptionService',
+    'ExportService',
+    'ImportService',
+    'DuplicateService',
+    'DuplicateTransactionError',
+    'UserDirectory',
+    'PasswordHasher',
+    'create_password_hasher'
 ] 
\ No newline at end of file
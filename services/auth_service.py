@@ -1,8 +1,12 @@
 import datetime
+from collections import OrderedDict
 from typing import Dict, List, Optional
 import uuid
 import hashlib
+import hmac
 import os
+import threading
+import time
 from pathlib import Path
 import sys
 import json
@@ -16,16 +20,38 @@ from firebase.firebase_config import (
     update_document,
     delete_document,
     query_documents,
+    query_page,
     get_document
 )
+from services.password_hasher import hash_password, needs_rehash, verify_password
+from services.user_directory import UserDirectory
 
 class AuthService:
     """
     Serviço para autenticação e gerenciamento de usuários.
+    
+    Os tokens de autenticação são assinados com HMAC-SHA256 usando a SECRET_KEY e
+    verificados localmente. Os perfis dos usuários verificados ficam em um cache
+    limitado com expiração, invalidado quando o perfil ou a senha são alterados.
     """
     
     COLLECTION_NAME = "users"
     
+    # Campos lidos na listagem de usuários (projeção, sem hash de senha e preferências)
+    LIST_FIELDS = ["email", "name", "profile_image", "created_at", "last_login"]
+    
+    # Validade dos tokens de autenticação
+    TOKEN_TTL_SECONDS = 24 * 60 * 60
+    
+    # Cache de perfis verificados: número máximo de usuários e validade de cada entrada
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL_SECONDS = 300
+    
+    # user_id -> (instante de expiração, perfil), em ordem de uso
+    _user_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _user_cache_lock = threading.Lock()
+    _secret_key: Optional[bytes] = None
+    
     @staticmethod
     def register_user(
         email: str,
@@ -46,14 +72,7 @@ class AuthService:
             Dicionário com os dados do usuário criado, incluindo ID, ou None se houver erro
         """
         # Verificar se o email já está em uso
-        existing_users = query_documents(
-            AuthService.COLLECTION_NAME, 
-            field="email", 
-            operator="==", 
-            value=email
-        )
-        
-        if existing_users:
+        if UserDirectory.find_user_by_email(email):
             print(f"Email já está em uso: {email}")
             return None
         
@@ -86,6 +105,13 @@ class AuthService:
         user_id = add_document(AuthService.COLLECTION_NAME, user_data)
         
         if user_id:
+            # Reserva o email no índice; se outro cadastro simultâneo reservou o
+            # mesmo email antes, desfaz a criação do usuário
+            if not UserDirectory.register_email(email, user_id):
+                delete_document(AuthService.COLLECTION_NAME, user_id)
+                print(f"Email já está em uso: {email}")
+                return None
+            
             # Retornar dados do usuário sem informações sensíveis
             return {
                 "id": user_id,
@@ -109,34 +135,34 @@ class AuthService:
         Returns:
             Dicionário com os dados do usuário (sem informações sensíveis) ou None se autenticação falhar
         """
-        # Buscar usuário pelo email
-        users = query_documents(
-            AuthService.COLLECTION_NAME, 
-            field="email", 
-            operator="==", 
-            value=email
-        )
+        # Buscar usuário pelo índice de emails
+        user = UserDirectory.find_user_by_email(email)
         
-        if not users:
+        if not user:
             print(f"Usuário não encontrado: {email}")
             return None
         
-        user = users[0]
         user_id = user["id"]
         
         # Verificar a senha
-        hashed_password = AuthService._hash_password(password, user["password_salt"])
-        
-        if hashed_password != user["password_hash"]:
+        if not AuthService._verify_password(password, user):
             print("Senha incorreta")
             return None
         
-        # Atualizar data do último login
-        update_document(
-            AuthService.COLLECTION_NAME,
-            user_id,
-            {"last_login": datetime.datetime.now().isoformat()}
-        )
+        # Regravar hashes legados ou de custo desatualizado com o hasher configurado
+        if needs_rehash(user["password_hash"]):
+            new_salt = os.urandom(32).hex()
+            update_document(
+                AuthService.COLLECTION_NAME,
+                user_id,
+                {
+                    "password_hash": AuthService._hash_password(password, new_salt),
+                    "password_salt": new_salt
+                }
+            )
+        
+        # Atualizar data do último login (gravada em lote, fora do login)
+        UserDirectory.record_login(user_id)
         
         # Retornar dados do usuário sem informações sensíveis
         return {
@@ -220,7 +246,9 @@ class AuthService:
             update_data["preferences"] = json.dumps(current_preferences)
         
         # Atualizar usuário no Firestore
-        return update_document(AuthService.COLLECTION_NAME, user_id, update_data)
+        updated = update_document(AuthService.COLLECTION_NAME, user_id, update_data)
+        AuthService.invalidate_user_cache(user_id)
+        return updated
     
     @staticmethod
     def change_password(user_id: str, current_password: str, new_password: str) -> bool:
@@ -243,12 +271,7 @@ class AuthService:
             return False
         
         # Verificar a senha atual
-        hashed_current_password = AuthService._hash_password(
-            current_password, 
-            user["password_salt"]
-        )
-        
-        if hashed_current_password != user["password_hash"]:
+        if not AuthService._verify_password(current_password, user):
             print("Senha atual incorreta")
             return False
         
@@ -263,7 +286,9 @@ class AuthService:
             "updated_at": datetime.datetime.now().isoformat()
         }
         
-        return update_document(AuthService.COLLECTION_NAME, user_id, update_data)
+        updated = update_document(AuthService.COLLECTION_NAME, user_id, update_data)
+        AuthService.invalidate_user_cache(user_id)
+        return updated
     
     @staticmethod
     def delete_user(user_id: str, password: str) -> bool:
@@ -285,52 +310,84 @@ class AuthService:
             return False
         
         # Verificar a senha
-        hashed_password = AuthService._hash_password(password, user["password_salt"])
-        
-        if hashed_password != user["password_hash"]:
+        if not AuthService._verify_password(password, user):
             print("Senha incorreta para exclusão")
             return False
         
         # Excluir usuário do Firestore
-        return delete_document(AuthService.COLLECTION_NAME, user_id)
+        deleted = delete_document(AuthService.COLLECTION_NAME, user_id)
+        if deleted:
+            UserDirectory.unregister_email(user["email"])
+            UserDirectory.discard_login(user_id)
+        AuthService.invalidate_user_cache(user_id)
+        return deleted
     
     @staticmethod
     def list_users(limit: Optional[int] = None) -> List[Dict]:
         """
         Lista todos os usuários do sistema (apenas para administradores).
         
+        O limite é aplicado no servidor e apenas os campos públicos dos usuários
+        (LIST_FIELDS) são lidos.
+        
         Args:
             limit: Número máximo de usuários a retornar (opcional)
             
         Returns:
             Lista de usuários (sem informações sensíveis)
         """
-        # Obter todos os usuários
-        users = query_documents(AuthService.COLLECTION_NAME)
-        
-        # Aplicar limite se especificado
-        if limit and limit > 0:
-            users = users[:limit]
-        
-        # Remover informações sensíveis
-        result = []
-        for user in users:
-            user_id = user["id"]
-            result.append({
-                "id": user_id,
-                "email": user["email"],
-                "name": user["name"],
-                "profile_image": user.get("profile_image", ""),
-                "created_at": user["created_at"],
-                "last_login": user.get("last_login")
-            })
+        users = query_documents(
+            AuthService.COLLECTION_NAME,
+            limit=limit if limit and limit > 0 else None,
+            select=AuthService.LIST_FIELDS
+        )
+        
+        return [AuthService._list_entry(user) for user in users]
+    
+    @staticmethod
+    def list_users_page(page_size: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        Lista uma página de usuários usando cursores (apenas para administradores).
         
-        return result
+        Cada página lê no máximo page_size + 1 documentos, com apenas os campos
+        públicos (LIST_FIELDS), independentemente do número de usuários.
+        
+        Args:
+            page_size: Número de usuários por página (padrão: 50)
+            cursor: Token da página retornado pela chamada anterior (opcional)
+        
+        Returns:
+            Dicionário com a lista 'users' da página e o 'next_cursor' (None quando
+            não há mais páginas)
+        """
+        page = query_page(
+            AuthService.COLLECTION_NAME,
+            page_size=page_size,
+            cursor=cursor,
+            select=AuthService.LIST_FIELDS
+        )
+        
+        return {
+            "users": [AuthService._list_entry(user) for user in page["documents"]],
+            "next_cursor": page["next_cursor"]
+        }
+    
+    @staticmethod
+    def _list_entry(user: Dict) -> Dict:
+        return {
+            "id": user["id"],
+            "email": user.get("email", ""),
+            "name": user.get("name", ""),
+            "profile_image": user.get("profile_image", ""),
+            "created_at": user.get("created_at"),
+            "last_login": user.get("last_login")
+        }
     
     @staticmethod
     def _hash_password(password: str, salt: str) -> str:
         """
-        Gera um hash seguro para a senha.
+        Gera um hash seguro para a senha com o hasher configurado (PASSWORD_HASHER),
+        executado no pool de hash de senhas.
         
         Args:
             password: Senha em texto plano
@@ -339,45 +396,56 @@ class AuthService:
         Returns:
             Hash da senha com salt
         """
-        # Concatenar senha e salt
-        password_salt = password + salt
+        return hash_password(password, salt)
+    
+    @staticmethod
+    def _verify_password(password: str, user: Dict) -> bool:
+        """
+        Verifica a senha de um usuário com o algoritmo do hash gravado.
+        
+        Args:
+            password: Senha em texto plano
+            user: Documento do usuário
         
-        # Usar SHA-256 para o hash
-        return hashlib.sha256(password_salt.encode()).hexdigest()
+        Returns:
+            True se a senha confere, False caso contrário
+        """
+        if not user.get("password_hash"):
+            return False
+        
+        return verify_password(password, user.get("password_salt", ""), user["password_hash"])
     
     @staticmethod
     def verify_token(token: str) -> Optional[Dict]:
         """
         Verifica a validade de um token de autenticação.
         
+        A assinatura e a validade são conferidas localmente; o perfil do usuário vem
+        do cache de usuários verificados e só é lido do banco quando não está em cache.
+        
         Args:
-            token: Token de autenticação
+            token: Token de autenticação no formato "user_id:expiração:assinatura"
             
         Returns:
             Dados do usuário associado ao token ou None se token inválido
         """
-        # Simples implementação de exemplo
-        # Em uma aplicação real, use JWT ou similar
         try:
-            # Simular verificação de token
-            # Formato simulado: "user_id:timestamp:hash"
             parts = token.split(":")
             if len(parts) != 3:
                 return None
             
-            user_id = parts[0]
-            timestamp = parts[1]
+            user_id, expires_at, signature = parts
             
-            # Verificar se o token expirou (exemplo: 24 horas)
-            current_time = datetime.datetime.now().timestamp()
-            token_time = float(timestamp)
+            expected = AuthService._sign(f"{user_id}:{expires_at}")
+            if not hmac.compare_digest(signature, expected):
+                print("Assinatura do token inválida")
+                return None
             
-            if current_time - token_time > 24 * 60 * 60:  # 24 horas em segundos
+            if time.time() > int(expires_at):
                 print("Token expirado")
                 return None
             
-            # Buscar o usuário
-            return AuthService.get_user(user_id)
+            return AuthService.get_cached_user(user_id)
         
         except Exception as e:
             print(f"Erro ao verificar token: {e}")
@@ -386,18 +454,87 @@ class AuthService:
     @staticmethod
     def generate_token(user_id: str) -> str:
         """
-        Gera um token de autenticação para um usuário.
+        Gera um token de autenticação assinado para um usuário.
         
         Args:
             user_id: ID do usuário
             
         Returns:
-            Token de autenticação
+            Token de autenticação válido por TOKEN_TTL_SECONDS
+        """
+        expires_at = int(time.time()) + AuthService.TOKEN_TTL_SECONDS
+        data = f"{user_id}:{expires_at}"
+        
+        return f"{data}:{AuthService._sign(data)}"
+    
+    @staticmethod
+    def get_cached_user(user_id: str) -> Optional[Dict]:
+        """
+        Obtém os dados de um usuário pelo cache de usuários verificados, lendo do
+        banco (get_user) apenas quando a entrada não existe ou expirou.
+        
+        Args:
+            user_id: ID do usuário
+        
+        Returns:
+            Dicionário com os dados do usuário ou None se não encontrado
         """
-        # Simples implementação de exemplo
-        # Em uma aplicação real, use JWT ou similar
-        timestamp = datetime.datetime.now().timestamp()
-        data = f"{user_id}:{timestamp}"
-        hash_value = hashlib.sha256(data.encode()).hexdigest()
+        now = time.monotonic()
         
-        return f"{user_id}:{timestamp}:{hash_value}" 
\ No newline at end of file
+        with AuthService._user_cache_lock:
+            entry = AuthService._user_cache.get(user_id)
+            if entry and entry[0] > now:
+                AuthService._user_cache.move_to_end(user_id)
+                return AuthService._copy_user(entry[1])
+        
+        user = AuthService.get_user(user_id)
+        if not user:
+            return None
+        
+        with AuthService._user_cache_lock:
+            AuthService._user_cache[user_id] = (now + AuthService.USER_CACHE_TTL_SECONDS, user)
+            AuthService._user_cache.move_to_end(user_id)
+            while len(AuthService._user_cache) > AuthService.USER_CACHE_SIZE:
+                AuthService._user_cache.popitem(last=False)
+        
+        return AuthService._copy_user(user)
+    
+    @staticmethod
+    def invalidate_user_cache(user_id: Optional[str] = None) -> None:
+        """
+        Remove um usuário (ou todos) do cache de usuários verificados.
+        
+        Args:
+            user_id: ID do usuário (opcional, padrão: todos os usuários)
+        """
+        with AuthService._user_cache_lock:
+            if user_id is None:
+                AuthService._user_cache.clear()
+            else:
+                AuthService._user_cache.pop(user_id, None)
+    
+    @staticmethod
+    def _copy_user(user: Dict) -> Dict:
+        # Cópia para que o chamador não altere o perfil em cache
+        return {**user, "preferences": dict(user.get("preferences") or {})}
+    
+    @staticmethod
+    def _sign(data: str) -> str:
+        """
+        Assina os dados de um token com HMAC-SHA256.
+        
+        Args:
+            data: Dados do token ("user_id:expiração")
+        
+        Returns:
+            Assinatura hexadecimal
+        """
+        if AuthService._secret_key is None:
+            secret = os.getenv("SECRET_KEY")
+            if not secret:
+                # Sem SECRET_KEY os tokens valem apenas enquanto o processo estiver ativo
+                print("SECRET_KEY não definida, usando uma chave temporária")
+                secret = os.urandom(32).hex()
+            AuthService._secret_key = secret.encode()
+        
+        return hmac.new(AuthService._secret_key, data.encode(), hashlib.sha256).hexdigest()
@@ -13,7 +13,8 @@ from firebase.firebase_config import (
     update_document,
     delete_document,
     query_documents,
-    get_document
+    get_document,
+    bulk_add
 )
 
 class CategoryService:
@@ -339,25 +340,36 @@ class CategoryService:
         # Combinar todas as categorias padrão
         all_default_categories = default_expense_categories + default_income_categories
         
-        # Criar cada categoria e coletar os IDs
-        created_ids = []
-        
-        for category_data in all_default_categories:
-            # Adicionar o user_id
-            category_data["user_id"] = user_id
-            
-            # Criar a categoria
-            category_id = CategoryService.add_category(
-                name=category_data["name"],
-                category_type=category_data["type"],
-                color=category_data["color"],
-                icon=category_data["icon"],
-                user_id=user_id,
-                description=category_data["description"],
-                is_default=category_data["is_default"]
+        # Consultar as categorias existentes uma única vez para evitar duplicatas
+        existing_keys = {
+            (category.get("name"), category.get("type"))
+            for category in query_documents(
+                CategoryService.COLLECTION_NAME,
+                field="user_id",
+                operator="==",
+                value=user_id
             )
-            
-            if category_id:
-                created_ids.append(category_id)
+        }
+        
+        # Preparar os documentos das categorias que ainda não existem
+        now = datetime.datetime.now().isoformat()
+        new_categories = [
+            {
+                "name": category_data["name"],
+                "type": category_data["type"],
+                "color": category_data["color"],
+                "icon": category_data["icon"],
+                "user_id": user_id,
+                "description": category_data["description"],
+                "is_default": category_data["is_default"],
+                "created_at": now,
+                "updated_at": now
+            }
+            for category_data in all_default_categories
+            if (category_data["name"], category_data["type"]) not in existing_keys
+        ]
+        
+        # Criar todas as categorias em lote e coletar os IDs
+        created_ids = bulk_add(CategoryService.COLLECTION_NAME, new_categories)
         
-        return created_ids 
\ No newline at end of file
+        return [category_id for category_id in created_ids if category_id]
@@ -0,0 +1,239 @@
+import argparse
+import datetime
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Union
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    bulk_update,
+    query_documents,
+    stream_documents
+)
+from services.transaction_schema import TransactionSchema
+
+class DuplicateTransactionError(ValueError):
+    """
+    Transação igual (mesma data, valor e descrição) a outra já registrada.
+    
+    A interface pode oferecer gravar a repetição mesmo assim, com
+    allow_duplicate=True.
+    """
+    
+    def __init__(self, existing_ids: List[str]):
+        super().__init__(f"Transação já registrada: {', '.join(existing_ids)}")
+        self.existing_ids = existing_ids
+
+class DuplicateService:
+    """
+    Detecção de transações duplicadas.
+    
+    Cada transação guarda uma impressão digital (`fingerprint`): o hash do usuário,
+    da data, do valor em centavos e da descrição normalizada. Verificar se uma
+    transação já existe é uma consulta de igualdade nesse campo (uma leitura de
+    índice), e a busca de duplicatas prováveis agrupa o histórico por hash e compara
+    apenas transações vizinhas em cada grupo ordenado por data.
+    """
+    
+    COLLECTION_NAME = "transactions"
+    
+    # Máximo de valores por filtro "in" do Firestore
+    IN_FILTER_LIMIT = 30
+    
+    # Número de documentos atualizados por lote no preenchimento das impressões digitais
+    BACKFILL_BATCH_SIZE = 500
+    
+    @staticmethod
+    def normalize_description(description: Optional[str]) -> str:
+        """
+        Normaliza uma descrição para comparação (sem acentos, pontuação e espaços
+        repetidos, em minúsculas).
+        
+        Args:
+            description: Descrição da transação
+        
+        Returns:
+            Descrição normalizada
+        """
+        text = unicodedata.normalize("NFKD", description or "")
+        text = text.encode("ascii", "ignore").decode("ascii").lower()
+        return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+    
+    @staticmethod
+    def fingerprint(
+        user_id: str,
+        date: Union[datetime.date, datetime.datetime, str],
+        amount: Union[float, int, str],
+        description: Optional[str]
+    ) -> str:
+        """
+        Calcula a impressão digital de uma transação.
+        
+        Args:
+            user_id: ID do usuário
+            date: Data da transação
+            amount: Valor da transação (arredondado para centavos)
+            description: Descrição da transação
+        
+        Returns:
+            Hash hexadecimal
+        """
+        key = "|".join([
+            user_id or "",
+            TransactionSchema.to_date_str(date),
+            str(abs(TransactionSchema.to_cents(amount))),
+            DuplicateService.normalize_description(description)
+        ])
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def find_existing(user_id: str, fingerprints: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Busca transações já gravadas com as impressões digitais informadas.
+        
+        Args:
+            user_id: ID do usuário
+            fingerprints: Impressões digitais a verificar
+        
+        Returns:
+            Dicionário de impressão digital para os IDs das transações existentes
+            (apenas as encontradas)
+        """
+        pending = list(dict.fromkeys(fingerprints))
+        existing = {}
+        
+        for start in range(0, len(pending), DuplicateService.IN_FILTER_LIMIT):
+            batch = pending[start:start + DuplicateService.IN_FILTER_LIMIT]
+            for transaction in query_documents(
+                DuplicateService.COLLECTION_NAME,
+                filters=[("user_id", "==", user_id), ("fingerprint", "in", batch)]
+            ):
+                existing.setdefault(transaction["fingerprint"], []).append(transaction["id"])
+        
+        return existing
+    
+    @staticmethod
+    def find_duplicates(user_id: str, window_days: int = 0) -> List[List[Dict]]:
+        """
+        Encontra grupos de transações provavelmente duplicadas no histórico do usuário.
+        
+        As transações são agrupadas pelo hash de (valor, descrição normalizada) e cada
+        grupo é ordenado por data; transações consecutivas com até `window_days` dias
+        de diferença ficam no mesmo grupo de duplicatas. O custo é O(n log n), sem
+        comparar todos os pares.
+        
+        Args:
+            user_id: ID do usuário
+            window_days: Diferença máxima de dias entre duplicatas (0: mesma data)
+        
+        Returns:
+            Lista de grupos (cada um com duas ou mais transações, ordenadas por data)
+        """
+        buckets: Dict[tuple, List[Dict]] = {}
+        
+        for document in stream_documents(DuplicateService.COLLECTION_NAME, "user_id", "==", user_id):
+            transaction = TransactionSchema.decode(document)
+            if not transaction.get("date"):
+                continue
+            
+            key = (
+                abs(transaction["amount_cents"]),
+                DuplicateService.normalize_description(transaction.get("description"))
+            )
+            buckets.setdefault(key, []).append(transaction)
+        
+        window = datetime.timedelta(days=window_days)
+        groups = []
+        
+        for transactions in buckets.values():
+            if len(transactions) < 2:
+                continue
+            
+            transactions.sort(key=lambda t: t["date"])
+            group = [transactions[0]]
+            last_date = datetime.date.fromisoformat(transactions[0]["date"])
+            
+            for transaction in transactions[1:]:
+                date = datetime.date.fromisoformat(transaction["date"])
+                if date - last_date <= window:
+                    group.append(transaction)
+                else:
+                    if len(group) > 1:
+                        groups.append(group)
+                    group = [transaction]
+                last_date = date
+            
+            if len(group) > 1:
+                groups.append(group)
+        
+        groups.sort(key=lambda group: group[0]["date"], reverse=True)
+        return groups
+    
+    @staticmethod
+    def backfill(user_id: Optional[str] = None) -> int:
+        """
+        Grava a impressão digital nas transações que ainda não a têm (ou cuja
+        impressão está desatualizada).
+        
+        Args:
+            user_id: ID do usuário (opcional, padrão: todos os usuários)
+        
+        Returns:
+            Número de transações atualizadas
+        """
+        if user_id:
+            documents = stream_documents(DuplicateService.COLLECTION_NAME, "user_id", "==", user_id)
+        else:
+            documents = stream_documents(DuplicateService.COLLECTION_NAME)
+        
+        updated = 0
+        batch = []
+        
+        for document in documents:
+            transaction = TransactionSchema.decode(document)
+            fingerprint = DuplicateService.fingerprint(
+                transaction.get("user_id"),
+                transaction.get("date", ""),
+                transaction["amount"],
+                transaction.get("description")
+            )
+            
+            if document.get("fingerprint") != fingerprint:
+                batch.append((document["id"], {"fingerprint": fingerprint}))
+            
+            if len(batch) >= DuplicateService.BACKFILL_BATCH_SIZE:
+                updated += sum(1 for ok in bulk_update(DuplicateService.COLLECTION_NAME, batch) if ok)
+                batch = []
+        
+        if batch:
+            updated += sum(1 for ok in bulk_update(DuplicateService.COLLECTION_NAME, batch) if ok)
+        
+        return updated
+
+# Comandos: python services/duplicate_service.py --backfill
+#           python services/duplicate_service.py --user-id ID [--window-days N]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detecção de transações duplicadas.")
+    parser.add_argument("--user-id", help="Usuário a analisar")
+    parser.add_argument("--window-days", type=int, default=0,
+                        help="Diferença máxima de dias entre duplicatas (padrão: 0)")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Grava as impressões digitais das transações antigas")
+    args = parser.parse_args()
+    
+    if args.backfill:
+        count = DuplicateService.backfill(args.user_id)
+        print(f"{count} transações atualizadas.")
+    elif args.user_id:
+        for group in DuplicateService.find_duplicates(args.user_id, args.window_days):
+            print(f"{len(group)}x {group[0].get('description', '')} ({group[0]['amount']:.2f})")
+            for transaction in group:
+                print(f"    {transaction['date']}  {transaction['id']}")
+    else:
+        parser.error("informe --user-id ou --backfill")
@@ -0,0 +1,376 @@
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from pathlib import Path
+import sys
+
+import numpy as np
+from openpyxl import Workbook
+
+# Adiciona o diretório raiz ao path para importar os serviços
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from services.transaction_service import TransactionService
+from services.category_service import CategoryService
+from services.auth_service import AuthService
+from utils.currency_utils import CurrencyConverter, format_currency_array
+
+class ExportService:
+    """
+    Serviço de exportação de transações e backups.
+    
+    As transações são lidas do TransactionService sob demanda e gravadas em blocos
+    de CHUNK_SIZE linhas em um arquivo temporário (CSV incremental ou Excel no modo
+    write-only do openpyxl), de modo que a memória usada não cresce com o número
+    de transações exportadas.
+    """
+    
+    # Linhas formatadas e gravadas por vez
+    CHUNK_SIZE = 1000
+    
+    # Colunas da exportação de transações (campo, cabeçalho)
+    TRANSACTION_COLUMNS = [
+        ("date", "Data"),
+        ("description", "Descrição"),
+        ("type", "Tipo"),
+        ("category", "Categoria"),
+        ("amount", "Valor"),
+        ("currency", "Moeda"),
+        ("payment_method", "Forma de pagamento"),
+        ("notes", "Observações")
+    ]
+    
+    TYPE_LABELS = {"income": "Receita", "expense": "Despesa"}
+    
+    # Campos das transações e categorias gravados nos backups
+    BACKUP_TRANSACTION_FIELDS = [
+        "id", "date", "description", "type", "category", "amount", "currency",
+        "payment_method", "notes", "created_at", "updated_at"
+    ]
+    BACKUP_CATEGORY_FIELDS = ["id", "name", "type", "color", "icon", "description", "is_default"]
+    
+    @staticmethod
+    def iter_transaction_rows(
+        user_id: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        transaction_type: Optional[str] = None,
+        category: Optional[str] = None,
+        format_amounts: bool = True
+    ) -> Iterator[List[List]]:
+        """
+        Percorre as transações em blocos de linhas prontas para exportação.
+        
+        Os valores de cada bloco são formatados de uma vez, por moeda, com o mesmo
+        resultado de format_currency (sem o símbolo).
+        
+        Args:
+            user_id: ID do usuário
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            transaction_type: Tipo de transação (opcional)
+            category: Categoria (opcional)
+            format_amounts: Se False, mantém os valores numéricos (ex: para o Excel)
+        
+        Yields:
+            Listas de até CHUNK_SIZE linhas na ordem de TRANSACTION_COLUMNS
+        """
+        transactions = TransactionService.iter_transactions(
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            category=category
+        )
+        
+        for chunk in ExportService._chunks(transactions):
+            currencies = np.array(
+                [t.get("currency") or CurrencyConverter.BASE_CURRENCY for t in chunk],
+                dtype=object
+            )
+            amounts = np.array([t["amount"] for t in chunk], dtype=np.float64)
+            
+            if format_amounts:
+                formatted = np.empty(len(chunk), dtype=object)
+                for currency in set(currencies):
+                    mask = currencies == currency
+                    formatted[mask] = format_currency_array(amounts[mask], currency, show_symbol=False)
+            else:
+                formatted = amounts.tolist()
+            
+            yield [
+                [
+                    t.get("date", ""),
+                    t.get("description", ""),
+                    ExportService.TYPE_LABELS.get(t.get("type"), t.get("type", "")),
+                    t.get("category", ""),
+                    amount,
+                    currency,
+                    t.get("payment_method", ""),
+                    t.get("notes", "")
+                ]
+                for t, amount, currency in zip(chunk, formatted, currencies)
+            ]
+    
+    @staticmethod
+    def export_transactions_csv(user_id: str, **filters) -> Optional[str]:
+        """
+        Exporta as transações para um arquivo CSV (UTF-8 com BOM, separador ';').
+        
+        Args:
+            user_id: ID do usuário
+            **filters: Filtros de iter_transaction_rows (start_date, end_date,
+                transaction_type e category)
+        
+        Returns:
+            Caminho do arquivo temporário gerado ou None se houver erro
+        """
+        try:
+            with ExportService._temp_file(".csv", text=True) as file:
+                writer = csv.writer(file, delimiter=";")
+                writer.writerow([header for _, header in ExportService.TRANSACTION_COLUMNS])
+                
+                for rows in ExportService.iter_transaction_rows(user_id, **filters):
+                    writer.writerows(rows)
+                
+                return file.name
+        except Exception as e:
+            print(f"Erro ao exportar transações para CSV: {e}")
+            return None
+    
+    @staticmethod
+    def export_transactions_excel(user_id: str, **filters) -> Optional[str]:
+        """
+        Exporta as transações para uma planilha Excel usando o modo write-only do
+        openpyxl, que grava as linhas em disco à medida que são adicionadas.
+        
+        Args:
+            user_id: ID do usuário
+            **filters: Filtros de iter_transaction_rows (start_date, end_date,
+                transaction_type e category)
+        
+        Returns:
+            Caminho do arquivo temporário gerado ou None se houver erro
+        """
+        workbook = Workbook(write_only=True)
+        try:
+            sheet = workbook.create_sheet("Transações")
+            sheet.append([header for _, header in ExportService.TRANSACTION_COLUMNS])
+            
+            # Valores numéricos, para que a planilha possa somá-los
+            for rows in ExportService.iter_transaction_rows(user_id, format_amounts=False, **filters):
+                for row in rows:
+                    sheet.append(row)
+            
+            with ExportService._temp_file(".xlsx") as file:
+                workbook.save(file.name)
+                return file.name
+        except Exception as e:
+            ExportService._discard_workbook(workbook)
+            print(f"Erro ao exportar transações para Excel: {e}")
+            return None
+    
+    @staticmethod
+    def export_backup(
+        user_id: str,
+        export_format: str = "JSON",
+        datasets: Optional[List[str]] = None,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None
+    ) -> Optional[str]:
+        """
+        Gera um backup dos dados do usuário.
+        
+        - JSON: um único documento com uma lista por conjunto de dados
+        - CSV: arquivo ZIP com um CSV por conjunto de dados
+        - Excel: uma planilha por conjunto de dados
+        
+        Args:
+            user_id: ID do usuário
+            export_format: 'JSON', 'CSV' ou 'Excel'
+            datasets: Conjuntos a exportar ('transactions', 'categories' e/ou
+                'settings'; padrão: todos)
+            start_date: Data inicial das transações (opcional)
+            end_date: Data final das transações (opcional)
+        
+        Returns:
+            Caminho do arquivo temporário gerado ou None se houver erro
+        """
+        datasets = datasets or ["transactions", "categories", "settings"]
+        
+        # Cada conjunto é uma função que gera suas linhas (dicionários) sob demanda
+        sources = {}
+        if "transactions" in datasets:
+            sources["transactions"] = (
+                ExportService.BACKUP_TRANSACTION_FIELDS,
+                lambda: TransactionService.iter_transactions(
+                    user_id=user_id,
+                    start_date=start_date,
+                    end_date=end_date
+                )
+            )
+        if "categories" in datasets:
+            sources["categories"] = (
+                ExportService.BACKUP_CATEGORY_FIELDS,
+                lambda: CategoryService.list_categories(user_id, include_default=False)
+            )
+        if "settings" in datasets:
+            sources["settings"] = (
+                ["key", "value"],
+                lambda: ExportService._iter_settings(user_id)
+            )
+        
+        try:
+            if export_format == "CSV":
+                return ExportService._write_backup_csv(sources)
+            if export_format == "Excel":
+                return ExportService._write_backup_excel(sources)
+            return ExportService._write_backup_json(sources)
+        except Exception as e:
+            print(f"Erro ao gerar backup: {e}")
+            return None
+    
+    @staticmethod
+    def _iter_settings(user_id: str) -> Iterator[Dict]:
+        user = AuthService.get_user(user_id) or {}
+        for key, value in user.get("preferences", {}).items():
+            yield {"key": key, "value": value}
+    
+    @staticmethod
+    def _write_backup_json(sources: Dict) -> str:
+        """
+        Grava o backup JSON escrevendo um registro por vez.
+        """
+        with ExportService._temp_file(".json", text=True, bom=False) as file:
+            file.write('{"exported_at": ')
+            file.write(json.dumps(datetime.datetime.now().isoformat()))
+            
+            for name, (fields, rows) in sources.items():
+                file.write(f', {json.dumps(name)}: [')
+                for index, row in enumerate(rows()):
+                    if index:
+                        file.write(", ")
+                    file.write(json.dumps(
+                        {field: row.get(field) for field in fields},
+                        ensure_ascii=False,
+                        default=str
+                    ))
+                file.write("]")
+            
+            file.write("}")
+            return file.name
+    
+    @staticmethod
+    def _write_backup_csv(sources: Dict) -> str:
+        """
+        Grava o backup como um ZIP com um CSV por conjunto de dados.
+        """
+        with ExportService._temp_file(".zip") as file:
+            with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name, (fields, rows) in sources.items():
+                    with archive.open(f"{name}.csv", "w") as entry:
+                        text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+                        writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore")
+                        writer.writeheader()
+                        for chunk in ExportService._chunks(rows()):
+                            writer.writerows(chunk)
+                        text.flush()
+                        text.detach()
+            return file.name
+    
+    @staticmethod
+    def _write_backup_excel(sources: Dict) -> str:
+        """
+        Grava o backup como uma planilha write-only por conjunto de dados.
+        """
+        workbook = Workbook(write_only=True)
+        
+        try:
+            for name, (fields, rows) in sources.items():
+                sheet = workbook.create_sheet(name)
+                sheet.append(fields)
+                for row in rows():
+                    sheet.append([ExportService._cell_value(row.get(field)) for field in fields])
+            
+            with ExportService._temp_file(".xlsx") as file:
+                workbook.save(file.name)
+                return file.name
+        except Exception:
+            ExportService._discard_workbook(workbook)
+            raise
+    
+    @staticmethod
+    def _discard_workbook(workbook: Workbook) -> None:
+        """
+        Remove os arquivos temporários das planilhas write-only de uma planilha
+        que não foi salva (o openpyxl só os remove ao salvar).
+        """
+        for sheet in workbook.worksheets:
+            writer = getattr(sheet, "_writer", None)
+            if writer is None or not os.path.exists(writer.out):
+                continue
+            try:
+                # Encerra o gerador de linhas antes do arquivo da planilha
+                if getattr(sheet, "_rows", None) is not None:
+                    sheet._rows.close()
+                writer.close()
+                writer.cleanup()
+            except Exception:
+                pass
+    
+    @staticmethod
+    def _cell_value(value):
+        # Células do Excel aceitam apenas tipos simples
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+    
+    @staticmethod
+    def _chunks(items: Iterable, size: Optional[int] = None) -> Iterator[List]:
+        iterator = iter(items)
+        size = size or ExportService.CHUNK_SIZE
+        while True:
+            chunk = list(islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+    
+    @staticmethod
+    @contextmanager
+    def _temp_file(suffix: str, text: bool = False, bom: bool = True):
+        """
+        Cria um arquivo temporário que não é removido ao ser fechado (o chamador
+        serve o arquivo e o remove depois). Se a gravação falhar, o arquivo
+        incompleto é removido.
+        """
+        if not text:
+            file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        else:
+            # utf-8-sig grava o BOM para que o Excel reconheça a codificação do CSV
+            file = tempfile.NamedTemporaryFile(
+                "w",
+                suffix=suffix,
+                delete=False,
+                encoding="utf-8-sig" if bom else "utf-8",
+                newline=""
+            )
+        
+        completed = False
+        try:
+            with file:
+                yield file
+            completed = True
+        finally:
+            if not completed:
+                try:
+                    os.unlink(file.name)
+                except OSError:
+                    pass
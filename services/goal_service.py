@@ -13,9 +13,35 @@ from firebase.firebase_config import (
     update_document,
     delete_document,
     query_documents,
-    get_document
+    get_document,
+    transactional_increment
 )
 
+def _derive_progress(goal: Dict, target: float, current: float) -> Dict:
+    """
+    Calcula o progresso percentual e o estado de conclusão de uma meta.
+    
+    Args:
+        goal: Meta como está gravada (para saber se já estava concluída)
+        target: Valor alvo da meta
+        current: Valor atual da meta
+    
+    Returns:
+        Campos progress_percentage, completed e, quando muda, completed_at
+    """
+    progress = {"progress_percentage": (current / target * 100) if target > 0 else 0}
+    
+    # Verificar se a meta foi concluída
+    if current >= target:
+        progress["completed"] = True
+        if not goal.get("completed", False):  # Se ainda não estava marcada como concluída
+            progress["completed_at"] = datetime.datetime.now().isoformat()
+    else:
+        progress["completed"] = False
+        progress["completed_at"] = None
+    
+    return progress
+
 class GoalService:
     """
     Serviço para gerenciamento de metas financeiras.
@@ -173,20 +199,7 @@ class GoalService:
             target = update_data.get("target_amount", goal.get("target_amount", 0))
             current = update_data.get("current_amount", goal.get("current_amount", 0))
             
-            # Calcular progresso percentual
-            if target > 0:
-                update_data["progress_percentage"] = (current / target * 100)
-            else:
-                update_data["progress_percentage"] = 0
-                
-            # Verificar se a meta foi concluída
-            if current >= target:
-                update_data["completed"] = True
-                if not goal.get("completed", False):  # Se ainda não estava marcada como concluída
-                    update_data["completed_at"] = datetime.datetime.now().isoformat()
-            else:
-                update_data["completed"] = False
-                update_data["completed_at"] = None
+            update_data.update(_derive_progress(goal, target, current))
         
         # Atualizar meta no Firestore
         return update_document(GoalService.COLLECTION_NAME, goal_id, update_data)
@@ -275,20 +288,19 @@ class GoalService:
         Returns:
             True se a atualização for bem-sucedida, False caso contrário
         """
-        # Verificar se a meta existe
-        goal = get_document(GoalService.COLLECTION_NAME, goal_id)
+        def derive_progress(goal: Dict) -> Dict:
+            # Recalcular progresso e conclusão a partir do valor já incrementado
+            return {
+                **_derive_progress(goal, goal.get("target_amount", 0), goal["current_amount"]),
+                "updated_at": datetime.datetime.now().isoformat()
+            }
         
-        if not goal:
-            print(f"Meta não encontrada: {goal_id}")
-            return False
-        
-        # Calcular novo valor atual
-        current_amount = goal.get("current_amount", 0) + amount_to_add
-        
-        # Atualizar a meta com o novo valor
-        return GoalService.update_goal(
-            goal_id=goal_id,
-            current_amount=current_amount
+        # Incremento atômico no servidor, com campos derivados na mesma transação
+        return transactional_increment(
+            GoalService.COLLECTION_NAME,
+            goal_id,
+            {"current_amount": amount_to_add},
+            derive=derive_progress
         )
     
     @staticmethod
@@ -2,9 +2,13 @@ import datetime
 from typing import Dict, Optional
 import json
 from pathlib import Path
+import re
 import sys
 import os
-from google.oauth2 import id_token
+import threading
+import time
+import requests as http_requests
+from google.auth import jwt
 from google.auth.transport import requests
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
@@ -17,18 +21,66 @@ sys.path.append(str(root_dir))
 from firebase.firebase_config import (
     add_document,
     update_document,
-    query_documents,
+    delete_document,
     get_document
 )
+from services.user_directory import UserDirectory
 
 class GoogleAuthService:
     """
     Serviço para autenticação usando Google Sign-In.
+    
+    O client_secrets.json e os certificados públicos do Google ficam em cache no
+    processo: o arquivo é relido apenas quando muda e os certificados, quando expira
+    o max-age do Cache-Control da resposta. As requisições usam uma sessão HTTP
+    compartilhada (conexões reaproveitadas).
     """
     
     COLLECTION_NAME = "users"
     CLIENT_SECRETS_FILE = "client_secrets.json"
     
+    # Endpoint dos certificados (GOOGLE_CERTS_URL permite usar um servidor local nos testes)
+    CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+    GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+    
+    # Validade dos certificados quando a resposta não informa max-age
+    DEFAULT_CERTS_MAX_AGE = 300
+    
+    # Intervalo mínimo entre atualizações forçadas (tokens com chaves desconhecidas)
+    MIN_CERTS_REFRESH_SECONDS = 60
+    
+    _client_config: Optional[tuple] = None
+    _certs: Optional[Dict] = None
+    _certs_fetched_at = 0.0
+    _certs_expires_at = 0.0
+    _transport: Optional[requests.Request] = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get_client_config() -> Dict:
+        """
+        Retorna o conteúdo do client_secrets.json, relendo o arquivo apenas quando
+        ele é modificado.
+        
+        Returns:
+            Configuração do cliente OAuth
+        """
+        path = GoogleAuthService.CLIENT_SECRETS_FILE
+        modified_at = os.stat(path).st_mtime_ns
+        
+        with GoogleAuthService._lock:
+            cached = GoogleAuthService._client_config
+            if cached and cached[0] == (path, modified_at):
+                return cached[1]
+        
+        with open(path, "r", encoding="utf-8") as file:
+            client_config = json.load(file)
+        
+        with GoogleAuthService._lock:
+            GoogleAuthService._client_config = ((path, modified_at), client_config)
+        
+        return client_config
+    
     @staticmethod
     def get_google_flow():
         """
@@ -37,9 +89,10 @@ class GoogleAuthService:
         Returns:
             Flow: Objeto de fluxo de autenticação Google
         """
-        # Configurar o fluxo OAuth2
-        flow = Flow.from_client_secrets_file(
-            GoogleAuthService.CLIENT_SECRETS_FILE,
+        # Um Flow por login (ele guarda o estado da autorização); apenas a
+        # configuração do cliente é compartilhada
+        flow = Flow.from_client_config(
+            GoogleAuthService.get_client_config(),
             scopes=[
                 'https://www.googleapis.com/auth/userinfo.email',
                 'https://www.googleapis.com/auth/userinfo.profile'
@@ -48,6 +101,59 @@ class GoogleAuthService:
         )
         return flow
     
+    @staticmethod
+    def get_transport() -> requests.Request:
+        """
+        Retorna o transporte HTTP compartilhado (sessão com pool de conexões).
+        """
+        with GoogleAuthService._lock:
+            if GoogleAuthService._transport is None:
+                GoogleAuthService._transport = requests.Request(session=http_requests.Session())
+            return GoogleAuthService._transport
+    
+    @staticmethod
+    def get_certs(force_refresh: bool = False) -> Dict:
+        """
+        Retorna os certificados públicos usados para assinar os tokens do Google,
+        buscando-os novamente apenas quando o max-age da última resposta expira.
+        
+        Args:
+            force_refresh: Ignora o cache (ex: chave nova, ainda não conhecida)
+        
+        Returns:
+            Dicionário de ID da chave para certificado x.509
+        """
+        with GoogleAuthService._lock:
+            now = time.monotonic()
+            if GoogleAuthService._certs is not None and (
+                now < GoogleAuthService._certs_expires_at and not force_refresh
+                or now - GoogleAuthService._certs_fetched_at < GoogleAuthService.MIN_CERTS_REFRESH_SECONDS
+                and force_refresh
+            ):
+                return GoogleAuthService._certs
+        
+        url = os.getenv('GOOGLE_CERTS_URL') or GoogleAuthService.CERTS_URL
+        response = GoogleAuthService.get_transport()(url, method="GET", timeout=10)
+        
+        if response.status != 200:
+            raise ValueError(f"Não foi possível obter os certificados em {url}")
+        
+        certs = json.loads(response.data.decode("utf-8"))
+        
+        # max-age menos o tempo que a resposta já passou em caches intermediários
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else GoogleAuthService.DEFAULT_CERTS_MAX_AGE
+        age = headers.get("age", "0")
+        age = int(age) if age.isdigit() else 0
+        
+        with GoogleAuthService._lock:
+            GoogleAuthService._certs = certs
+            GoogleAuthService._certs_fetched_at = time.monotonic()
+            GoogleAuthService._certs_expires_at = GoogleAuthService._certs_fetched_at + max(max_age - age, 0)
+        
+        return certs
+    
     @staticmethod
     def verify_google_token(token: str) -> Optional[Dict]:
         """
@@ -60,12 +166,17 @@ class GoogleAuthService:
             Dict com informações do usuário ou None se token inválido
         """
         try:
-            # Verificar o token
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request(), 
-                os.getenv('GOOGLE_CLIENT_ID')
-            )
+            # Certificados em cache; uma chave desconhecida força a atualização
+            certs = GoogleAuthService.get_certs()
+            if jwt.decode_header(token).get('kid') not in certs:
+                certs = GoogleAuthService.get_certs(force_refresh=True)
+            
+            # Verificar a assinatura, a validade e o destinatário do token
+            idinfo = jwt.decode(token, certs=certs, audience=os.getenv('GOOGLE_CLIENT_ID'))
+            
+            if idinfo.get('iss') not in GoogleAuthService.GOOGLE_ISSUERS:
+                print("Emissor do token inválido")
+                return None
             
             # Verificar se o token expirou
             if idinfo['exp'] < datetime.datetime.now().timestamp():
@@ -94,16 +205,10 @@ class GoogleAuthService:
         Returns:
             Dict com informações do usuário ou None se houver erro
         """
-        # Buscar usuário existente pelo email
-        existing_users = query_documents(
-            GoogleAuthService.COLLECTION_NAME,
-            field="email",
-            operator="==",
-            value=google_user['email']
-        )
+        # Buscar usuário existente pelo índice de emails
+        user = UserDirectory.find_user_by_email(google_user['email'])
         
-        if existing_users:
-            user = existing_users[0]
+        if user:
             # Atualizar informações do Google se necessário
             if user.get('google_id') != google_user['google_id']:
                 update_document(
@@ -138,6 +243,11 @@ class GoogleAuthService:
         user_id = add_document(GoogleAuthService.COLLECTION_NAME, user_data)
         
         if user_id:
+            # Outro login simultâneo já criou o usuário com esse email: usa o existente
+            if not UserDirectory.register_email(google_user['email'], user_id):
+                delete_document(GoogleAuthService.COLLECTION_NAME, user_id)
+                return UserDirectory.find_user_by_email(google_user['email'])
+            
             user_data['id'] = user_id
             return user_data
             
@@ -146,16 +256,14 @@ class GoogleAuthService:
     @staticmethod
     def update_last_login(user_id: str) -> bool:
         """
-        Atualiza a data do último login do usuário.
+        Atualiza a data do último login do usuário. A gravação é feita em lote pelo
+        UserDirectory, fora do caminho do login.
         
         Args:
             user_id: ID do usuário
             
         Returns:
-            bool: True se atualização bem sucedida, False caso contrário
+            bool: True (a data é gravada na próxima gravação em lote)
         """
-        return update_document(
-            GoogleAuthService.COLLECTION_NAME,
-            user_id,
-            {'last_login': datetime.datetime.now().isoformat()}
-        ) 
\ No newline at end of file
+        UserDirectory.record_login(user_id)
+        return True 
\ No newline at end of file
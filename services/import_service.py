@@ -0,0 +1,493 @@
+import csv
+import html
+import io
+import re
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório raiz ao path para importar os serviços
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from services.transaction_service import TransactionService
+from services.duplicate_service import DuplicateService
+
+class ImportService:
+    """
+    Importação de extratos bancários (CSV e OFX) em lotes.
+    
+    O arquivo é lido sob demanda, linha a linha. Os registros são validados em blocos
+    de CHUNK_SIZE com operações vetorizadas do pandas e gravados com
+    TransactionService.add_transactions, que usa gravações em lote. Linhas inválidas
+    são ignoradas e reportadas com o número da linha e o motivo.
+    """
+    
+    # Registros validados e gravados por vez
+    CHUNK_SIZE = 500
+    
+    # Limite de erros guardados no resultado (todos são contados)
+    MAX_REPORTED_ERRORS = 1000
+    
+    FIELDS = ["description", "amount", "date", "category", "type"]
+    REQUIRED_FIELDS = ["description", "amount", "date"]
+    DEFAULT_CATEGORY = "Outros"
+    
+    # Nomes de coluna reconhecidos (sem acentos, em minúsculas) para cada campo
+    COLUMN_ALIASES = {
+        "description": ["descricao", "description", "historico", "memo", "lancamento", "estabelecimento"],
+        "amount": ["valor", "amount", "value", "quantia", "valor (r$)"],
+        "date": ["data", "date", "data lancamento", "data da transacao", "dtposted"],
+        "category": ["categoria", "category"],
+        "type": ["tipo", "type", "natureza"]
+    }
+    
+    # Valores reconhecidos na coluna de tipo (sem acentos, em minúsculas)
+    TYPE_ALIASES = {
+        "receita": "income",
+        "income": "income",
+        "entrada": "income",
+        "credito": "income",
+        "credit": "income",
+        "c": "income",
+        "despesa": "expense",
+        "expense": "expense",
+        "saida": "expense",
+        "debito": "expense",
+        "debit": "expense",
+        "d": "expense"
+    }
+    
+    # Formatos de data tentados em ordem (o OFX usa YYYYMMDD)
+    DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%y", "%d/%m/%Y", "%Y%m%d", "%d-%m-%Y", "%d.%m.%Y"]
+    
+    OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+    
+    @staticmethod
+    def detect_format(file_name: str) -> Optional[str]:
+        """
+        Identifica o formato do extrato pela extensão do arquivo.
+        
+        Args:
+            file_name: Nome do arquivo
+        
+        Returns:
+            'csv', 'ofx' ou None se o formato não for suportado
+        """
+        extension = Path(file_name or "").suffix.lower()
+        if extension in (".csv", ".txt"):
+            return "csv"
+        if extension in (".ofx", ".qfx"):
+            return "ofx"
+        return None
+    
+    @staticmethod
+    def read_csv_columns(file: BinaryIO) -> List[str]:
+        """
+        Lê apenas o cabeçalho de um CSV (para o mapeamento de colunas) e volta ao
+        início do arquivo.
+        
+        Args:
+            file: Arquivo binário
+        
+        Returns:
+            Lista com os nomes das colunas
+        """
+        text = ImportService._open_text(file)
+        try:
+            header = text.readline()
+            return next(csv.reader([header], delimiter=ImportService._detect_delimiter(header)), [])
+        finally:
+            text.detach()
+            file.seek(0)
+    
+    @staticmethod
+    def suggest_mapping(columns: List[str]) -> Dict[str, str]:
+        """
+        Sugere a coluna do arquivo correspondente a cada campo da transação.
+        
+        Args:
+            columns: Nomes das colunas do arquivo
+        
+        Returns:
+            Dicionário de campo para nome da coluna (apenas campos encontrados)
+        """
+        normalized = {ImportService._normalize_text(column): column for column in columns}
+        
+        mapping = {}
+        for field, aliases in ImportService.COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    mapping[field] = normalized[alias]
+                    break
+        
+        return mapping
+    
+    @staticmethod
+    def import_file(
+        user_id: str,
+        file: BinaryIO,
+        file_name: str,
+        column_mapping: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[Callable[[float, Dict], None]] = None,
+        skip_duplicates: bool = True
+    ) -> Dict:
+        """
+        Importa as transações de um extrato CSV ou OFX.
+        
+        Args:
+            user_id: ID do usuário proprietário das transações
+            file: Arquivo binário (ex: o arquivo enviado pelo st.file_uploader)
+            file_name: Nome do arquivo (define o formato)
+            column_mapping: Coluna do CSV para cada campo (opcional, padrão: sugestão
+                de suggest_mapping)
+            progress_callback: Função chamada após cada bloco com a fração do arquivo
+                já lida e o resultado parcial
+            skip_duplicates: Se True, não grava transações já registradas antes da
+                importação (mesma data, valor e descrição), reportando-as como erros
+                da linha; linhas repetidas no próprio arquivo são gravadas
+        
+        Returns:
+            Dicionário com o número de transações importadas (imported), de linhas
+            rejeitadas (failed) e a lista de erros ({"line": n, "error": motivo})
+        """
+        result = {"imported": 0, "failed": 0, "errors": []}
+        
+        # Impressões digitais gravadas por esta importação: não contam como duplicatas
+        imported_fingerprints = set()
+        
+        file_format = ImportService.detect_format(file_name)
+        if file_format is None:
+            ImportService._add_error(result, None, "Formato de arquivo não suportado (use CSV ou OFX)")
+            return result
+        
+        size = ImportService._file_size(file)
+        text = ImportService._open_text(file)
+        
+        try:
+            if file_format == "csv":
+                header_line = text.readline()
+                delimiter = ImportService._detect_delimiter(header_line)
+                header = next(csv.reader([header_line], delimiter=delimiter), [])
+                mapping = column_mapping or ImportService.suggest_mapping(header)
+                
+                missing = [
+                    field for field in ImportService.REQUIRED_FIELDS
+                    if mapping.get(field) not in header
+                ]
+                if missing:
+                    ImportService._add_error(
+                        result, None, f"Colunas obrigatórias não encontradas: {', '.join(missing)}"
+                    )
+                    return result
+                
+                records = ImportService._iter_csv_records(
+                    csv.reader(text, delimiter=delimiter), header, mapping
+                )
+            else:
+                records = ImportService._iter_ofx_records(text)
+            
+            while True:
+                chunk = list(islice(records, ImportService.CHUNK_SIZE))
+                if not chunk:
+                    break
+                
+                ImportService._import_chunk(
+                    user_id, chunk, result, skip_duplicates, imported_fingerprints
+                )
+                
+                if progress_callback:
+                    progress_callback(min(file.tell() / size, 1.0) if size else 1.0, result)
+        except Exception as e:
+            print(f"Erro ao importar extrato: {e}")
+            ImportService._add_error(result, None, f"Erro ao ler o arquivo: {e}")
+        finally:
+            text.detach()
+        
+        if progress_callback:
+            progress_callback(1.0, result)
+        
+        return result
+    
+    @staticmethod
+    def _import_chunk(
+        user_id: str,
+        chunk: List[Tuple[int, Dict]],
+        result: Dict,
+        skip_duplicates: bool = True,
+        imported_fingerprints: Optional[Set[str]] = None
+    ) -> None:
+        """
+        Valida um bloco de registros e grava as transações válidas em lote.
+        
+        Duplicatas são apenas as transações registradas antes da importação: as
+        impressões digitais gravadas pelos blocos anteriores (imported_fingerprints,
+        atualizado aqui) são ignoradas, então o resultado não depende de CHUNK_SIZE.
+        """
+        if imported_fingerprints is None:
+            imported_fingerprints = set()
+        
+        valid, errors = ImportService.validate_chunk(chunk)
+        
+        for line, error in errors:
+            ImportService._add_error(result, line, error)
+        
+        if not valid:
+            return
+        
+        fingerprints = [
+            DuplicateService.fingerprint(
+                user_id, transaction["date"], transaction["amount"], transaction["description"]
+            )
+            for _, transaction in valid
+        ]
+        
+        if skip_duplicates:
+            # Uma consulta ao índice de impressões digitais para o bloco inteiro
+            existing = DuplicateService.find_existing(
+                user_id,
+                [fingerprint for fingerprint in fingerprints if fingerprint not in imported_fingerprints]
+            )
+            
+            new = []
+            for (line, transaction), fingerprint in zip(valid, fingerprints):
+                if fingerprint in existing:
+                    ImportService._add_error(result, line, "Transação já registrada")
+                else:
+                    new.append(((line, transaction), fingerprint))
+            
+            if not new:
+                return
+            
+            valid, fingerprints = (list(values) for values in zip(*new))
+        
+        transaction_ids = TransactionService.add_transactions(
+            [{**transaction, "user_id": user_id} for _, transaction in valid]
+        )
+        
+        for (line, _), fingerprint, transaction_id in zip(valid, fingerprints, transaction_ids):
+            if transaction_id:
+                result["imported"] += 1
+                imported_fingerprints.add(fingerprint)
+            else:
+                ImportService._add_error(result, line, "Erro ao gravar a transação")
+    
+    @staticmethod
+    def validate_chunk(records: List[Tuple[int, Dict]]) -> Tuple[List[Tuple[int, Dict]], List[Tuple[int, str]]]:
+        """
+        Valida e normaliza um bloco de registros com operações vetorizadas.
+        
+        Valores aceitam os formatos "1.234,56" e "1,234.56"; um único tipo de
+        separador seguido de grupos de exatamente três dígitos ("1.234", "1,234,567")
+        é de milhar. Valores com mais de duas casas decimais são rejeitados, nunca
+        arredondados. Sem coluna de tipo, o sinal do valor define se é receita ou
+        despesa.
+        
+        Args:
+            records: Tuplas (número da linha, campos brutos)
+        
+        Returns:
+            Tupla com as transações válidas [(linha, argumentos de add_transaction)] e
+            os erros [(linha, motivo)]
+        """
+        if not records:
+            return [], []
+        
+        lines = [line for line, _ in records]
+        frame = pd.DataFrame([fields for _, fields in records], columns=ImportService.FIELDS)
+        raw = frame.fillna("").astype(str).apply(lambda column: column.str.strip())
+        
+        descriptions = raw["description"]
+        
+        amount_text = raw["amount"].str.replace(r"[^\d,.\-]", "", regex=True)
+        
+        # Um só tipo de separador seguido de grupos de três dígitos: separador de milhar
+        thousands = amount_text.str.fullmatch(r"-?[1-9]\d{0,2}([.,])\d{3}(?:\1\d{3})*")
+        
+        # Nos demais valores, o separador decimal é o último entre vírgula e ponto
+        comma_decimal = amount_text.str.rfind(",") > amount_text.str.rfind(".")
+        amount_text = amount_text.where(
+            comma_decimal,
+            amount_text.str.replace(",", "", regex=False)
+        ).where(
+            ~comma_decimal,
+            amount_text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        ).where(
+            ~thousands,
+            amount_text.str.replace(r"[,.]", "", regex=True)
+        )
+        amounts = pd.to_numeric(amount_text, errors="coerce")
+        excess_precision = amount_text.str.contains(r"\.\d{3,}$", regex=True)
+        
+        dates = pd.Series(pd.NaT, index=frame.index, dtype="datetime64[ns]")
+        for date_format in ImportService.DATE_FORMATS:
+            missing = dates.isna()
+            if not missing.any():
+                break
+            dates[missing] = pd.to_datetime(
+                raw["date"][missing].str[:10],
+                format=date_format,
+                errors="coerce"
+            )
+        
+        type_text = ImportService._normalize_series(raw["type"])
+        types = type_text.map(ImportService.TYPE_ALIASES)
+        types = types.where(
+            type_text != "",
+            pd.Series(np.where(amounts < 0, "expense", "income"), index=frame.index)
+        )
+        
+        categories = raw["category"].where(raw["category"] != "", ImportService.DEFAULT_CATEGORY)
+        
+        # Primeiro motivo de rejeição de cada linha
+        reasons = np.select(
+            [
+                (descriptions == "").to_numpy(),
+                amounts.isna().to_numpy(),
+                excess_precision.to_numpy(),
+                (amounts == 0).to_numpy(),
+                dates.isna().to_numpy(),
+                types.isna().to_numpy()
+            ],
+            ["description", "amount", "precision", "zero", "date", "type"],
+            default=""
+        )
+        
+        messages = {
+            "description": lambda index: "Descrição ausente",
+            "amount": lambda index: f"Valor inválido: '{raw['amount'][index]}'",
+            "precision": lambda index: f"Valor com mais de duas casas decimais: '{raw['amount'][index]}'",
+            "zero": lambda index: "Valor zerado",
+            "date": lambda index: f"Data inválida: '{raw['date'][index]}'",
+            "type": lambda index: f"Tipo inválido: '{raw['type'][index]}'"
+        }
+        
+        date_strings = dates.dt.strftime("%Y-%m-%d")
+        amounts = amounts.abs().round(2)
+        
+        valid = []
+        errors = []
+        for index in range(len(records)):
+            reason = reasons[index]
+            if reason:
+                errors.append((lines[index], messages[reason](index)))
+                continue
+            
+            valid.append((lines[index], {
+                "description": descriptions[index],
+                "transaction_type": types[index],
+                "category": categories[index],
+                "amount": float(amounts[index]),
+                "date": date_strings[index]
+            }))
+        
+        return valid, errors
+    
+    @staticmethod
+    def _iter_csv_records(
+        reader: Iterator[List[str]],
+        header: List[str],
+        mapping: Dict[str, str]
+    ) -> Iterator[Tuple[int, Dict]]:
+        """
+        Converte as linhas do CSV em registros com os campos da transação.
+        """
+        positions = {
+            field: header.index(column)
+            for field, column in mapping.items()
+            if column in header
+        }
+        
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            
+            # O cabeçalho foi lido antes do reader (linha 1 do arquivo)
+            yield reader.line_num + 1, {
+                field: row[position] if position < len(row) else ""
+                for field, position in positions.items()
+            }
+    
+    @staticmethod
+    def _iter_ofx_records(text: io.TextIOBase) -> Iterator[Tuple[int, Dict]]:
+        """
+        Extrai as transações (<STMTTRN>) de um OFX, linha a linha.
+        
+        Funciona para OFX em SGML (tags sem fechamento) e em XML.
+        """
+        record = None
+        start_line = 0
+        
+        for line_number, line in enumerate(text, start=1):
+            for closing, tag, value in ImportService.OFX_TAG.findall(line):
+                tag = tag.upper()
+                value = html.unescape(value.strip())
+                
+                if tag == "STMTTRN":
+                    if closing and record is not None:
+                        yield start_line, {
+                            "description": record.get("MEMO") or record.get("NAME", ""),
+                            "amount": record.get("TRNAMT", ""),
+                            "date": record.get("DTPOSTED", "")[:8]
+                        }
+                        record = None
+                    elif not closing:
+                        record = {}
+                        start_line = line_number
+                elif record is not None and not closing and value:
+                    record[tag] = value
+    
+    @staticmethod
+    def _add_error(result: Dict, line: Optional[int], error: str) -> None:
+        result["failed"] += 1 if line is not None else 0
+        if len(result["errors"]) < ImportService.MAX_REPORTED_ERRORS:
+            result["errors"].append({"line": line, "error": error})
+    
+    @staticmethod
+    def _open_text(file: BinaryIO) -> io.TextIOWrapper:
+        """
+        Abre o arquivo binário como texto, detectando a codificação (UTF-8 ou
+        Windows-1252, comum em extratos de bancos brasileiros) pelo início do arquivo.
+        """
+        file.seek(0)
+        sample = file.read(65536)
+        file.seek(0)
+        
+        try:
+            # Um caractere multibyte pode ter sido cortado no fim da amostra
+            sample[:-3].decode("utf-8")
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError:
+            encoding = "cp1252"
+        
+        return io.TextIOWrapper(file, encoding=encoding, errors="replace", newline="")
+    
+    @staticmethod
+    def _file_size(file: BinaryIO) -> int:
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        return size
+    
+    @staticmethod
+    def _detect_delimiter(header: str) -> str:
+        return max([";", ",", "\t"], key=header.count)
+    
+    @staticmethod
+    def _normalize_text(value: str) -> str:
+        return ImportService._normalize_series(pd.Series([value]))[0]
+    
+    @staticmethod
+    def _normalize_series(values: pd.Series) -> pd.Series:
+        # Minúsculas e sem acentos, para comparar nomes de colunas e tipos
+        return (
+            values.str.normalize("NFKD")
+            .str.encode("ascii", errors="ignore")
+            .str.decode("ascii")
+            .str.lower()
+            .str.strip()
+        )
@@ -0,0 +1,238 @@
+import hashlib
+import hmac
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+class PasswordHasher(ABC):
+    """
+    Interface dos algoritmos de hash de senha.
+    
+    O hash gravado tem o formato "algoritmo$parâmetros...$digest", de modo que uma
+    senha é sempre verificada com o algoritmo e o custo usados ao gravá-la, mesmo
+    depois de a configuração mudar. Hashes sem "$" são os SHA-256 legados.
+    """
+    
+    algorithm = ""
+    
+    @abstractmethod
+    def params(self) -> List[str]:
+        """
+        Retorna os parâmetros de custo gravados junto com o hash.
+        """
+    
+    @classmethod
+    @abstractmethod
+    def from_params(cls, params: List[str]) -> "PasswordHasher":
+        """
+        Cria o hasher com os parâmetros lidos de um hash gravado.
+        """
+    
+    @abstractmethod
+    def digest(self, password: str, salt: str) -> bytes:
+        """
+        Calcula o digest da senha com o salt.
+        """
+    
+    def encode(self, password: str, salt: str) -> str:
+        """
+        Gera o hash da senha no formato gravado.
+        
+        Args:
+            password: Senha em texto plano
+            salt: Salt do usuário
+        
+        Returns:
+            Hash com o algoritmo e os parâmetros de custo
+        """
+        return "$".join([self.algorithm, *self.params(), self.digest(password, salt).hex()])
+    
+    def matches(self, encoded: str) -> bool:
+        """
+        Indica se um hash gravado usa este algoritmo com os mesmos parâmetros.
+        """
+        return encoded.split("$")[:-1] == [self.algorithm, *self.params()]
+
+class ScryptHasher(PasswordHasher):
+    """
+    scrypt (memory-hard): o custo de memória é 128 * n * r bytes por hash.
+    """
+    
+    algorithm = "scrypt"
+    
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1):
+        self.n = n
+        self.r = r
+        self.p = p
+    
+    def params(self) -> List[str]:
+        return [str(self.n), str(self.r), str(self.p)]
+    
+    @classmethod
+    def from_params(cls, params: List[str]) -> "ScryptHasher":
+        n, r, p = (int(value) for value in params)
+        return cls(n, r, p)
+    
+    def digest(self, password: str, salt: str) -> bytes:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=self.n,
+            r=self.r,
+            p=self.p,
+            # O limite padrão do OpenSSL (32 MB) é menor que custos mais altos
+            maxmem=128 * self.r * (self.n + self.p + 2) + 1024 * 1024,
+            dklen=32
+        )
+
+class PBKDF2Hasher(PasswordHasher):
+    """
+    PBKDF2-HMAC-SHA256 com número de iterações configurável.
+    """
+    
+    algorithm = "pbkdf2_sha256"
+    
+    def __init__(self, iterations: int = 600000):
+        self.iterations = iterations
+    
+    def params(self) -> List[str]:
+        return [str(self.iterations)]
+    
+    @classmethod
+    def from_params(cls, params: List[str]) -> "PBKDF2Hasher":
+        return cls(int(params[0]))
+    
+    def digest(self, password: str, salt: str) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), self.iterations)
+
+class SHA256Hasher(PasswordHasher):
+    """
+    Hash legado (SHA-256 de senha + salt), usado apenas para verificar senhas antigas.
+    """
+    
+    algorithm = "sha256"
+    
+    def params(self) -> List[str]:
+        return []
+    
+    @classmethod
+    def from_params(cls, params: List[str]) -> "SHA256Hasher":
+        return cls()
+    
+    def digest(self, password: str, salt: str) -> bytes:
+        return hashlib.sha256((password + salt).encode()).digest()
+    
+    def encode(self, password: str, salt: str) -> str:
+        return self.digest(password, salt).hex()
+    
+    def matches(self, encoded: str) -> bool:
+        return "$" not in encoded
+
+HASHERS = {
+    ScryptHasher.algorithm: ScryptHasher,
+    PBKDF2Hasher.algorithm: PBKDF2Hasher,
+    SHA256Hasher.algorithm: SHA256Hasher
+}
+
+def create_password_hasher(name: Optional[str] = None) -> PasswordHasher:
+    """
+    Cria o hasher de senhas configurado.
+    
+    Args:
+        name: Algoritmo ('scrypt' ou 'pbkdf2'). Se omitido, usa a variável de ambiente
+            PASSWORD_HASHER (padrão: 'scrypt'). O custo vem de SCRYPT_N, SCRYPT_R,
+            SCRYPT_P e PBKDF2_ITERATIONS.
+    
+    Returns:
+        Instância do hasher
+    """
+    name = (name or os.getenv("PASSWORD_HASHER", "scrypt")).lower()
+    
+    if name == "scrypt":
+        return ScryptHasher(
+            n=int(os.getenv("SCRYPT_N", 2 ** 14)),
+            r=int(os.getenv("SCRYPT_R", 8)),
+            p=int(os.getenv("SCRYPT_P", 1))
+        )
+    
+    if name in ("pbkdf2", PBKDF2Hasher.algorithm):
+        return PBKDF2Hasher(int(os.getenv("PBKDF2_ITERATIONS", 600000)))
+    
+    raise ValueError(f"Algoritmo de hash de senha desconhecido: {name}")
+
+_hasher: Optional[PasswordHasher] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Retorna o hasher usado nas novas senhas (criado na primeira chamada).
+    """
+    global _hasher
+    
+    with _lock:
+        if _hasher is None:
+            _hasher = create_password_hasher()
+        return _hasher
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    
+    with _lock:
+        if _executor is None:
+            # Limita os hashes simultâneos; os excedentes aguardam em fila (FIFO)
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", 4)),
+                thread_name_prefix="password-hash"
+            )
+        return _executor
+
+def _hasher_for(encoded: str) -> PasswordHasher:
+    if "$" not in encoded:
+        return SHA256Hasher()
+    
+    algorithm, *params = encoded.split("$")[:-1]
+    return HASHERS[algorithm].from_params(params)
+
+def hash_password(password: str, salt: str) -> str:
+    """
+    Gera o hash de uma senha com o hasher configurado, no pool de hash.
+    
+    Args:
+        password: Senha em texto plano
+        salt: Salt do usuário
+    
+    Returns:
+        Hash no formato "algoritmo$parâmetros...$digest"
+    """
+    return _get_executor().submit(get_password_hasher().encode, password, salt).result()
+
+def verify_password(password: str, salt: str, encoded: str) -> bool:
+    """
+    Verifica uma senha com o algoritmo e o custo do hash gravado, no pool de hash.
+    
+    Args:
+        password: Senha em texto plano
+        salt: Salt do usuário
+        encoded: Hash gravado (em qualquer formato suportado)
+    
+    Returns:
+        True se a senha confere, False caso contrário
+    """
+    try:
+        hasher = _hasher_for(encoded or "")
+    except (KeyError, ValueError):
+        print("Formato de hash de senha desconhecido")
+        return False
+    
+    candidate = _get_executor().submit(hasher.encode, password, salt).result()
+    return hmac.compare_digest(candidate, encoded)
+
+def needs_rehash(encoded: str) -> bool:
+    """
+    Indica se um hash gravado não usa o algoritmo ou o custo configurados (ex: hashes
+    SHA-256 legados), e deve ser regravado no próximo login.
+    """
+    return not get_password_hasher().matches(encoded or "")
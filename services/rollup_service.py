@@ -0,0 +1,309 @@
+import argparse
+import datetime
+import os
+from typing import Dict, Iterable, List, Optional, Union
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    set_document,
+    increment_document,
+    bulk_delete,
+    query_documents,
+    stream_documents
+)
+from services.transaction_schema import TransactionSchema
+
+class RollupService:
+    """
+    Serviço para manter totais mensais pré-agregados por usuário.
+    
+    Cada documento da coleção `monthly_rollups` guarda, para um usuário e um mês
+    (YYYY-MM), os totais de receitas e despesas e os totais por categoria, em
+    centavos inteiros para que os incrementos não acumulem erro de arredondamento:
+        
+        {
+            "user_id": "...",
+            "month": "2024-03",
+            "income_cents": 500000,
+            "expense_cents": 320000,
+            "categories": {"Alimentação": {"expense_cents": 80000}, ...}
+        }
+    
+    Documentos gravados antes dos campos em centavos são substituídos pelo rebuild.
+    """
+    
+    COLLECTION_NAME = "monthly_rollups"
+    TRANSACTIONS_COLLECTION = "transactions"
+    TRANSACTION_TYPES = ("income", "expense")
+    
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Indica se as leituras de resumo devem usar os rollups.
+        
+        Os rollups são sempre mantidos nas gravações, mas só devem ser usados nas
+        leituras depois que o rebuild tiver sido executado para os dados existentes.
+        
+        Returns:
+            True se a variável USE_MONTHLY_ROLLUPS estiver habilitada
+        """
+        return os.getenv("USE_MONTHLY_ROLLUPS", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def get_rollup_id(user_id: str, month: str) -> str:
+        """
+        Monta o ID do documento de rollup para um usuário e mês.
+        
+        Args:
+            user_id: ID do usuário
+            month: Mês no formato YYYY-MM
+        
+        Returns:
+            ID do documento
+        """
+        return f"{user_id}_{month}"
+    
+    @staticmethod
+    def get_amount(totals: Dict, transaction_type: str) -> float:
+        """
+        Lê um total de um rollup (ou dos totais de uma categoria) em unidades da moeda.
+        
+        Args:
+            totals: Documento de rollup ou totais de uma categoria
+            transaction_type: Tipo da transação (income ou expense)
+        
+        Returns:
+            Total convertido de centavos
+        """
+        return totals.get(f"{transaction_type}_cents", 0) / 100
+    
+    @staticmethod
+    def apply_transaction(transaction: Dict, sign: int = 1) -> bool:
+        """
+        Aplica (ou remove, com sign=-1) uma transação nos totais do seu mês.
+        
+        Args:
+            transaction: Dados da transação (user_id, type, category, amount, date)
+            sign: 1 para somar a transação, -1 para subtraí-la
+        
+        Returns:
+            True se a atualização for bem-sucedida, False caso contrário
+        """
+        return RollupService.apply_transactions([transaction], sign)
+    
+    @staticmethod
+    def apply_transactions(transactions: List[Dict], sign: int = 1) -> bool:
+        """
+        Aplica (ou remove, com sign=-1) várias transações nos rollups, com um único
+        incremento por usuário e mês.
+        
+        Args:
+            transactions: Lista de transações (user_id, type, category, amount, date)
+            sign: 1 para somar as transações, -1 para subtraí-las
+        
+        Returns:
+            True se todas as atualizações forem bem-sucedidas, False caso contrário
+        """
+        success = True
+        now = datetime.datetime.now().isoformat()
+        
+        for rollup_id, rollup in RollupService._aggregate(transactions, sign).items():
+            success = increment_document(
+                RollupService.COLLECTION_NAME,
+                rollup_id,
+                {
+                    "income_cents": rollup["income_cents"],
+                    "expense_cents": rollup["expense_cents"],
+                    "categories": rollup["categories"]
+                },
+                data={
+                    "user_id": rollup["user_id"],
+                    "month": rollup["month"],
+                    "updated_at": now
+                }
+            ) and success
+        
+        return success
+    
+    @staticmethod
+    def _aggregate(transactions: Iterable[Dict], sign: int = 1) -> Dict[str, Dict]:
+        """
+        Agrega transações por usuário e mês, em centavos.
+        
+        Args:
+            transactions: Transações a agregar
+            sign: 1 para somar as transações, -1 para subtraí-las
+        
+        Returns:
+            Mapa de ID do rollup para os totais agregados
+        """
+        rollups = {}
+        
+        for transaction in transactions:
+            transaction_type = transaction.get("type")
+            month = str(transaction.get("date", ""))[:7]
+            owner_id = transaction.get("user_id")
+            
+            if transaction_type not in RollupService.TRANSACTION_TYPES or not month or not owner_id:
+                continue
+            
+            rollup_id = RollupService.get_rollup_id(owner_id, month)
+            if rollup_id not in rollups:
+                rollups[rollup_id] = {
+                    "user_id": owner_id,
+                    "month": month,
+                    "income_cents": 0,
+                    "expense_cents": 0,
+                    "categories": {}
+                }
+            
+            rollup = rollups[rollup_id]
+            cents = sign * TransactionSchema.to_cents(transaction.get("amount", 0))
+            field = f"{transaction_type}_cents"
+            category = transaction.get("category") or "Outros"
+            category_totals = rollup["categories"].setdefault(category, {})
+            
+            rollup[field] += cents
+            category_totals[field] = category_totals.get(field, 0) + cents
+        
+        return rollups
+    
+    @staticmethod
+    def replace_transaction(old_transaction: Dict, new_transaction: Dict) -> bool:
+        """
+        Move a contribuição de uma transação alterada nos rollups.
+        
+        Args:
+            old_transaction: Dados da transação antes da alteração
+            new_transaction: Dados da transação depois da alteração
+        
+        Returns:
+            True se ambas as atualizações forem bem-sucedidas, False caso contrário
+        """
+        removed = RollupService.apply_transaction(old_transaction, sign=-1)
+        added = RollupService.apply_transaction(new_transaction, sign=1)
+        return removed and added
+    
+    @staticmethod
+    def list_rollups(
+        user_id: str,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Lista os rollups de um usuário em um intervalo de meses.
+        
+        Args:
+            user_id: ID do usuário
+            start_month: Mês inicial no formato YYYY-MM (opcional)
+            end_month: Mês final no formato YYYY-MM (opcional)
+        
+        Returns:
+            Lista de rollups ordenada por mês
+        """
+        filters = [("user_id", "==", user_id)]
+        
+        if start_month:
+            filters.append(("month", ">=", start_month))
+        
+        if end_month:
+            filters.append(("month", "<=", end_month))
+        
+        return query_documents(
+            RollupService.COLLECTION_NAME,
+            filters=filters,
+            order_by="month"
+        )
+    
+    @staticmethod
+    def get_month_range(
+        start_date: Optional[Union[datetime.date, str]],
+        end_date: Optional[Union[datetime.date, str]]
+    ) -> Optional[Dict]:
+        """
+        Verifica se um período cobre apenas meses completos.
+        
+        Args:
+            start_date: Data inicial do período (opcional)
+            end_date: Data final do período (opcional)
+        
+        Returns:
+            Dicionário com start_month e end_month (YYYY-MM) ou None se o período
+            começar ou terminar no meio de um mês
+        """
+        start_month = None
+        end_month = None
+        
+        if start_date:
+            if isinstance(start_date, str):
+                start_date = datetime.date.fromisoformat(start_date)
+            if start_date.day != 1:
+                return None
+            start_month = start_date.strftime("%Y-%m")
+        
+        if end_date:
+            if isinstance(end_date, str):
+                end_date = datetime.date.fromisoformat(end_date)
+            if (end_date + datetime.timedelta(days=1)).day != 1:
+                return None
+            end_month = end_date.strftime("%Y-%m")
+        
+        return {"start_month": start_month, "end_month": end_month}
+    
+    @staticmethod
+    def rebuild(user_id: Optional[str] = None) -> int:
+        """
+        Recalcula os rollups a partir das transações existentes.
+        
+        Args:
+            user_id: ID do usuário a recalcular (opcional, padrão: todos os usuários)
+        
+        Returns:
+            Número de documentos de rollup gravados
+        """
+        # Obter transações (de um usuário ou de todos)
+        if user_id:
+            transactions = stream_documents(
+                RollupService.TRANSACTIONS_COLLECTION,
+                field="user_id",
+                operator="==",
+                value=user_id
+            )
+            existing_rollups = RollupService.list_rollups(user_id)
+        else:
+            transactions = stream_documents(RollupService.TRANSACTIONS_COLLECTION)
+            existing_rollups = query_documents(RollupService.COLLECTION_NAME)
+        
+        # Agregar por usuário e mês (documentos de qualquer versão do schema)
+        rollups = RollupService._aggregate(map(TransactionSchema.decode, transactions))
+        
+        # Gravar os rollups recalculados (sobrescrevendo os anteriores)
+        written = 0
+        now = datetime.datetime.now().isoformat()
+        
+        for rollup_id, rollup in rollups.items():
+            rollup["updated_at"] = now
+            if set_document(RollupService.COLLECTION_NAME, rollup_id, rollup):
+                written += 1
+        
+        # Remover rollups de meses que não têm mais transações
+        bulk_delete(
+            RollupService.COLLECTION_NAME,
+            [rollup["id"] for rollup in existing_rollups if rollup["id"] not in rollups]
+        )
+        
+        return written
+
+# Comando de rebuild: python services/rollup_service.py [--user-id ID]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula os rollups mensais de transações.")
+    parser.add_argument("--user-id", help="Recalcula apenas os rollups deste usuário")
+    args = parser.parse_args()
+    
+    count = RollupService.rebuild(args.user_id)
+    print(f"{count} rollups mensais recalculados.")
@@ -0,0 +1,180 @@
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    get_collection,
+    get_backend,
+    build_query
+)
+from services.transaction_cache import TransactionCache
+
+class SubscriptionService:
+    """
+    Serviço de notificações em tempo real baseado em `on_snapshot` do Firestore.
+    
+    Cada usuário com ao menos um assinante tem um listener por coleção (transações,
+    categorias e metas), compartilhado por todas as sessões do processo. As alterações
+    de transações são aplicadas ao TransactionCache, que descarta apenas os agregados
+    dos meses afetados e deixa de fazer sincronizações periódicas enquanto o listener
+    estiver ativo. Em seguida, os assinantes são notificados com um evento:
+        
+        {
+            "user_id": "...",
+            "collection": "transactions",
+            "changed": ["id1", ...],
+            "deleted": ["id2", ...]
+        }
+    """
+    
+    COLLECTIONS = ("transactions", "categories", "goals")
+    TRANSACTIONS_COLLECTION = "transactions"
+    
+    # Assinaturas por usuário: listeners do Firestore e callbacks por token
+    _subscriptions: Dict[str, Dict] = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def is_supported() -> bool:
+        """
+        Indica se o backend atual suporta listeners (apenas o Firestore).
+        """
+        return get_backend() is None
+    
+    @staticmethod
+    def subscribe(user_id: str, callback: Callable[[Dict], None]) -> Optional[str]:
+        """
+        Registra um callback para as alterações nos dados de um usuário.
+        
+        O callback é chamado na thread do listener, nunca para o snapshot inicial.
+        
+        Args:
+            user_id: ID do usuário
+            callback: Função que recebe o evento de alteração
+        
+        Returns:
+            Token da assinatura ou None se o backend não suportar listeners ou houver erro
+        """
+        if not SubscriptionService.is_supported():
+            return None
+        
+        token = str(uuid.uuid4())
+        
+        with SubscriptionService._lock:
+            subscription = SubscriptionService._subscriptions.get(user_id)
+            
+            if subscription is None:
+                subscription = {"watches": [], "callbacks": {}, "initialized": set()}
+                
+                try:
+                    for collection_name in SubscriptionService.COLLECTIONS:
+                        query = build_query(get_collection(collection_name), "user_id", "==", user_id)
+                        subscription["watches"].append(query.on_snapshot(
+                            SubscriptionService._create_handler(user_id, collection_name, subscription)
+                        ))
+                except Exception as e:
+                    print(f"Erro ao assinar alterações em tempo real: {e}")
+                    SubscriptionService._close_watches(subscription)
+                    return None
+                
+                SubscriptionService._subscriptions[user_id] = subscription
+            
+            subscription["callbacks"][token] = callback
+        
+        return token
+    
+    @staticmethod
+    def unsubscribe(token: str) -> bool:
+        """
+        Cancela uma assinatura. Os listeners do usuário são encerrados quando não
+        restam assinantes.
+        
+        Args:
+            token: Token retornado por subscribe
+        
+        Returns:
+            True se a assinatura existia, False caso contrário
+        """
+        with SubscriptionService._lock:
+            for user_id, subscription in list(SubscriptionService._subscriptions.items()):
+                if token not in subscription["callbacks"]:
+                    continue
+                
+                del subscription["callbacks"][token]
+                
+                if not subscription["callbacks"]:
+                    del SubscriptionService._subscriptions[user_id]
+                    SubscriptionService._close_watches(subscription)
+                    TransactionCache.set_live(user_id, False)
+                
+                return True
+        
+        return False
+    
+    @staticmethod
+    def _close_watches(subscription: Dict) -> None:
+        for watch in subscription["watches"]:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"Erro ao encerrar listener: {e}")
+    
+    @staticmethod
+    def _create_handler(user_id: str, collection_name: str, subscription: Dict) -> Callable:
+        """
+        Cria o callback de on_snapshot de uma coleção do usuário.
+        """
+        def handle_snapshot(documents, changes, read_time):
+            try:
+                # O primeiro snapshot traz todos os documentos da consulta
+                initial = collection_name not in subscription["initialized"]
+                subscription["initialized"].add(collection_name)
+                
+                if initial:
+                    if collection_name == SubscriptionService.TRANSACTIONS_COLLECTION:
+                        TransactionCache.load(
+                            user_id,
+                            [{**document.to_dict(), "id": document.id} for document in documents]
+                        )
+                        TransactionCache.set_live(user_id, True)
+                    return
+                
+                changed = [
+                    {**change.document.to_dict(), "id": change.document.id}
+                    for change in changes
+                    if change.type.name != "REMOVED"
+                ]
+                deleted = [
+                    change.document.id
+                    for change in changes
+                    if change.type.name == "REMOVED"
+                ]
+                
+                if collection_name == SubscriptionService.TRANSACTIONS_COLLECTION:
+                    TransactionCache.apply_changes(user_id, changed, deleted)
+                
+                event = {
+                    "user_id": user_id,
+                    "collection": collection_name,
+                    "changed": [document["id"] for document in changed],
+                    "deleted": deleted
+                }
+                
+                with SubscriptionService._lock:
+                    callbacks = list(subscription["callbacks"].values())
+                
+                for callback in callbacks:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(f"Erro ao notificar assinante: {e}")
+            except Exception as e:
+                print(f"Erro ao processar alterações em tempo real: {e}")
+        
+        return handle_snapshot
@@ -0,0 +1,223 @@
+import argparse
+import datetime
+from typing import Dict, List, Optional
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    bulk_add,
+    bulk_delete,
+    stream_documents
+)
+
+class SyncService:
+    """
+    Serviço de sincronização incremental baseada no campo `updated_at`.
+    
+    Um snapshot local guarda os documentos de um usuário e uma marca d'água (o maior
+    `updated_at`/`deleted_at` já visto). Cada sincronização busca apenas os documentos
+    alterados depois da marca e as exclusões registradas como tombstones.
+    
+    As datas são gravadas com o relógio de quem faz a gravação, então uma alteração
+    confirmada depois da última sincronização pode ter uma data anterior à marca. Por
+    isso cada sincronização relê uma janela de SYNC_OVERLAP_SECONDS antes da marca
+    (aplicar de novo um documento ou uma exclusão não muda o resultado):
+        
+        {
+            "collection": "transactions",
+            "document_id": "...",
+            "user_id": "...",
+            "deleted_at": "2024-03-10T12:00:00"
+        }
+    """
+    
+    COLLECTION_NAME = "tombstones"
+    
+    # Tombstones mais antigos são removidos; snapshots mais antigos fazem uma carga completa
+    TOMBSTONE_RETENTION_DAYS = 30
+    
+    # Janela relida antes da marca d'água, maior que a diferença esperada entre os
+    # relógios de quem grava
+    SYNC_OVERLAP_SECONDS = 300
+    
+    @staticmethod
+    def record_deletions(collection_name: str, documents: List[Dict]) -> None:
+        """
+        Registra tombstones para documentos excluídos.
+        
+        Args:
+            collection_name: Nome da coleção dos documentos
+            documents: Documentos excluídos com os campos id e user_id
+        """
+        deleted_at = datetime.datetime.now().isoformat()
+        
+        tombstones = [
+            {
+                "collection": collection_name,
+                "document_id": document["id"],
+                "user_id": document["user_id"],
+                "deleted_at": deleted_at
+            }
+            for document in documents
+            if document.get("user_id")
+        ]
+        
+        if tombstones:
+            bulk_add(SyncService.COLLECTION_NAME, tombstones)
+    
+    @staticmethod
+    def _overlap_start(watermark: str) -> str:
+        """
+        Retorna o início da janela relida antes da marca d'água.
+        """
+        overlap = datetime.timedelta(seconds=SyncService.SYNC_OVERLAP_SECONDS)
+        try:
+            return (datetime.datetime.fromisoformat(watermark) - overlap).isoformat()
+        except ValueError:
+            # Marca em formato desconhecido: relê tudo o que é anterior a ela
+            return ""
+    
+    @staticmethod
+    def _is_expired(since: str) -> bool:
+        """
+        Indica se o início da janela é anterior aos tombstones ainda mantidos.
+        """
+        retention = datetime.timedelta(days=SyncService.TOMBSTONE_RETENTION_DAYS)
+        cutoff = datetime.datetime.now() - retention
+        return since < cutoff.isoformat()
+    
+    @staticmethod
+    def fetch_changes(
+        collection_name: str,
+        user_id: str,
+        watermark: Optional[str] = None
+    ) -> Dict:
+        """
+        Busca os documentos alterados e excluídos depois de uma marca d'água.
+        
+        Args:
+            collection_name: Nome da coleção
+            user_id: ID do usuário
+            watermark: Maior updated_at já sincronizado (None para carga completa);
+                as alterações dos SYNC_OVERLAP_SECONDS anteriores são relidas
+        
+        Returns:
+            Dicionário com changed (documentos), deleted (IDs), watermark (nova marca)
+            e full (True se foi feita uma carga completa)
+        """
+        since = SyncService._overlap_start(watermark) if watermark is not None else None
+        full = since is None or SyncService._is_expired(since)
+        
+        filters = [("user_id", "==", user_id)]
+        if not full:
+            filters.append(("updated_at", ">", since))
+        
+        changed = list(stream_documents(
+            collection_name,
+            filters=filters,
+            order_by=None if full else "updated_at"
+        ))
+        
+        deleted = []
+        if not full:
+            for tombstone in stream_documents(
+                SyncService.COLLECTION_NAME,
+                filters=[
+                    ("collection", "==", collection_name),
+                    ("user_id", "==", user_id),
+                    ("deleted_at", ">", since)
+                ],
+                order_by="deleted_at"
+            ):
+                deleted.append(tombstone["document_id"])
+                watermark = max(watermark, tombstone["deleted_at"])
+            
+            # Exclusões relidas na janela aparecem mais de uma vez
+            deleted = list(dict.fromkeys(deleted))
+        
+        # Documentos antigos sem updated_at entram apenas nas cargas completas
+        timestamps = [d["updated_at"] for d in changed if d.get("updated_at")]
+        if timestamps:
+            watermark = max([watermark or "", *timestamps])
+        
+        return {
+            "changed": changed,
+            "deleted": deleted,
+            "watermark": None if full and not timestamps else watermark,
+            "full": full
+        }
+    
+    @staticmethod
+    def sync(
+        collection_name: str,
+        user_id: str,
+        snapshot: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Atualiza um snapshot local com as alterações desde a sua marca d'água.
+        
+        Args:
+            collection_name: Nome da coleção
+            user_id: ID do usuário
+            snapshot: Snapshot anterior com documents (ID para dados) e watermark
+                (opcional, padrão: carga completa)
+        
+        Returns:
+            Novo snapshot com documents e watermark, além de changed e deleted com os
+            IDs alterados nesta sincronização
+        """
+        snapshot = snapshot or {"documents": {}, "watermark": None}
+        changes = SyncService.fetch_changes(collection_name, user_id, snapshot.get("watermark"))
+        
+        documents = {} if changes["full"] else dict(snapshot.get("documents", {}))
+        
+        for document in changes["changed"]:
+            documents[document["id"]] = document
+        for document_id in changes["deleted"]:
+            documents.pop(document_id, None)
+        
+        return {
+            "documents": documents,
+            "watermark": changes["watermark"],
+            "changed": [document["id"] for document in changes["changed"]],
+            "deleted": changes["deleted"]
+        }
+    
+    @staticmethod
+    def purge_tombstones(retention_days: Optional[int] = None) -> int:
+        """
+        Remove tombstones mais antigos que o período de retenção.
+        
+        Args:
+            retention_days: Dias de retenção (padrão: TOMBSTONE_RETENTION_DAYS)
+        
+        Returns:
+            Número de tombstones removidos
+        """
+        retention_days = retention_days or SyncService.TOMBSTONE_RETENTION_DAYS
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+        
+        tombstone_ids = [
+            tombstone["id"]
+            for tombstone in stream_documents(
+                SyncService.COLLECTION_NAME,
+                "deleted_at",
+                "<",
+                cutoff.isoformat()
+            )
+        ]
+        
+        return sum(1 for ok in bulk_delete(SyncService.COLLECTION_NAME, tombstone_ids) if ok)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove tombstones de exclusões antigos.")
+    parser.add_argument("--retention-days", type=int,
+                        help=f"Dias de retenção (padrão: {SyncService.TOMBSTONE_RETENTION_DAYS})")
+    args = parser.parse_args()
+    
+    count = SyncService.purge_tombstones(args.retention_days)
+    print(f"{count} tombstones removidos.")
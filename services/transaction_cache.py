@@ -0,0 +1,541 @@
+from collections import OrderedDict
+import datetime
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from services.sync_service import SyncService
+from services.transaction_schema import TransactionSchema
+from utils.currency_utils import CurrencyConverter
+
+class TransactionCache:
+    """
+    Cache colunar, em memória, das transações de cada usuário.
+    
+    As transações ficam em um DataFrame indexado pelo ID com datas datetime64, tipo,
+    categoria e moeda categóricos e valores em centavos inteiros. Os resumos são
+    calculados com máscaras e agrupamentos vetorizados, sem percorrer dicionários
+    Python, e podem ser convertidos para uma moeda de referência com o
+    CurrencyConverter.
+    """
+    
+    TRANSACTIONS_COLLECTION = "transactions"
+    
+    # Intervalo mínimo entre sincronizações incrementais de um mesmo usuário
+    SYNC_INTERVAL_SECONDS = 30
+    
+    # Usuários com frame carregado e tempo sem uso após o qual o frame é descartado
+    FRAME_CACHE_SIZE = 1024
+    FRAME_CACHE_TTL_SECONDS = 300
+    
+    # Agregados guardados por usuário (os mais antigos são descartados)
+    AGGREGATE_CACHE_SIZE = 256
+    
+    # Frames carregados por usuário, compartilhados pelas sessões do processo
+    _frames: Dict[str, pd.DataFrame] = {}
+    _watermarks: Dict[str, Optional[str]] = {}
+    _synced_at: Dict[str, float] = {}
+    _live_users = set()
+    
+    # user_id -> instante do último uso do frame, em ordem de uso
+    _last_used: "OrderedDict[str, float]" = OrderedDict()
+    
+    # Agregados calculados por usuário: chave -> (mês inicial, mês final, resultado)
+    _aggregates: Dict[str, Dict[tuple, tuple]] = {}
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Indica se os resumos devem ser calculados a partir do cache colunar
+        (variável USE_TRANSACTION_CACHE).
+        """
+        return os.getenv("USE_TRANSACTION_CACHE", "false").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def build_frame(transactions: Iterable[Dict]) -> pd.DataFrame:
+        """
+        Converte transações em um DataFrame colunar.
+        
+        Args:
+            transactions: Transações com o campo id
+        
+        Returns:
+            DataFrame indexado pelo ID com as colunas date, type, category, currency e
+            amount_cents
+        """
+        ids = []
+        dates = []
+        types = []
+        categories = []
+        currencies = []
+        amounts = []
+        
+        for transaction in transactions:
+            ids.append(transaction["id"])
+            types.append(transaction.get("type"))
+            categories.append(transaction.get("category", "Outros"))
+            currencies.append(transaction.get("currency") or CurrencyConverter.BASE_CURRENCY)
+            
+            # Documentos de qualquer versão do schema
+            date = transaction.get("date")
+            if date is not None and not isinstance(date, str):
+                date = TransactionSchema.to_date_str(date)
+            dates.append(date)
+            
+            if transaction.get("amount_cents") is not None:
+                amounts.append(transaction["amount_cents"])
+            else:
+                amounts.append(TransactionSchema.to_cents(transaction.get("amount") or 0))
+        
+        # Centavos inteiros evitam o acúmulo de erros de arredondamento nas somas
+        amount_cents = np.asarray(amounts, dtype="int64")
+        
+        # Datas inválidas ou ausentes viram NaT e ficam fora de qualquer período
+        parsed_dates = pd.to_datetime(
+            pd.Series(dates, dtype="object"),
+            format="ISO8601",
+            errors="coerce"
+        )
+        
+        return pd.DataFrame(
+            {
+                "date": parsed_dates.to_numpy(),
+                "type": pd.Categorical(types),
+                "category": pd.Categorical(categories),
+                "currency": pd.Categorical(currencies),
+                "amount_cents": amount_cents
+            },
+            index=pd.Index(ids, dtype="object", name="id")
+        )
+    
+    @staticmethod
+    def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+        # Concatenar categóricos com categorias diferentes resulta em colunas object
+        return frame.astype({"type": "category", "category": "category", "currency": "category"})
+    
+    @staticmethod
+    def get_frame(user_id: str) -> pd.DataFrame:
+        """
+        Retorna o frame de transações do usuário, carregando-o na primeira chamada e
+        sincronizando as alterações de outras sessões a cada SYNC_INTERVAL_SECONDS
+        (exceto quando um listener em tempo real mantém o frame atualizado).
+        
+        Args:
+            user_id: ID do usuário
+        
+        Returns:
+            DataFrame colunar das transações do usuário (não deve ser modificado)
+        """
+        with TransactionCache._lock:
+            synced_at = TransactionCache._synced_at.get(user_id, 0)
+            if user_id not in TransactionCache._frames or (
+                user_id not in TransactionCache._live_users
+                and time.monotonic() - synced_at >= TransactionCache.SYNC_INTERVAL_SECONDS
+            ):
+                TransactionCache.sync(user_id)
+            TransactionCache._touch(user_id)
+            return TransactionCache._frames[user_id]
+    
+    @staticmethod
+    def sync(user_id: str) -> Dict:
+        """
+        Aplica ao frame do usuário apenas as transações alteradas ou excluídas desde a
+        última sincronização (carga completa na primeira vez).
+        
+        Args:
+            user_id: ID do usuário
+        
+        Returns:
+            Dicionário com os IDs alterados (changed) e excluídos (deleted)
+        """
+        with TransactionCache._lock:
+            loaded = user_id in TransactionCache._frames
+            changes = SyncService.fetch_changes(
+                TransactionCache.TRANSACTIONS_COLLECTION,
+                user_id,
+                TransactionCache._watermarks.get(user_id) if loaded else None
+            )
+            
+            if changes["full"]:
+                TransactionCache.load(user_id, changes["changed"])
+            else:
+                TransactionCache.apply_changes(user_id, changes["changed"], changes["deleted"])
+            
+            TransactionCache._watermarks[user_id] = changes["watermark"]
+            TransactionCache._synced_at[user_id] = time.monotonic()
+            
+            return {
+                "changed": [t["id"] for t in changes["changed"]],
+                "deleted": changes["deleted"]
+            }
+    
+    @staticmethod
+    def load(user_id: str, transactions: List[Dict]) -> None:
+        """
+        Substitui o frame do usuário pelo conjunto completo de suas transações.
+        
+        Args:
+            user_id: ID do usuário
+            transactions: Todas as transações do usuário, com o campo id
+        """
+        with TransactionCache._lock:
+            TransactionCache._frames[user_id] = TransactionCache.build_frame(transactions)
+            TransactionCache._aggregates.pop(user_id, None)
+            
+            timestamps = [t["updated_at"] for t in transactions if t.get("updated_at")]
+            TransactionCache._watermarks[user_id] = max(timestamps) if timestamps else None
+            TransactionCache._synced_at[user_id] = time.monotonic()
+            TransactionCache._touch(user_id)
+    
+    @staticmethod
+    def apply_changes(user_id: str, changed: List[Dict], deleted: List[str]) -> None:
+        """
+        Aplica transações alteradas e excluídas ao frame já carregado do usuário,
+        descartando apenas os agregados dos meses afetados.
+        
+        Args:
+            user_id: ID do usuário
+            changed: Transações novas ou alteradas, com o campo id
+            deleted: IDs das transações excluídas
+        """
+        with TransactionCache._lock:
+            frame = TransactionCache._frames.get(user_id)
+            if frame is None:
+                # O frame será carregado completo na próxima leitura
+                return
+            
+            new_frame = TransactionCache.build_frame(changed)
+            replaced = new_frame.index.union(pd.Index(deleted, dtype="object"))
+            old_rows = frame[frame.index.isin(replaced)]
+            
+            # Meses da versão anterior e da nova versão de cada transação
+            TransactionCache._invalidate_months(
+                user_id,
+                pd.concat([old_rows["date"], new_frame["date"]])
+            )
+            
+            TransactionCache._frames[user_id] = TransactionCache._normalize(pd.concat([
+                frame.drop(replaced, errors="ignore"),
+                new_frame
+            ]))
+    
+    @staticmethod
+    def upsert(transactions: List[Dict]) -> None:
+        """
+        Insere ou substitui transações nos frames já carregados.
+        
+        Args:
+            transactions: Transações completas com os campos id e user_id
+        """
+        for user_id, user_transactions in TransactionCache._group_by_user(transactions).items():
+            TransactionCache.apply_changes(user_id, user_transactions, [])
+    
+    @staticmethod
+    def remove(transactions: List[Dict]) -> None:
+        """
+        Remove transações dos frames já carregados.
+        
+        Args:
+            transactions: Transações com os campos id e user_id
+        """
+        for user_id, user_transactions in TransactionCache._group_by_user(transactions).items():
+            TransactionCache.apply_changes(user_id, [], [t["id"] for t in user_transactions])
+    
+    @staticmethod
+    def set_live(user_id: str, live: bool) -> None:
+        """
+        Indica se um listener em tempo real está mantendo o frame do usuário atualizado,
+        dispensando as sincronizações periódicas.
+        
+        Args:
+            user_id: ID do usuário
+            live: True enquanto o listener estiver ativo
+        """
+        with TransactionCache._lock:
+            if live:
+                TransactionCache._live_users.add(user_id)
+            else:
+                TransactionCache._live_users.discard(user_id)
+    
+    @staticmethod
+    def invalidate(user_id: Optional[str] = None) -> None:
+        """
+        Descarta o frame de um usuário (ou de todos), forçando uma nova carga.
+        
+        Args:
+            user_id: ID do usuário (opcional, padrão: todos)
+        """
+        with TransactionCache._lock:
+            if user_id is None:
+                TransactionCache._frames.clear()
+                TransactionCache._watermarks.clear()
+                TransactionCache._synced_at.clear()
+                TransactionCache._aggregates.clear()
+                TransactionCache._last_used.clear()
+                CurrencyConverter.invalidate()
+            else:
+                TransactionCache._last_used.pop(user_id, None)
+                TransactionCache._discard(user_id)
+    
+    @staticmethod
+    def _discard(user_id: str) -> None:
+        # Descarta o frame e os dados derivados de um usuário
+        TransactionCache._frames.pop(user_id, None)
+        TransactionCache._watermarks.pop(user_id, None)
+        TransactionCache._synced_at.pop(user_id, None)
+        TransactionCache._aggregates.pop(user_id, None)
+        CurrencyConverter.invalidate(user_id)
+    
+    @staticmethod
+    def _touch(user_id: str) -> None:
+        """
+        Marca o frame do usuário como usado e descarta os frames sem uso há mais de
+        FRAME_CACHE_TTL_SECONDS ou além dos FRAME_CACHE_SIZE usados mais recentemente.
+        """
+        now = time.monotonic()
+        last_used = TransactionCache._last_used
+        last_used[user_id] = now
+        last_used.move_to_end(user_id)
+        
+        # O usuário atual fica no fim da fila e nunca é descartado aqui
+        while (
+            len(last_used) > TransactionCache.FRAME_CACHE_SIZE
+            or next(iter(last_used.values())) < now - TransactionCache.FRAME_CACHE_TTL_SECONDS
+        ):
+            evicted_id, _ = last_used.popitem(last=False)
+            TransactionCache._discard(evicted_id)
+    
+    @staticmethod
+    def _invalidate_months(user_id: str, dates: pd.Series) -> None:
+        """
+        Descarta os agregados do usuário cujo período inclui algum dos meses afetados.
+        """
+        aggregates = TransactionCache._aggregates.get(user_id)
+        if not aggregates or dates.empty:
+            return
+        
+        # Transações sem data válida entram apenas nos agregados sem período
+        if dates.isna().any():
+            TransactionCache._aggregates.pop(user_id, None)
+            return
+        
+        months = set(dates.dt.strftime("%Y-%m"))
+        
+        for key, (start_month, end_month, _) in list(aggregates.items()):
+            if any(
+                (start_month is None or month >= start_month)
+                and (end_month is None or month <= end_month)
+                for month in months
+            ):
+                del aggregates[key]
+    
+    @staticmethod
+    def _memoize(
+        user_id: str,
+        key: tuple,
+        start_date: Optional[Union[datetime.date, str]],
+        end_date: Optional[Union[datetime.date, str]],
+        compute
+    ):
+        """
+        Retorna um agregado já calculado para o frame atual ou o calcula e guarda,
+        junto com o intervalo de meses que ele cobre.
+        """
+        with TransactionCache._lock:
+            TransactionCache.get_frame(user_id)
+            aggregates = TransactionCache._aggregates.setdefault(user_id, {})
+            
+            if key not in aggregates:
+                if len(aggregates) >= TransactionCache.AGGREGATE_CACHE_SIZE:
+                    del aggregates[next(iter(aggregates))]
+                aggregates[key] = (
+                    str(start_date)[:7] if start_date else None,
+                    str(end_date)[:7] if end_date else None,
+                    compute()
+                )
+            
+            return aggregates[key][2]
+    
+    @staticmethod
+    def _group_by_user(transactions: List[Dict]) -> Dict[str, List[Dict]]:
+        groups = {}
+        for transaction in transactions:
+            if transaction.get("user_id"):
+                groups.setdefault(transaction["user_id"], []).append(transaction)
+        return groups
+    
+    @staticmethod
+    def get_amounts(user_id: str, currency: str) -> np.ndarray:
+        """
+        Retorna os valores, em centavos, das transações do usuário convertidos para uma
+        moeda pela cotação do dia de cada transação, na ordem das linhas do frame.
+        
+        A coluna convertida é calculada em uma única operação vetorizada e reaproveitada
+        até a próxima alteração do frame.
+        
+        Args:
+            user_id: ID do usuário
+            currency: Moeda de destino
+        
+        Returns:
+            Array de centavos inteiros. Levanta CurrencyConversionError se não houver
+            cotação
+        """
+        with TransactionCache._lock:
+            frame = TransactionCache.get_frame(user_id)
+            converted = CurrencyConverter.convert_column(
+                user_id,
+                currency,
+                frame["amount_cents"].to_numpy(),
+                frame["date"].to_numpy(),
+                frame["currency"].to_numpy(),
+                frame
+            )
+        
+        return np.rint(converted).astype("int64")
+    
+    @staticmethod
+    def _select(
+        user_id: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        transaction_type: Optional[str] = None,
+        currency: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Filtra o frame do usuário por período, tipo e categoria com uma máscara
+        vetorizada, com os valores convertidos para a moeda informada.
+        """
+        frame = TransactionCache.get_frame(user_id)
+        if currency:
+            frame = frame.assign(amount_cents=TransactionCache.get_amounts(user_id, currency))
+        
+        mask = np.ones(len(frame), dtype=bool)
+        
+        if start_date:
+            mask &= (frame["date"] >= pd.Timestamp(str(start_date))).to_numpy()
+        if end_date:
+            mask &= (frame["date"] <= pd.Timestamp(str(end_date))).to_numpy()
+        if transaction_type:
+            mask &= (frame["type"] == transaction_type).to_numpy()
+        if category:
+            mask &= (frame["category"] == category).to_numpy()
+        
+        return frame[mask]
+    
+    @staticmethod
+    def get_type_totals(
+        user_id: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        currency: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> Dict[str, float]:
+        """
+        Soma os valores por tipo de transação no período.
+        
+        Args:
+            user_id: ID do usuário
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            currency: Moeda de referência (opcional, padrão: valores como armazenados)
+            category: Categoria (opcional, padrão: todas)
+        
+        Returns:
+            Dicionário com os totais de 'income' e 'expense'
+        """
+        def compute():
+            selected = TransactionCache._select(
+                user_id, start_date, end_date, currency=currency, category=category
+            )
+            totals = selected.groupby("type", observed=True)["amount_cents"].sum()
+            
+            return {
+                transaction_type: int(totals.get(transaction_type, 0)) / 100
+                for transaction_type in ("income", "expense")
+            }
+        
+        key = ("type", str(start_date), str(end_date), currency, category)
+        return dict(TransactionCache._memoize(user_id, key, start_date, end_date, compute))
+    
+    @staticmethod
+    def get_category_totals(
+        user_id: str,
+        transaction_type: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        currency: Optional[str] = None
+    ) -> Dict[str, float]:
+        """
+        Soma os valores por categoria para um tipo de transação no período.
+        
+        Args:
+            user_id: ID do usuário
+            transaction_type: Tipo de transação ('income' ou 'expense')
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            currency: Moeda de referência (opcional, padrão: valores como armazenados)
+        
+        Returns:
+            Dicionário de categoria para total
+        """
+        def compute():
+            selected = TransactionCache._select(
+                user_id, start_date, end_date, transaction_type, currency
+            )
+            totals = selected.groupby("category", observed=True)["amount_cents"].sum()
+            
+            return {category: int(cents) / 100 for category, cents in totals.items()}
+        
+        key = ("category", transaction_type, str(start_date), str(end_date), currency)
+        return dict(TransactionCache._memoize(user_id, key, start_date, end_date, compute))
+    
+    @staticmethod
+    def get_monthly_totals(
+        user_id: str,
+        start_date: Union[datetime.date, str],
+        end_date: Union[datetime.date, str],
+        currency: Optional[str] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Soma receitas e despesas por mês no período.
+        
+        Args:
+            user_id: ID do usuário
+            start_date: Data inicial
+            end_date: Data final
+            currency: Moeda de referência (opcional, padrão: valores como armazenados)
+        
+        Returns:
+            Dicionário de mês (YYYY-MM) para os totais de 'income' e 'expense'
+        """
+        def compute():
+            selected = TransactionCache._select(user_id, start_date, end_date, currency=currency)
+            dates = selected["date"].dt
+            month_keys = (dates.year * 100 + dates.month).rename("month")
+            totals = selected.groupby([month_keys, "type"], observed=True)["amount_cents"].sum()
+            
+            monthly_totals = {}
+            for (month_key, transaction_type), cents in totals.items():
+                month = f"{int(month_key) // 100:04d}-{int(month_key) % 100:02d}"
+                month_totals = monthly_totals.setdefault(month, {"income": 0, "expense": 0})
+                if transaction_type in month_totals:
+                    month_totals[transaction_type] = int(cents) / 100
+            
+            return monthly_totals
+        
+        key = ("monthly", str(start_date), str(end_date), currency)
+        monthly_totals = TransactionCache._memoize(user_id, key, start_date, end_date, compute)
+        return {month: dict(totals) for month, totals in monthly_totals.items()}
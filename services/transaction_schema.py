@@ -0,0 +1,249 @@
+import argparse
+import datetime
+import os
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Union
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    bulk_set,
+    stream_documents
+)
+
+class TransactionSchema:
+    """
+    Conversão entre as versões do documento de transação.
+    
+    - Versão 1 (legada): `amount` float e `date` string YYYY-MM-DD.
+    - Versão 2: `amount_cents` inteiro, `date` Timestamp (meia-noite UTC) e
+      `schema_version` = 2.
+    
+    Os serviços sempre trabalham com o formato decodificado, que tem `amount` (float),
+    `amount_cents` (int) e `date` (string YYYY-MM-DD), independentemente da versão
+    armazenada. Enquanto houver documentos legados (TRANSACTION_LEGACY_READS=true), as
+    consultas por data são feitas para as duas representações.
+    """
+    
+    COLLECTION_NAME = "transactions"
+    CURRENT_VERSION = 2
+    
+    # Número de documentos gravados por lote na migração
+    MIGRATION_BATCH_SIZE = 500
+    
+    # Menor Timestamp do Firestore, usado para restringir consultas aos documentos novos
+    MIN_TIMESTAMP = datetime.datetime(1, 1, 1, tzinfo=datetime.timezone.utc)
+    
+    @staticmethod
+    def is_legacy_reads_enabled() -> bool:
+        """
+        Indica se ainda podem existir documentos legados (variável
+        TRANSACTION_LEGACY_READS, desabilitar após a migração).
+        """
+        return os.getenv("TRANSACTION_LEGACY_READS", "true").lower() in ("1", "true", "yes")
+    
+    @staticmethod
+    def to_cents(amount: Union[float, int, str, Decimal]) -> int:
+        """
+        Converte um valor monetário para centavos inteiros.
+        
+        Args:
+            amount: Valor em unidades da moeda
+        
+        Returns:
+            Valor em centavos (arredondamento comercial)
+        """
+        cents = Decimal(str(amount or 0)) * 100
+        return int(cents.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    
+    @staticmethod
+    def to_timestamp(date: Union[datetime.date, datetime.datetime, str]) -> datetime.datetime:
+        """
+        Converte uma data para o Timestamp armazenado (meia-noite UTC).
+        
+        Args:
+            date: Objeto date/datetime ou string YYYY-MM-DD
+        
+        Returns:
+            datetime com fuso UTC
+        """
+        day = datetime.date.fromisoformat(TransactionSchema.to_date_str(date))
+        return datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc)
+    
+    @staticmethod
+    def to_date_str(date: Union[datetime.date, datetime.datetime, str]) -> str:
+        """
+        Converte uma data (de qualquer versão) para string YYYY-MM-DD.
+        
+        Args:
+            date: Objeto date/datetime ou string
+        
+        Returns:
+            Data como string ISO
+        """
+        if isinstance(date, datetime.datetime):
+            if date.tzinfo is not None:
+                date = date.astimezone(datetime.timezone.utc)
+            return date.date().isoformat()
+        if isinstance(date, datetime.date):
+            return date.isoformat()
+        return str(date)[:10]
+    
+    @staticmethod
+    def encode(data: Dict, partial: bool = False) -> Dict:
+        """
+        Converte dados no formato dos serviços para o documento da versão atual.
+        
+        Args:
+            data: Dados com amount (float) e date (date ou string)
+            partial: True para atualizações parciais (não marca a versão do documento)
+        
+        Returns:
+            Dados a gravar
+        """
+        document = dict(data)
+        document.pop("id", None)
+        
+        if "amount" in document:
+            document["amount_cents"] = TransactionSchema.to_cents(document.pop("amount"))
+        
+        if document.get("date") is not None:
+            document["date"] = TransactionSchema.to_timestamp(document["date"])
+        
+        if not partial:
+            document["schema_version"] = TransactionSchema.CURRENT_VERSION
+        
+        return document
+    
+    @staticmethod
+    def decode(document: Optional[Dict]) -> Optional[Dict]:
+        """
+        Converte um documento de qualquer versão para o formato dos serviços.
+        
+        Args:
+            document: Documento armazenado (ou já decodificado)
+        
+        Returns:
+            Dados com amount, amount_cents e date como string, ou None
+        """
+        if document is None:
+            return None
+        
+        transaction = dict(document)
+        
+        if transaction.get("amount_cents") is not None:
+            cents = int(transaction["amount_cents"])
+        else:
+            cents = TransactionSchema.to_cents(transaction.get("amount", 0))
+        
+        transaction["amount_cents"] = cents
+        transaction["amount"] = cents / 100
+        
+        if transaction.get("date") is not None:
+            transaction["date"] = TransactionSchema.to_date_str(transaction["date"])
+        
+        return transaction
+    
+    @staticmethod
+    def needs_migration(document: Dict) -> bool:
+        """
+        Indica se um documento ainda não está na versão atual.
+        """
+        return (
+            document.get("schema_version") != TransactionSchema.CURRENT_VERSION
+            or "amount" in document
+            or isinstance(document.get("date"), str)
+        )
+    
+    @staticmethod
+    def date_filter_sets(
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None
+    ) -> List[List[tuple]]:
+        """
+        Monta os filtros de data para cada representação armazenada.
+        
+        Range filters do Firestore só comparam valores do mesmo tipo, então durante a
+        migração uma consulta busca os Timestamps e outra as strings legadas.
+        
+        Args:
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+        
+        Returns:
+            Lista de listas de filtros (campo, operador, valor), uma por consulta
+        """
+        start = TransactionSchema.to_timestamp(start_date) if start_date else None
+        end = TransactionSchema.to_timestamp(end_date) if end_date else None
+        
+        if not TransactionSchema.is_legacy_reads_enabled():
+            return [[("date", ">=", start), ("date", "<=", end)]]
+        
+        return [
+            [
+                ("date", ">=", start or TransactionSchema.MIN_TIMESTAMP),
+                ("date", "<=", end)
+            ],
+            [
+                ("date", ">=", TransactionSchema.to_date_str(start_date) if start_date else ""),
+                ("date", "<=", TransactionSchema.to_date_str(end_date) if end_date else None)
+            ]
+        ]
+    
+    @staticmethod
+    def migrate(user_id: Optional[str] = None, dry_run: bool = False) -> int:
+        """
+        Converte as transações legadas para a versão atual em lotes.
+        
+        Args:
+            user_id: ID do usuário a migrar (opcional, padrão: todos os usuários)
+            dry_run: Apenas conta os documentos que seriam migrados
+        
+        Returns:
+            Número de documentos migrados (ou a migrar, em dry_run)
+        """
+        if user_id:
+            documents = stream_documents(TransactionSchema.COLLECTION_NAME, "user_id", "==", user_id)
+        else:
+            documents = stream_documents(TransactionSchema.COLLECTION_NAME)
+        
+        migrated = 0
+        batch = []
+        
+        def flush():
+            results = [True] * len(batch) if dry_run else bulk_set(TransactionSchema.COLLECTION_NAME, batch)
+            batch.clear()
+            return sum(1 for ok in results if ok)
+        
+        for document in documents:
+            if not TransactionSchema.needs_migration(document):
+                continue
+            
+            # Regrava o documento completo, descartando o campo legado amount
+            batch.append((document["id"], TransactionSchema.encode(TransactionSchema.decode(document))))
+            
+            if len(batch) >= TransactionSchema.MIGRATION_BATCH_SIZE:
+                migrated += flush()
+        
+        if batch:
+            migrated += flush()
+        
+        return migrated
+
+# Comando de migração: python services/transaction_schema.py [--user-id ID] [--dry-run]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra as transações para a versão atual do schema.")
+    parser.add_argument("--user-id", help="Migra apenas as transações deste usuário")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Apenas conta as transações que seriam migradas")
+    args = parser.parse_args()
+    
+    count = TransactionSchema.migrate(args.user_id, args.dry_run)
+    if args.dry_run:
+        print(f"{count} transações a migrar.")
+    else:
+        print(f"{count} transações migradas.")
@@ -1,6 +1,9 @@
 import datetime
-from typing import Dict, List, Optional, Union
+import heapq
+from typing import Dict, Iterator, List, Optional, Union
 import uuid
+
+import numpy as np
 from pathlib import Path
 import sys
 
@@ -13,8 +16,21 @@ from firebase.firebase_config import (
     update_document,
     delete_document,
     query_documents,
-    get_document
+    stream_documents,
+    query_page,
+    get_document,
+    get_documents,
+    bulk_add,
+    bulk_delete,
+    encode_cursor
 )
+from firebase.instrumentation import report_error
+from services.rollup_service import RollupService
+from services.transaction_cache import TransactionCache
+from services.sync_service import SyncService
+from services.transaction_schema import TransactionSchema
+from services.duplicate_service import DuplicateService, DuplicateTransactionError
+from utils.currency_utils import CurrencyConverter
 
 class TransactionService:
     """
@@ -23,6 +39,9 @@ class TransactionService:
     
     COLLECTION_NAME = "transactions"
     
+    # Marca de consulta concluída nos cursores de páginas combinadas
+    EXHAUSTED_CURSOR = "~"
+    
     @staticmethod
     def add_transaction(
         description: str,
@@ -32,7 +51,9 @@ class TransactionService:
         date: Union[datetime.date, str],
         user_id: str,
         notes: Optional[str] = None,
-        payment_method: Optional[str] = None
+        payment_method: Optional[str] = None,
+        currency: Optional[str] = None,
+        allow_duplicate: bool = False
     ) -> Optional[str]:
         """
         Adiciona uma nova transação ao banco de dados.
@@ -46,32 +67,124 @@ class TransactionService:
             user_id: ID do usuário proprietário da transação
             notes: Observações adicionais (opcional)
             payment_method: Método de pagamento (opcional)
-            
+            currency: Código da moeda da transação (opcional, padrão: BRL)
+            allow_duplicate: Se False, não grava a transação se já existir outra com a
+                mesma data, valor e descrição e levanta DuplicateTransactionError
+        
         Returns:
             ID da transação adicionada ou None se houver erro
         """
-        # Converte a data para string ISO se for um objeto date
-        if isinstance(date, datetime.date):
-            date_str = date.isoformat()
-        else:
-            date_str = str(date)
-            
         # Prepara os dados da transação
-        transaction_data = {
+        transaction_data = TransactionService._build_transaction_data(
+            description=description,
+            transaction_type=transaction_type,
+            category=category,
+            amount=amount,
+            date=date,
+            user_id=user_id,
+            notes=notes,
+            payment_method=payment_method,
+            currency=currency
+        )
+        
+        # Consulta o índice de impressões digitais antes de gravar
+        if not allow_duplicate:
+            existing = DuplicateService.find_existing(user_id, [transaction_data["fingerprint"]])
+            if existing:
+                raise DuplicateTransactionError(existing[transaction_data["fingerprint"]])
+        
+        # Adiciona a transação ao Firestore no formato da versão atual do schema
+        transaction_id = add_document(
+            TransactionService.COLLECTION_NAME,
+            TransactionSchema.encode(transaction_data)
+        )
+        
+        # Atualiza os totais mensais pré-agregados
+        if transaction_id:
+            RollupService.apply_transaction(transaction_data)
+            TransactionCache.upsert([{**transaction_data, "id": transaction_id}])
+        
+        return transaction_id
+    
+    @staticmethod
+    def add_transactions(transactions: List[Dict]) -> List[Optional[str]]:
+        """
+        Adiciona várias transações usando gravações em lote.
+        
+        Args:
+            transactions: Lista de dicionários com os mesmos argumentos de add_transaction
+                (description, transaction_type, category, amount, date, user_id,
+                notes, payment_method e currency)
+        
+        Returns:
+            Lista de IDs na ordem de entrada (None para transações não gravadas)
+        """
+        transactions_data = [
+            TransactionService._build_transaction_data(**transaction)
+            for transaction in transactions
+        ]
+        
+        transaction_ids = bulk_add(
+            TransactionService.COLLECTION_NAME,
+            [TransactionSchema.encode(data) for data in transactions_data]
+        )
+        
+        added = [
+            {**data, "id": transaction_id}
+            for data, transaction_id in zip(transactions_data, transaction_ids)
+            if transaction_id
+        ]
+        
+        # Atualiza os rollups com um incremento por mês, apenas para as gravadas
+        RollupService.apply_transactions(added)
+        TransactionCache.upsert(added)
+        
+        return transaction_ids
+    
+    @staticmethod
+    def _build_transaction_data(
+        description: str,
+        transaction_type: str,
+        category: str,
+        amount: float,
+        date: Union[datetime.date, str],
+        user_id: str,
+        notes: Optional[str] = None,
+        payment_method: Optional[str] = None,
+        currency: Optional[str] = None
+    ) -> Dict:
+        """
+        Monta os dados de uma nova transação no formato dos serviços.
+        
+        Args:
+            description: Descrição da transação
+            transaction_type: Tipo de transação ('income' ou 'expense')
+            category: Categoria da transação
+            amount: Valor da transação
+            date: Data da transação (objeto date ou string YYYY-MM-DD)
+            user_id: ID do usuário proprietário da transação
+            notes: Observações adicionais (opcional)
+            payment_method: Método de pagamento (opcional)
+            currency: Código da moeda da transação (opcional, padrão: BRL)
+        
+        Returns:
+            Dicionário com os dados da transação
+        """
+        return {
             "description": description,
             "type": transaction_type,
             "category": category,
             "amount": amount,
-            "date": date_str,
+            "date": TransactionService._to_date_str(date),
+            "amount_cents": TransactionSchema.to_cents(amount),
             "user_id": user_id,
             "notes": notes or "",
             "payment_method": payment_method or "",
+            "currency": currency or CurrencyConverter.BASE_CURRENCY,
+            "fingerprint": DuplicateService.fingerprint(user_id, date, amount, description),
             "created_at": datetime.datetime.now().isoformat(),
             "updated_at": datetime.datetime.now().isoformat()
         }
-        
-        # Adiciona a transação ao Firestore
-        return add_document(TransactionService.COLLECTION_NAME, transaction_data)
     
     @staticmethod
     def get_transaction(transaction_id: str) -> Optional[Dict]:
@@ -84,7 +197,9 @@ class TransactionService:
         Returns:
             Dados da transação ou None se não encontrada
         """
-        return get_document(TransactionService.COLLECTION_NAME, transaction_id)
+        return TransactionSchema.decode(
+            get_document(TransactionService.COLLECTION_NAME, transaction_id)
+        )
     
     @staticmethod
     def update_transaction(
@@ -95,7 +210,8 @@ class TransactionService:
         amount: Optional[float] = None,
         date: Optional[Union[datetime.date, str]] = None,
         notes: Optional[str] = None,
-        payment_method: Optional[str] = None
+        payment_method: Optional[str] = None,
+        currency: Optional[str] = None
     ) -> bool:
         """
         Atualiza uma transação existente.
@@ -109,7 +225,8 @@ class TransactionService:
             date: Nova data (opcional)
             notes: Novas observações (opcional)
             payment_method: Novo método de pagamento (opcional)
-            
+            currency: Nova moeda (opcional)
+        
         Returns:
             True se a atualização for bem-sucedida, False caso contrário
         """
@@ -127,7 +244,8 @@ class TransactionService:
             
         if amount is not None:
             update_data["amount"] = amount
-            
+            update_data["amount_cents"] = TransactionSchema.to_cents(amount)
+        
         if date is not None:
             # Converte a data para string ISO se for um objeto date
             if isinstance(date, datetime.date):
@@ -140,12 +258,44 @@ class TransactionService:
             
         if payment_method is not None:
             update_data["payment_method"] = payment_method
-            
+        
+        if currency is not None:
+            update_data["currency"] = currency
+        
         # Adiciona timestamp de atualização
         update_data["updated_at"] = datetime.datetime.now().isoformat()
         
-        # Atualiza a transação no Firestore
-        return update_document(TransactionService.COLLECTION_NAME, transaction_id, update_data)
+        # Dados anteriores são necessários apenas se a alteração afetar os rollups, o cache
+        # ou a impressão digital
+        old_transaction = None
+        if {"type", "category", "amount", "date", "currency", "description"} & update_data.keys():
+            old_transaction = TransactionSchema.decode(
+                get_document(TransactionService.COLLECTION_NAME, transaction_id)
+            )
+        
+        # Recalcula a impressão digital usada na detecção de duplicatas
+        if old_transaction and {"amount", "date", "description"} & update_data.keys():
+            new_transaction = {**old_transaction, **update_data}
+            update_data["fingerprint"] = DuplicateService.fingerprint(
+                new_transaction.get("user_id"),
+                new_transaction["date"],
+                new_transaction["amount"],
+                new_transaction.get("description")
+            )
+        
+        # Atualiza a transação no Firestore no formato da versão atual do schema
+        success = update_document(
+            TransactionService.COLLECTION_NAME,
+            transaction_id,
+            TransactionSchema.encode(update_data, partial=True)
+        )
+        
+        # Move a contribuição da transação nos totais mensais pré-agregados
+        if success and old_transaction:
+            RollupService.replace_transaction(old_transaction, {**old_transaction, **update_data})
+            TransactionCache.upsert([{**old_transaction, **update_data, "id": transaction_id}])
+        
+        return success
     
     @staticmethod
     def delete_transaction(transaction_id: str) -> bool:
@@ -158,7 +308,22 @@ class TransactionService:
         Returns:
             True se a exclusão for bem-sucedida, False caso contrário
         """
-        return delete_document(TransactionService.COLLECTION_NAME, transaction_id)
+        # Obtém os dados atuais para remover a transação dos rollups
+        old_transaction = TransactionSchema.decode(
+            get_document(TransactionService.COLLECTION_NAME, transaction_id)
+        )
+        
+        success = delete_document(TransactionService.COLLECTION_NAME, transaction_id)
+        
+        if success and old_transaction:
+            RollupService.apply_transaction(old_transaction, sign=-1)
+            TransactionCache.remove([{**old_transaction, "id": transaction_id}])
+            SyncService.record_deletions(
+                TransactionService.COLLECTION_NAME,
+                [{**old_transaction, "id": transaction_id}]
+            )
+        
+        return success
     
     @staticmethod
     def list_transactions(
@@ -183,71 +348,331 @@ class TransactionService:
         Returns:
             Lista de transações que correspondem aos critérios de filtro
         """
-        # Consulta base para obter todas as transações do usuário
-        transactions = query_documents(
-            TransactionService.COLLECTION_NAME, 
-            field="user_id", 
-            operator="==", 
-            value=user_id
+        # Ordenação por data (mais recentes primeiro) e limite também no servidor.
+        # Os índices compostos necessários estão em firestore.indexes.json.
+        results = [
+            map(TransactionSchema.decode, query_documents(
+                TransactionService.COLLECTION_NAME,
+                filters=filters,
+                order_by="date",
+                descending=True,
+                limit=limit
+            ))
+            for filters in TransactionService._build_filter_sets(
+                user_id, start_date, end_date, transaction_type, category
+            )
+        ]
+        
+        # Combina as consultas de cada versão do schema mantendo a ordem por data
+        transactions = list(heapq.merge(*results, key=TransactionService._sort_key, reverse=True))
+        return transactions[:limit] if limit else transactions
+    
+    @staticmethod
+    def delete_transactions(transaction_ids: List[str]) -> List[bool]:
+        """
+        Exclui várias transações usando gravações em lote.
+        
+        Args:
+            transaction_ids: IDs das transações a serem excluídas
+        
+        Returns:
+            Lista de bool na ordem de entrada indicando o sucesso de cada exclusão
+        """
+        # IDs repetidos descontariam a mesma transação dos rollups mais de uma vez
+        unique_ids = list(dict.fromkeys(transaction_ids))
+        
+        # Obtém os dados atuais em uma única leitura para ajustar os rollups
+        old_transactions = get_documents(TransactionService.COLLECTION_NAME, unique_ids)
+        
+        results = bulk_delete(TransactionService.COLLECTION_NAME, unique_ids)
+        
+        deleted = [
+            {**TransactionSchema.decode(old_transactions[transaction_id]), "id": transaction_id}
+            for transaction_id, ok in zip(unique_ids, results)
+            if ok and transaction_id in old_transactions
+        ]
+        
+        RollupService.apply_transactions(deleted, sign=-1)
+        TransactionCache.remove(deleted)
+        SyncService.record_deletions(TransactionService.COLLECTION_NAME, deleted)
+        
+        results_by_id = dict(zip(unique_ids, results))
+        return [results_by_id[transaction_id] for transaction_id in transaction_ids]
+    
+    @staticmethod
+    def iter_transactions(
+        user_id: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        transaction_type: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Percorre as transações sob demanda, com memória constante.
+        
+        Usado em exportações e agregações que não precisam da lista completa.
+        
+        Args:
+            user_id: ID do usuário proprietário das transações
+            start_date: Data inicial para filtragem (opcional)
+            end_date: Data final para filtragem (opcional)
+            transaction_type: Tipo de transação para filtrar (opcional)
+            category: Categoria para filtrar (opcional)
+        
+        Returns:
+            Iterador de transações ordenadas por data (mais recentes primeiro)
+        """
+        streams = [
+            map(TransactionSchema.decode, stream_documents(
+                TransactionService.COLLECTION_NAME,
+                filters=filters,
+                order_by="date",
+                descending=True
+            ))
+            for filters in TransactionService._build_filter_sets(
+                user_id, start_date, end_date, transaction_type, category
+            )
+        ]
+        
+        return heapq.merge(*streams, key=TransactionService._sort_key, reverse=True)
+    
+    @staticmethod
+    def list_transactions_page(
+        user_id: str,
+        filters: Optional[Dict] = None,
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Lista uma página de transações usando cursores do Firestore.
+        
+        Args:
+            user_id: ID do usuário proprietário das transações
+            filters: Filtros opcionais com as chaves start_date, end_date,
+                transaction_type e category
+            page_size: Número de transações por página (padrão: 20)
+            cursor: Token da página retornado pela chamada anterior (opcional)
+        
+        Returns:
+            Dicionário com a lista 'transactions' da página e o 'next_cursor'
+            (None quando não há mais páginas)
+        """
+        filters = filters or {}
+        
+        filter_sets = TransactionService._build_filter_sets(
+            user_id,
+            filters.get("start_date"),
+            filters.get("end_date"),
+            filters.get("transaction_type"),
+            filters.get("category")
         )
         
-        # Aplicar filtros adicionais na lista de resultados
-        filtered_transactions = transactions
+        if len(filter_sets) > 1:
+            return TransactionService._merge_pages(filter_sets, page_size, cursor)
         
-        # Filtro por tipo de transação
-        if transaction_type:
-            filtered_transactions = [
-                t for t in filtered_transactions 
-                if t.get("type") == transaction_type
-            ]
-            
-        # Filtro por categoria
-        if category:
-            filtered_transactions = [
-                t for t in filtered_transactions 
-                if t.get("category") == category
-            ]
+        page = query_page(
+            TransactionService.COLLECTION_NAME,
+            filters=filter_sets[0],
+            order_by="date",
+            descending=True,
+            page_size=page_size,
+            cursor=cursor
+        )
+        
+        return {
+            "transactions": [TransactionSchema.decode(t) for t in page["documents"]],
+            "next_cursor": page["next_cursor"]
+        }
+    
+    @staticmethod
+    def _merge_pages(
+        filter_sets: List[List[tuple]],
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """
+        Pagina várias consultas ao mesmo tempo, combinando-as por data.
+        
+        O cursor combinado guarda, separados por ponto, o cursor de cada consulta
+        (vazio no início e EXHAUSTED_CURSOR quando a consulta terminou).
+        
+        Args:
+            filter_sets: Filtros de cada consulta
+            page_size: Número de transações por página
+            cursor: Cursor combinado da página anterior (opcional)
+        
+        Returns:
+            Dicionário com a lista 'transactions' da página e o 'next_cursor'
+        """
+        cursors = cursor.split(".") if cursor else [""] * len(filter_sets)
+        if len(cursors) != len(filter_sets):
+            report_error("Cursor de paginação inválido")
+            return {"transactions": [], "next_cursor": None}
+        
+        candidates = []
+        has_more = []
+        
+        for index, filters in enumerate(filter_sets):
+            if cursors[index] == TransactionService.EXHAUSTED_CURSOR:
+                has_more.append(False)
+                continue
             
-        # Filtro por data inicial
-        if start_date:
-            # Converte para string se for objeto date
-            if isinstance(start_date, datetime.date):
-                start_date_str = start_date.isoformat()
-            else:
-                start_date_str = str(start_date)
-                
-            filtered_transactions = [
-                t for t in filtered_transactions 
-                if t.get("date") >= start_date_str
-            ]
+            page = query_page(
+                TransactionService.COLLECTION_NAME,
+                filters=filters,
+                order_by="date",
+                descending=True,
+                page_size=page_size,
+                cursor=cursors[index] or None
+            )
+            candidates.extend((index, TransactionSchema.decode(t)) for t in page["documents"])
+            has_more.append(page["next_cursor"] is not None)
+        
+        candidates.sort(key=lambda item: TransactionService._sort_key(item[1]), reverse=True)
+        selected = candidates[:page_size]
+        
+        # Avança o cursor de cada consulta até o último documento usado na página
+        next_cursors = []
+        for index in range(len(filter_sets)):
+            fetched = [t for i, t in candidates if i == index]
+            used = [t for i, t in selected if i == index]
             
-        # Filtro por data final
-        if end_date:
-            # Converte para string se for objeto date
-            if isinstance(end_date, datetime.date):
-                end_date_str = end_date.isoformat()
+            if cursors[index] == TransactionService.EXHAUSTED_CURSOR:
+                next_cursors.append(TransactionService.EXHAUSTED_CURSOR)
+            elif len(used) == len(fetched) and not has_more[index]:
+                next_cursors.append(TransactionService.EXHAUSTED_CURSOR)
+            elif used:
+                next_cursors.append(encode_cursor(used[-1]["id"]))
             else:
-                end_date_str = str(end_date)
-                
-            filtered_transactions = [
-                t for t in filtered_transactions 
-                if t.get("date") <= end_date_str
-            ]
+                next_cursors.append(cursors[index])
+        
+        next_cursor = None
+        if any(c != TransactionService.EXHAUSTED_CURSOR for c in next_cursors):
+            next_cursor = ".".join(next_cursors)
+        
+        return {
+            "transactions": [t for _, t in selected],
+            "next_cursor": next_cursor
+        }
+    
+    @staticmethod
+    def _sort_key(transaction: Dict) -> tuple:
+        """
+        Chave da ordenação usada nas consultas: data e, em caso de empate, ID.
+        """
+        return (transaction.get("date") or "", transaction.get("id", ""))
+    
+    @staticmethod
+    def _build_filter_sets(
+        user_id: str,
+        start_date: Optional[Union[datetime.date, str]] = None,
+        end_date: Optional[Union[datetime.date, str]] = None,
+        transaction_type: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """
+        Monta os filtros de consulta de transações aplicados no servidor.
+        
+        Args:
+            user_id: ID do usuário proprietário das transações
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            transaction_type: Tipo de transação (opcional)
+            category: Categoria (opcional)
+        
+        Returns:
+            Lista de listas de tuplas (campo, operador, valor), uma por consulta
+            (duas enquanto houver transações no schema legado)
+        """
+        # Filtros de igualdade
+        filters = [
+            ("user_id", "==", user_id),
+            ("type", "==", transaction_type or None),
+            ("category", "==", category or None)
+        ]
+        
+        # Filtro por intervalo de datas (Timestamps e, durante a migração, strings ISO)
+        return [
+            filters + date_filters
+            for date_filters in TransactionSchema.date_filter_sets(start_date, end_date)
+        ]
+    
+    @staticmethod
+    def _to_date_str(date: Union[datetime.date, str]) -> str:
+        """
+        Converte uma data para string no formato ISO (YYYY-MM-DD).
+        
+        Args:
+            date: Objeto date ou string
+        
+        Returns:
+            Data como string ISO
+        """
+        if isinstance(date, datetime.date):
+            return date.isoformat()
+        return str(date)
+    
+    @staticmethod
+    def _get_rollup_range(
+        start_date: Optional[Union[datetime.date, str]],
+        end_date: Optional[Union[datetime.date, str]]
+    ) -> Optional[Dict]:
+        """
+        Retorna o intervalo de meses a ser lido dos rollups, se aplicável.
+        
+        Args:
+            start_date: Data inicial do período (opcional)
+            end_date: Data final do período (opcional)
+        
+        Returns:
+            Dicionário com start_month e end_month ou None se o período não puder
+            ser atendido pelos rollups
+        """
+        if not RollupService.is_enabled():
+            return None
+        
+        try:
+            return RollupService.get_month_range(start_date, end_date)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _with_amounts(
+        transactions: Iterator[Dict],
+        currency: Optional[str] = None
+    ) -> Iterator[tuple]:
+        """
+        Associa cada transação ao seu valor em centavos, convertido para a moeda
+        informada em uma única operação vetorizada.
+        
+        Args:
+            transactions: Transações decodificadas
+            currency: Moeda de referência (opcional, padrão: valores como armazenados)
         
-        # Ordenar transações por data (mais recentes primeiro)
-        filtered_transactions.sort(key=lambda x: x.get("date", ""), reverse=True)
+        Returns:
+            Iterador de tuplas (transação, centavos). Levanta CurrencyConversionError se
+            não houver cotação, em vez de somar moedas diferentes
+        """
+        if not currency:
+            return ((t, t["amount_cents"]) for t in transactions)
         
-        # Aplicar limite se especificado
-        if limit and limit > 0:
-            filtered_transactions = filtered_transactions[:limit]
+        transactions = list(transactions)
+        converted = CurrencyConverter.convert(
+            [t["amount_cents"] for t in transactions],
+            [t.get("date") for t in transactions],
+            [t.get("currency") or CurrencyConverter.BASE_CURRENCY for t in transactions],
+            currency
+        )
         
-        return filtered_transactions
+        return zip(transactions, np.rint(converted).astype("int64").tolist())
     
     @staticmethod
     def get_summary(
         user_id: str,
         start_date: Optional[Union[datetime.date, str]] = None,
-        end_date: Optional[Union[datetime.date, str]] = None
+        end_date: Optional[Union[datetime.date, str]] = None,
+        currency: Optional[str] = None,
+        category: Optional[str] = None
     ) -> Dict:
         """
         Calcula resumo financeiro (receitas, despesas, saldo) para um período.
@@ -256,30 +681,65 @@ class TransactionService:
             user_id: ID do usuário
             start_date: Data inicial para cálculo (opcional)
             end_date: Data final para cálculo (opcional)
-            
+            currency: Moeda de referência para converter os valores (opcional,
+                padrão: valores somados como armazenados). Sem cotação para alguma
+                das moedas, levanta CurrencyConversionError
+            category: Considera apenas as transações desta categoria (opcional)
+        
         Returns:
             Dicionário com os totais de receitas, despesas e saldo
         """
-        # Obter transações no período
-        transactions = TransactionService.list_transactions(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date
-        )
+        # Somas vetorizadas sobre o cache colunar do usuário
+        if TransactionCache.is_enabled():
+            totals = TransactionCache.get_type_totals(
+                user_id, start_date, end_date, currency, category
+            )
+            return TransactionService._build_summary(totals["income"], totals["expense"])
         
-        # Calcular totais
-        total_income = sum(
-            t.get("amount", 0) 
-            for t in transactions 
-            if t.get("type") == "income"
-        )
+        # Períodos de meses completos são lidos dos rollups mensais (sem conversão)
+        month_range = None if currency else TransactionService._get_rollup_range(start_date, end_date)
+        if month_range:
+            rollups = RollupService.list_rollups(user_id, **month_range)
+            if category:
+                rollups = [r.get("categories", {}).get(category, {}) for r in rollups]
+            return TransactionService._build_summary(
+                sum(r.get("income_cents", 0) for r in rollups) / 100,
+                sum(r.get("expense_cents", 0) for r in rollups) / 100
+            )
         
-        total_expenses = sum(
-            t.get("amount", 0) 
-            for t in transactions 
-            if t.get("type") == "expense"
-        )
+        # Calcular totais percorrendo as transações do período em uma única passada
+        total_income = 0
+        total_expenses = 0
         
+        for t, cents in TransactionService._with_amounts(
+            TransactionService.iter_transactions(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                category=category
+            ),
+            currency
+        ):
+            if t.get("type") == "income":
+                total_income += cents
+            elif t.get("type") == "expense":
+                total_expenses += cents
+        
+        # Soma exata em centavos
+        return TransactionService._build_summary(total_income / 100, total_expenses / 100)
+    
+    @staticmethod
+    def _build_summary(total_income: float, total_expenses: float) -> Dict:
+        """
+        Monta o dicionário de resumo a partir dos totais de receitas e despesas.
+        
+        Args:
+            total_income: Total de receitas
+            total_expenses: Total de despesas
+        
+        Returns:
+            Dicionário com os totais de receitas, despesas, saldo e economia
+        """
         balance = total_income - total_expenses
         
         # Calcular economia (% da receita que não foi gasta)
@@ -301,7 +761,8 @@ class TransactionService:
         user_id: str,
         transaction_type: str,
         start_date: Optional[Union[datetime.date, str]] = None,
-        end_date: Optional[Union[datetime.date, str]] = None
+        end_date: Optional[Union[datetime.date, str]] = None,
+        currency: Optional[str] = None
     ) -> List[Dict]:
         """
         Calcula o total por categoria para um determinado tipo de transação.
@@ -311,30 +772,48 @@ class TransactionService:
             transaction_type: Tipo de transação ('income' ou 'expense')
             start_date: Data inicial para cálculo (opcional)
             end_date: Data final para cálculo (opcional)
-            
+            currency: Moeda de referência para converter os valores (opcional)
+        
         Returns:
             Lista de dicionários com categoria e total
         """
-        # Obter transações do tipo especificado no período
-        transactions = TransactionService.list_transactions(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date,
-            transaction_type=transaction_type
-        )
-        
-        # Dicionário para armazenar o total por categoria
+        # Dicionários para armazenar o total por categoria (em centavos, quando exato)
         category_totals = {}
+        category_cents = {}
         
-        # Calcular o total para cada categoria
-        for transaction in transactions:
+        # Períodos de meses completos são lidos dos rollups mensais (sem conversão)
+        month_range = None if currency else TransactionService._get_rollup_range(start_date, end_date)
+        if TransactionCache.is_enabled():
+            # Agrupamento vetorizado sobre o cache colunar do usuário
+            transactions = []
+            category_totals = TransactionCache.get_category_totals(
+                user_id, transaction_type, start_date, end_date, currency
+            )
+        elif month_range:
+            transactions = []
+            field = f"{transaction_type}_cents"
+            for rollup in RollupService.list_rollups(user_id, **month_range):
+                for category, totals in rollup.get("categories", {}).items():
+                    # Totais em centavos são exatos: categorias zeradas por exclusões
+                    # ficam com 0 e são descartadas
+                    if totals.get(field):
+                        category_cents[category] = category_cents.get(category, 0) + totals[field]
+        else:
+            # Percorrer as transações do tipo especificado no período
+            transactions = TransactionService.iter_transactions(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                transaction_type=transaction_type
+            )
+        
+        # Calcular o total para cada categoria (soma exata em centavos)
+        for transaction, cents in TransactionService._with_amounts(transactions, currency):
             category = transaction.get("category", "Outros")
-            amount = transaction.get("amount", 0)
-            
-            if category in category_totals:
-                category_totals[category] += amount
-            else:
-                category_totals[category] = amount
+            category_cents[category] = category_cents.get(category, 0) + cents
+        
+        for category, cents in category_cents.items():
+            category_totals[category] = cents / 100
         
         # Converter para lista de dicionários
         result = [
@@ -350,7 +829,8 @@ class TransactionService:
     @staticmethod
     def get_monthly_summary(
         user_id: str,
-        months: int = 6
+        months: int = 6,
+        currency: Optional[str] = None
     ) -> List[Dict]:
         """
         Calcula o resumo financeiro mensal para os últimos meses.
@@ -358,19 +838,17 @@ class TransactionService:
         Args:
             user_id: ID do usuário
             months: Número de meses para calcular (padrão: 6)
-            
+            currency: Moeda de referência para converter os valores (opcional)
+        
         Returns:
             Lista de dicionários com resumo mensal
         """
         # Data atual
         today = datetime.date.today()
         
-        # Lista para armazenar os resumos mensais
-        monthly_summaries = []
-        
-        # Calcular para cada mês
+        # Primeiro dia de cada mês da janela (do mais recente para o mais antigo)
+        month_starts = []
         for i in range(months):
-            # Calcular o primeiro dia do mês
             month = today.month - i
             year = today.year
             
@@ -378,23 +856,72 @@ class TransactionService:
             while month <= 0:
                 month += 12
                 year -= 1
-                
-            # Primeiro e último dia do mês
-            first_day = datetime.date(year, month, 1)
-            
-            # Calcular o último dia do mês
-            if month == 12:
-                last_day = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
-            else:
-                last_day = datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
             
-            # Obter resumo para o mês
-            summary = TransactionService.get_summary(
+            month_starts.append(datetime.date(year, month, 1))
+        
+        if not month_starts:
+            return []
+        
+        # Último dia do mês atual
+        if today.month == 12:
+            last_day = datetime.date(today.year + 1, 1, 1) - datetime.timedelta(days=1)
+        else:
+            last_day = datetime.date(today.year, today.month + 1, 1) - datetime.timedelta(days=1)
+        
+        totals = {
+            first_day.strftime("%Y-%m"): {"income": 0, "expense": 0}
+            for first_day in month_starts
+        }
+        
+        if TransactionCache.is_enabled():
+            # Agrupamento vetorizado por mês e tipo sobre o cache colunar do usuário
+            for month, month_totals in TransactionCache.get_monthly_totals(
+                user_id, month_starts[-1], last_day, currency
+            ).items():
+                if month in totals:
+                    totals[month] = month_totals
+        elif RollupService.is_enabled() and not currency:
+            # Um documento de rollup por mês da janela
+            for rollup in RollupService.list_rollups(
+                user_id,
+                start_month=month_starts[-1].strftime("%Y-%m"),
+                end_month=month_starts[0].strftime("%Y-%m")
+            ):
+                month_totals = totals.get(rollup.get("month"))
+                if month_totals is not None:
+                    month_totals["income"] = RollupService.get_amount(rollup, "income")
+                    month_totals["expense"] = RollupService.get_amount(rollup, "expense")
+        else:
+            # Uma única consulta cobrindo toda a janela
+            transactions = TransactionService.iter_transactions(
                 user_id=user_id,
-                start_date=first_day,
+                start_date=month_starts[-1],
                 end_date=last_day
             )
             
+            # Acumular receitas e despesas por mês (prefixo YYYY-MM da data) em uma única
+            # passada, somando centavos
+            for transaction, cents in TransactionService._with_amounts(transactions, currency):
+                month_totals = totals.get(str(transaction.get("date", ""))[:7])
+                transaction_type = transaction.get("type")
+                
+                if month_totals is not None and transaction_type in month_totals:
+                    month_totals[transaction_type] += cents
+            
+            for month_totals in totals.values():
+                month_totals["income"] /= 100
+                month_totals["expense"] /= 100
+        
+        # Lista para armazenar os resumos mensais
+        monthly_summaries = []
+        
+        for first_day in month_starts:
+            month_totals = totals[first_day.strftime("%Y-%m")]
+            summary = TransactionService._build_summary(
+                month_totals["income"],
+                month_totals["expense"]
+            )
+            
             # Adicionar informações do mês ao resumo
             month_name = first_day.strftime("%B")  # Nome do mês
             month_year = first_day.strftime("%m/%Y")  # Mês/Ano
@@ -413,4 +940,4 @@ class TransactionService:
         # Ordenar por data (mais antigo para mais recente)
         monthly_summaries.reverse()
         
-        return monthly_summaries 
\ No newline at end of file
+        return monthly_summaries 
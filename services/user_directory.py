@@ -0,0 +1,287 @@
+import argparse
+import datetime
+import atexit
+import hashlib
+import threading
+from typing import Dict, Optional
+from pathlib import Path
+import sys
+
+# Adiciona o diretório raiz ao path para importar o firebase_config
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from firebase.firebase_config import (
+    bulk_set,
+    bulk_update,
+    create_document,
+    delete_document,
+    get_document,
+    query_documents,
+    set_document,
+    stream_documents,
+    update_document
+)
+
+class UserDirectory:
+    """
+    Índice de emails dos usuários e registro do último login.
+    
+    Cada usuário tem um documento na coleção `user_emails`, com ID derivado do email
+    normalizado, que aponta para o ID do usuário; buscar um usuário pelo email são
+    duas leituras por chave, sem consulta na coleção de usuários. Até o
+    preenchimento do índice (backfill) ser concluído, emails não indexados também
+    são buscados na coleção de usuários. As datas de último login são acumuladas em
+    memória (a mais recente por usuário) e gravadas em lote a cada
+    FLUSH_INTERVAL_SECONDS, fora do caminho do login.
+    """
+    
+    USERS_COLLECTION = "users"
+    EMAIL_INDEX_COLLECTION = "user_emails"
+    
+    # Intervalo entre as gravações em lote das datas de último login
+    FLUSH_INTERVAL_SECONDS = 5
+    
+    # Número de documentos gravados por lote no preenchimento do índice
+    BACKFILL_BATCH_SIZE = 500
+    
+    # Documento do índice gravado ao concluir o preenchimento (não é um hash de email)
+    BACKFILL_MARKER_ID = "_backfill"
+    _backfilled = False
+    
+    # Últimos logins pendentes: user_id -> data ISO
+    _pending_logins: Dict[str, str] = {}
+    _flush_timer: Optional[threading.Timer] = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        """
+        Normaliza um email para comparação (sem espaços, em minúsculas).
+        """
+        return (email or "").strip().lower()
+    
+    @staticmethod
+    def _index_id(email: str) -> str:
+        # Hash do email: IDs de documento não podem conter "/"
+        return hashlib.sha256(UserDirectory.normalize_email(email).encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def find_user_by_email(email: str) -> Optional[Dict]:
+        """
+        Busca um usuário pelo email usando o índice de emails.
+        
+        Enquanto o preenchimento do índice não for concluído, usuários ainda não
+        indexados (criados antes do índice) são buscados por consulta, com o email
+        normalizado e como digitado, e indexados em seguida. Emails gravados com
+        outra combinação de maiúsculas só são encontrados após o preenchimento.
+        
+        Args:
+            email: Email do usuário
+        
+        Returns:
+            Documento do usuário com o campo id ou None se não encontrado
+        """
+        entry = get_document(UserDirectory.EMAIL_INDEX_COLLECTION, UserDirectory._index_id(email))
+        
+        if entry:
+            user = get_document(UserDirectory.USERS_COLLECTION, entry["user_id"])
+            if user:
+                user["id"] = entry["user_id"]
+                return user
+            
+            # Entrada de um usuário excluído
+            UserDirectory.unregister_email(email)
+            return None
+        
+        if UserDirectory.is_backfilled():
+            return None
+        
+        users = query_documents(
+            UserDirectory.USERS_COLLECTION,
+            filters=[(
+                "email",
+                "in",
+                list(dict.fromkeys([UserDirectory.normalize_email(email), (email or "").strip()]))
+            )]
+        )
+        
+        if not users:
+            return None
+        
+        UserDirectory.register_email(email, users[0]["id"])
+        return users[0]
+    
+    @staticmethod
+    def is_backfilled() -> bool:
+        """
+        Indica se o preenchimento do índice de emails foi concluído (todos os
+        usuários estão indexados).
+        """
+        if not UserDirectory._backfilled:
+            UserDirectory._backfilled = get_document(
+                UserDirectory.EMAIL_INDEX_COLLECTION,
+                UserDirectory.BACKFILL_MARKER_ID
+            ) is not None
+        return UserDirectory._backfilled
+    
+    @staticmethod
+    def register_email(email: str, user_id: str) -> bool:
+        """
+        Associa um email ao ID do usuário no índice, apenas se o email ainda não
+        estiver associado a outro usuário. A entrada é criada de forma atômica, então
+        entre dois cadastros simultâneos com o mesmo email apenas um é aceito.
+        
+        Args:
+            email: Email do usuário
+            user_id: ID do usuário
+        
+        Returns:
+            True se o email foi associado ao usuário, False se já pertence a outro
+            usuário ou houver erro
+        """
+        if create_document(
+            UserDirectory.EMAIL_INDEX_COLLECTION,
+            UserDirectory._index_id(email),
+            {"email": UserDirectory.normalize_email(email), "user_id": user_id}
+        ):
+            return True
+        
+        entry = get_document(UserDirectory.EMAIL_INDEX_COLLECTION, UserDirectory._index_id(email))
+        return bool(entry) and entry.get("user_id") == user_id
+    
+    @staticmethod
+    def unregister_email(email: str) -> bool:
+        """
+        Remove um email do índice.
+        
+        Args:
+            email: Email do usuário
+        
+        Returns:
+            True se a exclusão for bem-sucedida, False caso contrário
+        """
+        return delete_document(UserDirectory.EMAIL_INDEX_COLLECTION, UserDirectory._index_id(email))
+    
+    @staticmethod
+    def record_login(user_id: str) -> None:
+        """
+        Registra o login de um usuário. A data é gravada na próxima gravação em lote
+        (logins repetidos no intervalo resultam em uma única gravação).
+        
+        Args:
+            user_id: ID do usuário
+        """
+        with UserDirectory._lock:
+            UserDirectory._pending_logins[user_id] = datetime.datetime.now().isoformat()
+            
+            if UserDirectory._flush_timer is None:
+                UserDirectory._flush_timer = threading.Timer(
+                    UserDirectory.FLUSH_INTERVAL_SECONDS,
+                    UserDirectory.flush_logins
+                )
+                UserDirectory._flush_timer.daemon = True
+                UserDirectory._flush_timer.start()
+    
+    @staticmethod
+    def discard_login(user_id: str) -> None:
+        """
+        Descarta o login pendente de um usuário (ex: usuário excluído).
+        
+        Args:
+            user_id: ID do usuário
+        """
+        with UserDirectory._lock:
+            UserDirectory._pending_logins.pop(user_id, None)
+    
+    @staticmethod
+    def flush_logins() -> int:
+        """
+        Grava em lote as datas de último login pendentes.
+        
+        Um lote é atômico e a atualização falha se o documento não existir (ex:
+        usuário excluído), então as entradas de um lote com falha são gravadas
+        novamente uma a uma, para que apenas os documentos ausentes fiquem sem
+        atualização. A gravação não usa merge para não recriar usuários excluídos.
+        
+        Returns:
+            Número de usuários atualizados
+        """
+        with UserDirectory._lock:
+            pending = UserDirectory._pending_logins
+            UserDirectory._pending_logins = {}
+            
+            if UserDirectory._flush_timer is not None:
+                UserDirectory._flush_timer.cancel()
+                UserDirectory._flush_timer = None
+        
+        if not pending:
+            return 0
+        
+        updates = [(user_id, {"last_login": last_login}) for user_id, last_login in pending.items()]
+        results = bulk_update(UserDirectory.USERS_COLLECTION, updates)
+        
+        updated = 0
+        for (user_id, data), ok in zip(updates, results):
+            if ok or update_document(UserDirectory.USERS_COLLECTION, user_id, data):
+                updated += 1
+        
+        return updated
+    
+    @staticmethod
+    def backfill() -> int:
+        """
+        Indexa os emails de todos os usuários.
+        
+        Returns:
+            Número de emails indexados
+        """
+        indexed = 0
+        total = 0
+        batch = []
+        
+        for user in stream_documents(UserDirectory.USERS_COLLECTION):
+            if not user.get("email"):
+                continue
+            
+            total += 1
+            batch.append((
+                UserDirectory._index_id(user["email"]),
+                {"email": UserDirectory.normalize_email(user["email"]), "user_id": user["id"]}
+            ))
+            
+            if len(batch) >= UserDirectory.BACKFILL_BATCH_SIZE:
+                indexed += sum(1 for ok in bulk_set(UserDirectory.EMAIL_INDEX_COLLECTION, batch) if ok)
+                batch = []
+        
+        if batch:
+            indexed += sum(1 for ok in bulk_set(UserDirectory.EMAIL_INDEX_COLLECTION, batch) if ok)
+        
+        if indexed < total:
+            print(f"Índice de emails incompleto: {total - indexed} emails não indexados")
+            return indexed
+        
+        # Novos usuários são indexados no cadastro: a partir daqui o índice é completo
+        set_document(
+            UserDirectory.EMAIL_INDEX_COLLECTION,
+            UserDirectory.BACKFILL_MARKER_ID,
+            {"completed_at": datetime.datetime.now().isoformat()}
+        )
+        UserDirectory._backfilled = True
+        
+        return indexed
+
+# Grava os logins pendentes ao finalizar o processo
+atexit.register(UserDirectory.flush_logins)
+
+# Comando de indexação: python services/user_directory.py --backfill
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de emails dos usuários.")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Indexa os emails de todos os usuários")
+    args = parser.parse_args()
+    
+    if args.backfill:
+        print(f"{UserDirectory.backfill()} emails indexados.")
+    else:
+        parser.print_help()
@@ -0,0 +1,39 @@
+import os
+from typing import Optional
+
+from storage.base import StorageBackend
+from storage.memory_backend import MemoryBackend
+from storage.sqlite_backend import SQLiteBackend
+
+def create_backend(name: Optional[str] = None) -> Optional[StorageBackend]:
+    """
+    Cria o backend de armazenamento configurado.
+    
+    Args:
+        name: Nome do backend ('firestore', 'memory' ou 'sqlite'). Se omitido, usa a
+            variável de ambiente STORAGE_BACKEND (padrão: 'firestore').
+    
+    Returns:
+        Instância do backend ou None para o Firestore, cuja implementação são as
+        próprias funções de firebase.firebase_config
+    """
+    name = (name or os.getenv("STORAGE_BACKEND", "firestore")).lower()
+    
+    if name == "firestore":
+        return None
+    
+    if name == "memory":
+        return MemoryBackend()
+    
+    if name == "sqlite":
+        return SQLiteBackend(os.getenv("SQLITE_DB_PATH", "finance_tracker.db"))
+    
+    raise ValueError(f"Backend de armazenamento desconhecido: {name}")
+
+# Exportar todas as classes e funções disponíveis no pacote
+__all__ = [
+    'StorageBackend',
+    'MemoryBackend',
+    'SQLiteBackend',
+    'create_backend'
+]
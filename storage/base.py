@@ -0,0 +1,510 @@
+import base64
+import copy
+import datetime
+import operator as op
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Operadores de filtro suportados (mesmos do Firestore)
+OPERATORS = {
+    "==": op.eq,
+    "!=": op.ne,
+    "<": op.lt,
+    "<=": op.le,
+    ">": op.gt,
+    ">=": op.ge,
+    "array_contains": lambda field_value, value: isinstance(field_value, list) and value in field_value,
+    "in": lambda field_value, value: field_value in value
+}
+
+def normalize_filters(field=None, operator=None, value=None, filters=None) -> List[Tuple]:
+    """
+    Combina o filtro simples e a lista de filtros compostos, ignorando valores None.
+    
+    Args:
+        field: Campo do filtro simples (opcional)
+        operator: Operador do filtro simples (opcional)
+        value: Valor do filtro simples (opcional)
+        filters: Lista de tuplas (campo, operador, valor) (opcional)
+    
+    Returns:
+        Lista de tuplas (campo, operador, valor) a aplicar
+    """
+    result = []
+    
+    if field and operator and value is not None:
+        result.append((field, operator, value))
+    
+    for filter_field, filter_operator, filter_value in filters or []:
+        if filter_value is not None:
+            result.append((filter_field, filter_operator, filter_value))
+    
+    return result
+
+def matches_filters(data: Dict, filters: List[Tuple]) -> bool:
+    """
+    Verifica se um documento atende a todos os filtros.
+    
+    Documentos sem o campo filtrado ou com tipo incompatível não são retornados,
+    como no Firestore.
+    
+    Args:
+        data: Dados do documento
+        filters: Lista de tuplas (campo, operador, valor)
+    
+    Returns:
+        True se o documento atender a todos os filtros
+    """
+    for field, operator, value in filters:
+        if field not in data:
+            return False
+        try:
+            if not OPERATORS[operator](data[field], value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+def sort_value(value) -> Tuple:
+    """
+    Chave de ordenação de um valor de campo seguindo a ordem de tipos do Firestore
+    (nulos, booleanos, números, timestamps, strings e demais tipos).
+    
+    Args:
+        value: Valor do campo
+    
+    Returns:
+        Tupla (posição do tipo, valor) comparável entre tipos diferentes
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime.datetime):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5, str(value))
+
+def apply_increments(data: Dict, increments: Dict) -> None:
+    """
+    Soma recursivamente os incrementos aos campos numéricos do documento.
+    
+    Args:
+        data: Dados do documento (alterados no lugar)
+        increments: Campos (podem ser aninhados) e os deltas a aplicar
+    """
+    for key, value in increments.items():
+        if isinstance(value, dict):
+            if not isinstance(data.get(key), dict):
+                data[key] = {}
+            apply_increments(data[key], value)
+        else:
+            data[key] = data.get(key, 0) + value
+
+def merge_data(data: Dict, new_data: Dict) -> None:
+    """
+    Mescla recursivamente novos dados em um documento (equivalente a set com merge=True).
+    
+    Args:
+        data: Dados do documento (alterados no lugar)
+        new_data: Dados a mesclar
+    """
+    for key, value in new_data.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            merge_data(data[key], value)
+        else:
+            data[key] = copy.deepcopy(value)
+
+def encode_cursor(document_id: str) -> str:
+    """
+    Gera um token opaco de paginação a partir do ID de um documento.
+    """
+    return base64.urlsafe_b64encode(document_id.encode()).decode()
+
+def decode_cursor(cursor: str) -> Optional[str]:
+    """
+    Recupera o ID do documento a partir de um token de paginação.
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except Exception:
+        return None
+
+def _report_error(message: str) -> None:
+    # Importação tardia: firebase.firebase_config importa este pacote ao carregar
+    from firebase.instrumentation import report_error
+    report_error(message)
+
+class StorageBackend(ABC):
+    """
+    Interface de armazenamento de documentos usada pelos serviços.
+    
+    Os métodos públicos têm a mesma assinatura e o mesmo comportamento das funções
+    de firebase.firebase_config (que são a implementação Firestore), de modo que um
+    backend pode substituí-las sem alterações nos serviços. As subclasses implementam
+    apenas as primitivas de leitura, gravação, exclusão e seleção.
+    """
+    
+    # Número máximo de operações por lote (mesmo limite do Firestore)
+    BATCH_LIMIT = 500
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+    
+    # Primitivas implementadas pelos backends
+    
+    @abstractmethod
+    def _get(self, collection_name: str, document_id: str) -> Optional[Dict]:
+        """
+        Retorna os dados de um documento ou None se não existir.
+        """
+    
+    @abstractmethod
+    def _put(self, collection_name: str, document_id: str, data: Dict) -> None:
+        """
+        Grava (cria ou sobrescreve) um documento.
+        """
+    
+    @abstractmethod
+    def _remove(self, collection_name: str, document_id: str) -> bool:
+        """
+        Exclui um documento, retornando True se ele existia.
+        """
+    
+    @abstractmethod
+    def _select(
+        self,
+        collection_name: str,
+        filters: List[Tuple],
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Percorre os documentos (id, dados) que atendem aos filtros.
+        
+        start_after é uma tupla (valor do campo de ordenação, id) do último documento
+        da página anterior; a ordenação usa o id como critério de desempate. fields
+        restringe os dados retornados a esses campos (os ausentes são omitidos).
+        """
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Executa um bloco de operações de forma atômica.
+        """
+        with self._lock:
+            yield
+    
+    # Operações de documento
+    
+    def add_document(self, collection_name, data):
+        """
+        Equivalente a firebase_config.add_document.
+        """
+        try:
+            document_id = uuid.uuid4().hex[:20]
+            with self.transaction():
+                self._put(collection_name, document_id, copy.deepcopy(data))
+            return document_id
+        except Exception as e:
+            _report_error(f"Erro ao adicionar documento: {e}")
+            return None
+    
+    def get_document(self, collection_name, document_id):
+        """
+        Equivalente a firebase_config.get_document.
+        """
+        try:
+            return self._get(collection_name, document_id)
+        except Exception as e:
+            _report_error(f"Erro ao obter documento: {e}")
+            return None
+    
+    def get_documents(self, collection_name, document_ids):
+        """
+        Equivalente a firebase_config.get_documents.
+        """
+        try:
+            result = {}
+            for document_id in document_ids:
+                data = self._get(collection_name, document_id)
+                if data is not None:
+                    result[document_id] = data
+            return result
+        except Exception as e:
+            _report_error(f"Erro ao obter documentos: {e}")
+            return {}
+    
+    def update_document(self, collection_name, document_id, data):
+        """
+        Equivalente a firebase_config.update_document.
+        """
+        try:
+            with self.transaction():
+                current = self._get(collection_name, document_id)
+                if current is None:
+                    raise KeyError(f"Documento não encontrado: {document_id}")
+                current.update(copy.deepcopy(data))
+                self._put(collection_name, document_id, current)
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao atualizar documento: {e}")
+            return False
+    
+    def set_document(self, collection_name, document_id, data, merge=False):
+        """
+        Equivalente a firebase_config.set_document.
+        """
+        try:
+            with self.transaction():
+                current = self._get(collection_name, document_id) if merge else None
+                if current is None:
+                    current = {}
+                merge_data(current, data)
+                self._put(collection_name, document_id, current)
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao gravar documento: {e}")
+            return False
+    
+    def create_document(self, collection_name, document_id, data):
+        """
+        Equivalente a firebase_config.create_document.
+        """
+        try:
+            with self.transaction():
+                if self._get(collection_name, document_id) is not None:
+                    return False
+                self._put(collection_name, document_id, copy.deepcopy(data))
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao criar documento: {e}")
+            return False
+    
+    def increment_document(self, collection_name, document_id, increments, data=None):
+        """
+        Equivalente a firebase_config.increment_document.
+        """
+        try:
+            with self.transaction():
+                current = self._get(collection_name, document_id) or {}
+                merge_data(current, data or {})
+                apply_increments(current, increments)
+                self._put(collection_name, document_id, current)
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao gravar documento: {e}")
+            return False
+    
+    def transactional_increment(self, collection_name, document_id, increments, derive=None):
+        """
+        Equivalente a firebase_config.transactional_increment.
+        """
+        try:
+            with self.transaction():
+                current = self._get(collection_name, document_id)
+                if current is None:
+                    _report_error(f"Documento não encontrado: {document_id}")
+                    return False
+                apply_increments(current, increments)
+                if derive:
+                    current.update(derive(dict(current)))
+                self._put(collection_name, document_id, current)
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao incrementar documento: {e}")
+            return False
+    
+    def delete_document(self, collection_name, document_id):
+        """
+        Equivalente a firebase_config.delete_document.
+        """
+        try:
+            with self.transaction():
+                self._remove(collection_name, document_id)
+            return True
+        except Exception as e:
+            _report_error(f"Erro ao excluir documento: {e}")
+            return False
+    
+    # Operações em lote
+    
+    def _run_in_batches(self, items, operation):
+        """
+        Aplica uma operação a cada item em lotes atômicos de até BATCH_LIMIT itens.
+        """
+        results = []
+        
+        for start in range(0, len(items), self.BATCH_LIMIT):
+            chunk = items[start:start + self.BATCH_LIMIT]
+            try:
+                with self.transaction():
+                    chunk_results = [operation(item) for item in chunk]
+                results.extend(chunk_results)
+            except Exception as e:
+                _report_error(f"Erro ao gravar lote de documentos: {e}")
+                results.extend([None] * len(chunk))
+        
+        return results
+    
+    def bulk_add(self, collection_name, items):
+        """
+        Equivalente a firebase_config.bulk_add.
+        """
+        def add(data):
+            document_id = uuid.uuid4().hex[:20]
+            self._put(collection_name, document_id, copy.deepcopy(data))
+            return document_id
+        
+        return self._run_in_batches(list(items), add)
+    
+    def bulk_update(self, collection_name, updates):
+        """
+        Equivalente a firebase_config.bulk_update.
+        """
+        def update(item):
+            document_id, data = item
+            current = self._get(collection_name, document_id)
+            if current is None:
+                raise KeyError(f"Documento não encontrado: {document_id}")
+            current.update(copy.deepcopy(data))
+            self._put(collection_name, document_id, current)
+            return True
+        
+        return [bool(ok) for ok in self._run_in_batches(list(updates), update)]
+    
+    def bulk_set(self, collection_name, documents):
+        """
+        Equivalente a firebase_config.bulk_set.
+        """
+        def set_item(item):
+            document_id, data = item
+            self._put(collection_name, document_id, copy.deepcopy(data))
+            return True
+        
+        return [bool(ok) for ok in self._run_in_batches(list(documents), set_item)]
+    
+    def bulk_delete(self, collection_name, document_ids):
+        """
+        Equivalente a firebase_config.bulk_delete.
+        """
+        def delete(document_id):
+            self._remove(collection_name, document_id)
+            return True
+        
+        return [bool(ok) for ok in self._run_in_batches(list(document_ids), delete)]
+    
+    # Consultas
+    
+    def stream_documents(
+        self,
+        collection_name,
+        field=None,
+        operator=None,
+        value=None,
+        filters=None,
+        order_by=None,
+        descending=False,
+        limit=None,
+        select=None
+    ):
+        """
+        Equivalente a firebase_config.stream_documents.
+        """
+        try:
+            for document_id, data in self._select(
+                collection_name,
+                normalize_filters(field, operator, value, filters),
+                order_by=order_by,
+                descending=descending,
+                limit=limit,
+                fields=select
+            ):
+                data['id'] = document_id
+                yield data
+        except Exception as e:
+            _report_error(f"Erro ao consultar documentos: {e}")
+    
+    def query_documents(
+        self,
+        collection_name,
+        field=None,
+        operator=None,
+        value=None,
+        filters=None,
+        order_by=None,
+        descending=False,
+        limit=None,
+        select=None
+    ):
+        """
+        Equivalente a firebase_config.query_documents.
+        """
+        return list(self.stream_documents(
+            collection_name,
+            field=field,
+            operator=operator,
+            value=value,
+            filters=filters,
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            select=select
+        ))
+    
+    def query_page(
+        self,
+        collection_name,
+        filters=None,
+        order_by=None,
+        descending=False,
+        page_size=20,
+        cursor=None,
+        select=None
+    ):
+        """
+        Equivalente a firebase_config.query_page.
+        """
+        empty_page = {"documents": [], "next_cursor": None}
+        
+        try:
+            start_after = None
+            if cursor:
+                document_id = decode_cursor(cursor)
+                last = self._get(collection_name, document_id) if document_id else None
+                if last is None:
+                    _report_error("Cursor de paginação inválido")
+                    return empty_page
+                start_after = (last.get(order_by) if order_by else None, document_id)
+            
+            documents = []
+            for document_id, data in self._select(
+                collection_name,
+                normalize_filters(filters=filters),
+                order_by=order_by,
+                descending=descending,
+                limit=page_size + 1,
+                start_after=start_after,
+                fields=select
+            ):
+                data['id'] = document_id
+                documents.append(data)
+            
+            next_cursor = None
+            if len(documents) > page_size:
+                documents = documents[:page_size]
+                next_cursor = encode_cursor(documents[-1]['id'])
+            
+            return {"documents": documents, "next_cursor": next_cursor}
+        except Exception as e:
+            _report_error(f"Erro ao consultar página de documentos: {e}")
+            return empty_page
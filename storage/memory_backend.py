@@ -0,0 +1,82 @@
+import copy
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from storage.base import StorageBackend, matches_filters, sort_value
+
+class MemoryBackend(StorageBackend):
+    """
+    Backend de armazenamento em memória, sem persistência.
+    
+    Útil para testes de carga e benchmarks sem um projeto Firebase. Os dados ficam
+    em dicionários por coleção e são compartilhados por todas as sessões do processo.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._collections: Dict[str, Dict[str, Dict]] = {}
+    
+    def _get(self, collection_name: str, document_id: str) -> Optional[Dict]:
+        data = self._collections.get(collection_name, {}).get(document_id)
+        return copy.deepcopy(data) if data is not None else None
+    
+    def _put(self, collection_name: str, document_id: str, data: Dict) -> None:
+        data.pop("id", None)
+        self._collections.setdefault(collection_name, {})[document_id] = data
+    
+    def _remove(self, collection_name: str, document_id: str) -> bool:
+        return self._collections.get(collection_name, {}).pop(document_id, None) is not None
+    
+    def _select(
+        self,
+        collection_name: str,
+        filters: List[Tuple],
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        # Copia a lista sob o lock para não conflitar com gravações concorrentes
+        with self._lock:
+            documents = [
+                (document_id, data)
+                for document_id, data in self._collections.get(collection_name, {}).items()
+                if matches_filters(data, filters)
+            ]
+        
+        if order_by:
+            # Assim como no Firestore, documentos sem o campo de ordenação são omitidos
+            documents = [item for item in documents if order_by in item[1]]
+            
+            def sort_key(item):
+                return (sort_value(item[1][order_by]), item[0])
+        else:
+            def sort_key(item):
+                return (sort_value(None), item[0])
+        
+        documents.sort(key=sort_key, reverse=descending)
+        
+        if start_after is not None:
+            # Mantém apenas os documentos posteriores ao cursor na ordem escolhida
+            cursor_key = (sort_value(start_after[0]), start_after[1])
+            if descending:
+                documents = [item for item in documents if sort_key(item) < cursor_key]
+            else:
+                documents = [item for item in documents if sort_key(item) > cursor_key]
+        
+        if limit and limit > 0:
+            documents = documents[:limit]
+        
+        for document_id, data in documents:
+            if fields:
+                # Copia apenas os campos selecionados
+                yield document_id, {field: copy.deepcopy(data[field]) for field in fields if field in data}
+            else:
+                yield document_id, copy.deepcopy(data)
+    
+    def clear(self) -> None:
+        """
+        Remove todos os documentos de todas as coleções.
+        """
+        with self._lock:
+            self._collections.clear()
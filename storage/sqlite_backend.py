@@ -0,0 +1,291 @@
+import datetime
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from storage.base import StorageBackend
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend de armazenamento em SQLite, usado como réplica local barata do Firestore.
+    
+    Os documentos são gravados como JSON em uma única tabela. Os campos `user_id` e
+    `date` também ficam em colunas próprias com índices reais, de modo que as consultas
+    por usuário e intervalo de datas não percorrem a tabela inteira. Os demais filtros
+    usam json_extract (a impressão digital das transações tem um índice de expressão).
+    
+    Timestamps (datetime) são gravados no JSON como {"$timestamp": "<ISO>"} e, nas
+    colunas indexadas, com o prefixo TIMESTAMP_PREFIX, que os ordena antes das strings
+    e mantém as comparações restritas ao mesmo tipo, como no Firestore.
+    """
+    
+    # Campos com colunas e índices próprios
+    INDEXED_COLUMNS = ("user_id", "date")
+    
+    # Tamanho dos blocos lidos do cursor durante o streaming
+    FETCH_SIZE = 500
+    
+    # Prefixo dos timestamps nas colunas indexadas
+    TIMESTAMP_PREFIX = "\x01"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            collection TEXT NOT NULL,
+            id TEXT NOT NULL,
+            user_id TEXT,
+            date TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (collection, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_documents_user_date
+            ON documents (collection, user_id, date);
+        CREATE INDEX IF NOT EXISTS idx_documents_date
+            ON documents (collection, date);
+        CREATE INDEX IF NOT EXISTS idx_documents_fingerprint
+            ON documents (collection, user_id, json_extract(data, '$."fingerprint"'));
+    """
+    
+    def __init__(self, path: str = "finance_tracker.db"):
+        super().__init__()
+        
+        # Um banco em memória precisa de cache compartilhado entre as conexões das threads
+        if path == ":memory:":
+            self._database = f"file:finance_tracker_{id(self)}?mode=memory&cache=shared"
+        else:
+            self._database = f"file:{path}"
+        
+        self._local = threading.local()
+        
+        # Mantém uma conexão aberta para que o banco em memória não seja descartado
+        self._schema_connection = self._connect()
+        self._schema_connection.executescript(self.SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._database,
+            uri=True,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+    
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # Cada thread usa sua própria conexão
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.depth = 0
+        return connection
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Executa um bloco de operações em uma transação do SQLite.
+        """
+        with self._lock:
+            connection = self._connection
+            outermost = self._local.depth == 0
+            
+            if outermost:
+                connection.execute("BEGIN IMMEDIATE")
+            self._local.depth += 1
+            
+            try:
+                yield
+            except Exception:
+                self._local.depth -= 1
+                if outermost:
+                    connection.execute("ROLLBACK")
+                raise
+            else:
+                self._local.depth -= 1
+                if outermost:
+                    connection.execute("COMMIT")
+    
+    def _field_expression(self, field: str, value=None) -> str:
+        if field in self.INDEXED_COLUMNS:
+            return field
+        # Escapa aspas no nome do campo para uso no caminho JSON
+        path = field.replace('"', '\\"')
+        if isinstance(value, datetime.datetime):
+            return f"json_extract(data, '$.\"{path}\".\"$timestamp\"')"
+        return f"json_extract(data, '$.\"{path}\"')"
+    
+    @staticmethod
+    def _timestamp_str(value: datetime.datetime) -> str:
+        # Timestamps sem fuso são tratados como UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc).isoformat(timespec="microseconds")
+    
+    def _param(self, field: str, value):
+        """
+        Converte o valor de um filtro para a representação armazenada do campo.
+        """
+        if isinstance(value, datetime.datetime):
+            timestamp = self._timestamp_str(value)
+            return self.TIMESTAMP_PREFIX + timestamp if field in self.INDEXED_COLUMNS else timestamp
+        return value
+    
+    def _column_value(self, value) -> Optional[str]:
+        if isinstance(value, datetime.datetime):
+            return self.TIMESTAMP_PREFIX + self._timestamp_str(value)
+        return value if isinstance(value, str) else None
+    
+    def _encode(self, data: Dict) -> str:
+        def default(value):
+            if isinstance(value, datetime.datetime):
+                return {"$timestamp": self._timestamp_str(value)}
+            raise TypeError(f"Tipo não suportado: {type(value).__name__}")
+        
+        return json.dumps(data, default=default)
+    
+    @staticmethod
+    def _decode(text: str) -> Dict:
+        def object_hook(value):
+            if len(value) == 1 and "$timestamp" in value:
+                return datetime.datetime.fromisoformat(value["$timestamp"])
+            return value
+        
+        return json.loads(text, object_hook=object_hook)
+    
+    def _get(self, collection_name: str, document_id: str) -> Optional[Dict]:
+        row = self._connection.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (collection_name, document_id)
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+    
+    def _put(self, collection_name: str, document_id: str, data: Dict) -> None:
+        data.pop("id", None)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO documents (collection, id, user_id, date, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                collection_name,
+                document_id,
+                self._column_value(data.get("user_id")),
+                self._column_value(data.get("date")),
+                self._encode(data)
+            )
+        )
+    
+    def _remove(self, collection_name: str, document_id: str) -> bool:
+        cursor = self._connection.execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?",
+            (collection_name, document_id)
+        )
+        return cursor.rowcount > 0
+    
+    def _select(
+        self,
+        collection_name: str,
+        filters: List[Tuple],
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        conditions = ["collection = ?"]
+        params = [collection_name]
+        
+        for field, operator, value in filters:
+            expression = self._field_expression(field, value)
+            
+            if operator == "array_contains":
+                conditions.append(
+                    f"EXISTS (SELECT 1 FROM json_each(data, '$.\"{field}\"') WHERE value = ?)"
+                )
+                params.append(value)
+            elif operator == "in":
+                values = list(value)
+                if not values:
+                    return
+                conditions.append(f"{expression} IN ({', '.join('?' * len(values))})")
+                params.extend(self._param(field, item) for item in values)
+            elif operator in ("==", "!=", "<", "<=", ">", ">="):
+                sql_operator = "=" if operator == "==" else operator
+                conditions.append(f"{expression} {sql_operator} ?")
+                params.append(self._param(field, value))
+                
+                # Comparações de intervalo nas colunas indexadas ficam restritas ao tipo do valor
+                if field in self.INDEXED_COLUMNS and operator not in ("==", "!="):
+                    if isinstance(value, datetime.datetime):
+                        conditions.append(f"{field} >= char(1) AND {field} < char(2)")
+                    else:
+                        conditions.append(f"({field} < char(1) OR {field} >= char(2))")
+            else:
+                raise ValueError(f"Operador não suportado: {operator}")
+        
+        direction = "DESC" if descending else "ASC"
+        
+        if order_by:
+            order_expression = self._field_expression(order_by)
+            # Assim como no Firestore, documentos sem o campo de ordenação são omitidos
+            conditions.append(f"{order_expression} IS NOT NULL")
+            order_clause = f"ORDER BY {order_expression} {direction}, id {direction}"
+        else:
+            order_expression = "NULL"
+            if any(operator in ("==", "in") for _, operator, _ in filters):
+                # "+id" impede que a ordenação pela chave primária substitua os índices
+                # dos filtros de igualdade (usuário, impressão digital) por uma varredura
+                order_clause = f"ORDER BY +id {direction}"
+            else:
+                order_clause = f"ORDER BY id {direction}"
+        
+        if start_after is not None:
+            comparison = "<" if descending else ">"
+            if order_by:
+                conditions.append(f"({order_expression}, id) {comparison} (?, ?)")
+                params.extend([self._param(order_by, start_after[0]), start_after[1]])
+            else:
+                conditions.append(f"id {comparison} ?")
+                params.append(start_after[1])
+        
+        if fields:
+            # Projeção: extrai apenas os campos selecionados (JSON de cada valor, ou
+            # NULL quando o campo não existe), sem decodificar o documento inteiro
+            columns = ", ".join(
+                "data -> '$.\"{}\"'".format(field.replace('"', '\\"')) for field in fields
+            )
+        else:
+            columns = "data"
+        
+        sql = f"SELECT id, {columns} FROM documents WHERE {' AND '.join(conditions)} {order_clause}"
+        
+        if limit and limit > 0:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        # Lê o resultado em blocos para manter a memória constante
+        cursor = self._connection.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(self.FETCH_SIZE)
+            if not rows:
+                break
+            if fields:
+                for document_id, *values in rows:
+                    yield document_id, {
+                        field: self._decode(value)
+                        for field, value in zip(fields, values)
+                        if value is not None
+                    }
+            else:
+                for document_id, data in rows:
+                    yield document_id, self._decode(data)
+    
+    def close(self) -> None:
+        """
+        Fecha a conexão da thread atual e a conexão principal do banco.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+        self._schema_connection.close()
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Os testes usam o backend em memória; a troca precisa acontecer antes da
+# importação dos serviços
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+# Adiciona o diretório raiz ao path para importar os serviços
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from services.auth_service import AuthService
+
+@pytest.fixture
+def user():
+    AuthService.invalidate_user_cache()
+    user = AuthService.register_user(f"token-{time.time_ns()}@example.com", "senha123", "Token")
+    assert user is not None
+    return user
+
+@pytest.fixture
+def user_reads(monkeypatch):
+    # Conta as leituras do perfil no banco feitas pelo cache de usuários
+    reads = []
+    get_user = AuthService.get_user
+    
+    def counting_get_user(user_id):
+        reads.append(user_id)
+        return get_user(user_id)
+    
+    monkeypatch.setattr(AuthService, "get_user", staticmethod(counting_get_user))
+    return reads
+
+def test_valid_token_reads_profile_once(user, user_reads):
+    token = AuthService.generate_token(user["id"])
+    
+    for _ in range(3):
+        assert AuthService.verify_token(token)["email"] == user["email"]
+    assert user_reads == [user["id"]]
+
+def test_tampered_token_is_rejected(user):
+    user_id, expires_at, signature = AuthService.generate_token(user["id"]).split(":")
+    tampered_signature = signature[:-1] + ("0" if signature[-1] != "0" else "1")
+    
+    assert AuthService.verify_token(f"{user_id}:{expires_at}:{tampered_signature}") is None
+    assert AuthService.verify_token(f"{user_id}:{int(expires_at) + 3600}:{signature}") is None
+    assert AuthService.verify_token(f"outro-usuario:{expires_at}:{signature}") is None
+
+def test_expired_token_is_rejected(user, monkeypatch):
+    token = AuthService.generate_token(user["id"])
+    
+    now = time.time()
+    monkeypatch.setattr(
+        "services.auth_service.time.time",
+        lambda: now + AuthService.TOKEN_TTL_SECONDS + 1
+    )
+    assert AuthService.verify_token(token) is None
+
+@pytest.mark.parametrize("token", [
+    "",
+    "sem-separadores",
+    "usuario:123",
+    "usuario:123:assinatura:extra",
+    None
+])
+def test_malformed_token_is_rejected(token):
+    assert AuthService.verify_token(token) is None
+
+def test_malformed_expiration_with_valid_signature_is_rejected(user):
+    data = f"{user['id']}:nunca"
+    assert AuthService.verify_token(f"{data}:{AuthService._sign(data)}") is None
+
+def test_profile_update_invalidates_cached_user(user, user_reads):
+    token = AuthService.generate_token(user["id"])
+    assert AuthService.verify_token(token)["name"] == "Token"
+    
+    assert AuthService.update_user_profile(user["id"], name="Novo nome")
+    
+    assert AuthService.verify_token(token)["name"] == "Novo nome"
+    assert user_reads == [user["id"], user["id"]]
+
+def test_password_change_invalidates_cached_user(user, user_reads):
+    token = AuthService.generate_token(user["id"])
+    AuthService.verify_token(token)
+    
+    assert AuthService.change_password(user["id"], "senha123", "nova-senha")
+    assert user["id"] not in AuthService._user_cache
+    
+    AuthService.verify_token(token)
+    assert user_reads == [user["id"], user["id"]]
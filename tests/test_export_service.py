@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import pytest
+
+from services.export_service import ExportService
+from services.transaction_service import TransactionService
+
+@pytest.fixture
+def temp_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+def test_export_writes_temp_file(temp_dir):
+    TransactionService.add_transaction(
+        "Salário", "income", "Salário", 3000, "2024-04-05", "export-ok"
+    )
+    
+    path = ExportService.export_transactions_csv("export-ok")
+    
+    assert os.path.dirname(path) == str(temp_dir)
+    with open(path, encoding="utf-8-sig") as file:
+        assert "Salário" in file.read()
+
+@pytest.mark.parametrize("export", [
+    ExportService.export_transactions_csv,
+    ExportService.export_transactions_excel,
+    lambda user_id: ExportService.export_backup(user_id, "JSON"),
+    lambda user_id: ExportService.export_backup(user_id, "CSV")
+])
+def test_failed_export_removes_temp_file(temp_dir, monkeypatch, export):
+    def failing_rows(*args, **kwargs):
+        yield [["2024-04-05", "Parcial"]]
+        raise RuntimeError("falha na leitura")
+    
+    def failing_transactions(*args, **kwargs):
+        yield {"id": "parcial", "description": "Parcial"}
+        raise RuntimeError("falha na leitura")
+    
+    monkeypatch.setattr(ExportService, "iter_transaction_rows", staticmethod(failing_rows))
+    monkeypatch.setattr(TransactionService, "iter_transactions", staticmethod(failing_transactions))
+    
+    assert export("export-failure") is None
+    assert list(temp_dir.iterdir()) == []
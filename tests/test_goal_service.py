@@ -0,0 +1,28 @@
+from services.goal_service import GoalService
+
+def test_progress_updates_derive_the_same_fields():
+    goal_id = GoalService.add_goal("Viagem", 1000, 0, "2030-12-31", "goal-progress")
+    
+    assert GoalService.update_goal_progress(goal_id, 250)
+    goal = GoalService.get_goal(goal_id)
+    assert goal["progress_percentage"] == 25
+    assert goal["completed"] is False
+    
+    assert GoalService.update_goal_progress(goal_id, 750)
+    goal = GoalService.get_goal(goal_id)
+    assert goal["progress_percentage"] == 100
+    assert goal["completed"] is True
+    completed_at = goal["completed_at"]
+    assert completed_at
+    
+    # Continuar concluída não altera a data de conclusão
+    assert GoalService.update_goal(goal_id, current_amount=1200)
+    goal = GoalService.get_goal(goal_id)
+    assert goal["progress_percentage"] == 120
+    assert goal["completed_at"] == completed_at
+    
+    assert GoalService.update_goal(goal_id, target_amount=2400)
+    goal = GoalService.get_goal(goal_id)
+    assert goal["progress_percentage"] == 50
+    assert goal["completed"] is False
+    assert goal["completed_at"] is None
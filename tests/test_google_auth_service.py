@@ -0,0 +1,131 @@
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("cryptography")
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from services.google_auth_service import GoogleAuthService
+
+CLIENT_ID = "client-id-teste"
+
+def make_key_pair():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "teste")])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(datetime.datetime(2020, 1, 1))
+        .not_valid_after(datetime.datetime(2100, 1, 1))
+        .sign(key, hashes.SHA256())
+    )
+    private_key = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    return private_key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+KEY_1, CERT_1 = make_key_pair()
+KEY_2, CERT_2 = make_key_pair()
+
+def make_token(private_key, kid, **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "google-123",
+        "email": "google@example.com",
+        "iat": now,
+        "exp": now + 3600
+    }
+    payload.update(claims)
+    return jwt.encode(crypt.RSASigner.from_string(private_key, kid), payload).decode()
+
+@pytest.fixture
+def certs_server(monkeypatch):
+    # Servidor local no lugar do endpoint de certificados do Google
+    state = {"certs": {"k1": CERT_1}, "max_age": 300, "requests": 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"] += 1
+            body = json.dumps(state["certs"]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", f"public, max-age={state['max_age']}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    monkeypatch.setenv("GOOGLE_CERTS_URL", f"http://127.0.0.1:{server.server_port}/certs")
+    monkeypatch.setenv("GOOGLE_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setattr(GoogleAuthService, "_certs", None)
+    monkeypatch.setattr(GoogleAuthService, "_certs_fetched_at", 0.0)
+    monkeypatch.setattr(GoogleAuthService, "_certs_expires_at", 0.0)
+    
+    clock = [1000.0]
+    monkeypatch.setattr("services.google_auth_service.time.monotonic", lambda: clock[0])
+    state["clock"] = clock
+    
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def test_certs_are_cached_for_max_age(certs_server):
+    token = make_token(KEY_1, "k1")
+    
+    for _ in range(5):
+        assert GoogleAuthService.verify_google_token(token)["email"] == "google@example.com"
+    assert certs_server["requests"] == 1
+    
+    certs_server["clock"][0] += 299
+    GoogleAuthService.get_certs()
+    assert certs_server["requests"] == 1
+    
+    certs_server["clock"][0] += 2
+    GoogleAuthService.get_certs()
+    assert certs_server["requests"] == 2
+
+def test_unknown_kid_forces_refresh(certs_server):
+    assert GoogleAuthService.verify_google_token(make_token(KEY_1, "k1"))
+    
+    # Chave nova publicada pelo Google antes do fim do max-age
+    certs_server["certs"] = {"k1": CERT_1, "k2": CERT_2}
+    certs_server["clock"][0] += GoogleAuthService.MIN_CERTS_REFRESH_SECONDS
+    
+    assert GoogleAuthService.verify_google_token(make_token(KEY_2, "k2"))
+    assert certs_server["requests"] == 2
+    
+    # Chaves desconhecidas não forçam outra busca antes do intervalo mínimo
+    for _ in range(5):
+        assert GoogleAuthService.verify_google_token(make_token(KEY_2, "desconhecida")) is None
+    assert certs_server["requests"] == 2
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "outro-cliente"},
+    {"iss": "https://evil.example.com"},
+    {"exp": int(time.time()) - 3600, "iat": int(time.time()) - 7200}
+])
+def test_rejects_invalid_claims(certs_server, claims):
+    assert GoogleAuthService.verify_google_token(make_token(KEY_1, "k1", **claims)) is None
+
+def test_rejects_token_signed_with_other_key(certs_server):
+    assert GoogleAuthService.verify_google_token(make_token(KEY_2, "k1")) is None
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from services.import_service import ImportService
+
+def _validate_amount(value):
+    valid, errors = ImportService.validate_chunk(
+        [(2, {"description": "Mercado", "amount": value, "date": "2024-01-15"})]
+    )
+    return valid[0][1]["amount"] if valid else errors[0][1]
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("12,50", 12.5),
+    ("12.50", 12.5),
+    ("-45.90", 45.9),
+    ("1.234", 1234.0),
+    ("1,234", 1234.0),
+    ("1.234.567", 1234567.0),
+    ("R$ 100.000", 100000.0)
+])
+def test_validate_chunk_parses_amounts(value, expected):
+    assert _validate_amount(value) == expected
+
+@pytest.mark.parametrize("value", ["0.125", "1.2345", "1,234.567"])
+def test_validate_chunk_rejects_more_than_two_decimals(value):
+    assert _validate_amount(value) == f"Valor com mais de duas casas decimais: '{value}'"
+
+def _import_csv(user_id, content):
+    return ImportService.import_file(user_id, io.BytesIO(content.encode("utf-8")), "extrato.csv")
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 500])
+def test_import_file_keeps_repeated_rows_of_the_same_file(monkeypatch, chunk_size):
+    monkeypatch.setattr(ImportService, "CHUNK_SIZE", chunk_size)
+    user_id = f"import-repeated-{chunk_size}"
+    
+    result = _import_csv(user_id, (
+        "data;descricao;valor\n"
+        "15/01/2024;Café;-8,50\n"
+        "15/01/2024;Café;-8,50\n"
+        "16/01/2024;Mercado;-120,00\n"
+    ))
+    
+    assert result["imported"] == 3
+    assert result["failed"] == 0
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 500])
+def test_import_file_skips_transactions_registered_before_the_import(monkeypatch, chunk_size):
+    monkeypatch.setattr(ImportService, "CHUNK_SIZE", chunk_size)
+    user_id = f"import-registered-{chunk_size}"
+    content = (
+        "data;descricao;valor\n"
+        "15/01/2024;Café;-8,50\n"
+        "15/01/2024;Café;-8,50\n"
+    )
+    _import_csv(user_id, content)
+    
+    result = _import_csv(user_id, content)
+    
+    assert result["imported"] == 0
+    assert [error["line"] for error in result["errors"]] == [2, 3]
+    assert all(error["error"] == "Transação já registrada" for error in result["errors"])
@@ -0,0 +1,34 @@
+from services.transaction_cache import TransactionCache
+from services.transaction_service import TransactionService
+
+def add_expense(user_id):
+    TransactionService.add_transaction(
+        "Mercado", "expense", "Alimentação", 10, "2024-03-05", user_id
+    )
+
+def test_frames_are_bounded_by_size(monkeypatch):
+    monkeypatch.setattr(TransactionCache, "FRAME_CACHE_SIZE", 2)
+    TransactionCache.invalidate()
+    
+    for user_id in ["cache-a", "cache-b", "cache-c"]:
+        add_expense(user_id)
+        TransactionCache.get_type_totals(user_id)
+    
+    assert set(TransactionCache._frames) == {"cache-b", "cache-c"}
+    assert set(TransactionCache._aggregates) == {"cache-b", "cache-c"}
+    assert TransactionCache.get_type_totals("cache-a")["expense"] == 10
+
+def test_idle_frames_expire(monkeypatch):
+    TransactionCache.invalidate()
+    add_expense("cache-idle")
+    add_expense("cache-active")
+    
+    clock = [1000.0]
+    monkeypatch.setattr("services.transaction_cache.time.monotonic", lambda: clock[0])
+    
+    TransactionCache.get_frame("cache-idle")
+    clock[0] += TransactionCache.FRAME_CACHE_TTL_SECONDS + 1
+    TransactionCache.get_frame("cache-active")
+    
+    assert "cache-idle" not in TransactionCache._frames
+    assert "cache-active" in TransactionCache._frames
@@ -0,0 +1,63 @@
+import pytest
+
+from services.duplicate_service import DuplicateTransactionError
+from services.transaction_service import TransactionService
+
+def test_add_transaction_signals_duplicates():
+    transaction = {
+        "description": "Café",
+        "transaction_type": "expense",
+        "category": "Alimentação",
+        "amount": 8.5,
+        "date": "2024-01-15",
+        "user_id": "duplicate-signal"
+    }
+    transaction_id = TransactionService.add_transaction(**transaction)
+    
+    with pytest.raises(DuplicateTransactionError) as error:
+        TransactionService.add_transaction(**transaction)
+    
+    assert error.value.existing_ids == [transaction_id]
+    assert TransactionService.add_transaction(**transaction, allow_duplicate=True)
+
+@pytest.mark.parametrize("env", ["USE_MONTHLY_ROLLUPS", "USE_TRANSACTION_CACHE", None])
+def test_get_summary_filters_by_category(monkeypatch, env):
+    if env:
+        monkeypatch.setenv(env, "true")
+    user_id = f"summary-category-{env}"
+    for category, transaction_type, amount in [
+        ("Alimentação", "expense", 10.1),
+        ("Moradia", "expense", 500),
+        ("Alimentação", "income", 3.3)
+    ]:
+        TransactionService.add_transaction(
+            category, transaction_type, category, amount, "2024-01-10", user_id
+        )
+    
+    summary = TransactionService.get_summary(
+        user_id, "2024-01-01", "2024-01-31", category="Alimentação"
+    )
+    
+    assert summary["total_income"] == pytest.approx(3.3)
+    assert summary["total_expenses"] == pytest.approx(10.1)
+
+def test_rollups_keep_exact_cents(monkeypatch):
+    monkeypatch.setenv("USE_MONTHLY_ROLLUPS", "true")
+    user_id = "rollup-cents"
+    transaction_ids = [
+        TransactionService.add_transaction(
+            f"Item {i}", "expense", "Alimentação", 0.1, "2024-02-10", user_id,
+            allow_duplicate=True
+        )
+        for i in range(10)
+    ]
+    TransactionService.add_transaction("Aluguel", "expense", "Moradia", 0.3, "2024-02-05", user_id)
+    
+    summary = TransactionService.get_summary(user_id, "2024-02-01", "2024-02-29")
+    assert summary["total_expenses"] == 1.3
+    
+    TransactionService.delete_transactions(transaction_ids)
+    categories = TransactionService.get_category_summary(
+        user_id, "expense", "2024-02-01", "2024-02-29"
+    )
+    assert categories == [{"category": "Moradia", "amount": 0.3}]
@@ -0,0 +1,36 @@
+from firebase.firebase_config import add_document, delete_document, get_document
+from services.auth_service import AuthService
+from services.user_directory import UserDirectory
+
+def test_register_email_keeps_first_user():
+    assert UserDirectory.register_email("Race@Example.com", "first")
+    assert not UserDirectory.register_email("race@example.com ", "second")
+    assert UserDirectory.register_email("race@example.com", "first")
+    
+    entry = get_document(UserDirectory.EMAIL_INDEX_COLLECTION, UserDirectory._index_id("race@example.com"))
+    assert entry["user_id"] == "first"
+
+def test_concurrent_registration_creates_single_user(monkeypatch):
+    # Os dois cadastros passam pela verificação de email antes de qualquer gravação
+    monkeypatch.setattr(UserDirectory, "find_user_by_email", staticmethod(lambda email: None))
+    
+    first = AuthService.register_user("same@example.com", "senha123", "Primeiro")
+    second = AuthService.register_user("same@example.com", "senha123", "Segundo")
+    
+    assert first is not None
+    assert second is None
+    
+    entry = get_document(UserDirectory.EMAIL_INDEX_COLLECTION, UserDirectory._index_id("same@example.com"))
+    assert entry["user_id"] == first["id"]
+
+def test_flush_logins_skips_only_deleted_users():
+    kept = add_document(UserDirectory.USERS_COLLECTION, {"email": "kept@example.com"})
+    deleted = add_document(UserDirectory.USERS_COLLECTION, {"email": "deleted@example.com"})
+    
+    UserDirectory.record_login(kept)
+    UserDirectory.record_login(deleted)
+    delete_document(UserDirectory.USERS_COLLECTION, deleted)
+    
+    assert UserDirectory.flush_logins() == 1
+    assert get_document(UserDirectory.USERS_COLLECTION, kept)["last_login"]
+    assert get_document(UserDirectory.USERS_COLLECTION, deleted) is None
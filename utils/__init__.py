@@ -21,10 +21,14 @@ from utils.currency_utils import (
     format_usd,
     format_eur,
     format_generic,
+    format_currency_series,
+    format_currency_array,
     parse_currency,
     calculate_percentage,
     format_percentage,
-    get_currency_options
+    get_currency_options,
+    CurrencyConverter,
+    CurrencyConversionError
 )
 
 # Exportar todas as funções disponíveis no pacote
@@ -51,8 +55,12 @@ __all__ = [
     'format_usd',
     'format_eur',
     'format_generic',
+    'format_currency_series',
+    'format_currency_array',
     'parse_currency',
     'calculate_percentage',
     'format_percentage',
-    'get_currency_options'
+    'get_currency_options',
+    'CurrencyConverter',
+    'CurrencyConversionError'
 ] 
\ No newline at end of file
@@ -1,7 +1,13 @@
 from typing import Dict, List, Optional, Union
 import locale
+import os
+import threading
+from pathlib import Path
 from decimal import Decimal, ROUND_HALF_UP
 
+import numpy as np
+import pandas as pd
+
 # Configuração da localização para pt_BR
 try:
     locale.setlocale(locale.LC_MONETARY, 'pt_BR.UTF-8')
@@ -161,6 +167,117 @@ def format_generic(
     
     return formatted_value
 
+def format_currency_series(
+    values: pd.Series,
+    currency_code: str = "BRL",
+    show_symbol: bool = True,
+    decimal_places: int = 2
+) -> pd.Series:
+    """
+    Formata uma coluna inteira de valores monetários de uma vez.
+    
+    O resultado de cada elemento é idêntico ao de format_currency.
+    
+    Args:
+        values: Série com os valores
+        currency_code: Código ISO da moeda (padrão: BRL)
+        show_symbol: Se True, inclui o símbolo da moeda
+        decimal_places: Número de casas decimais
+    
+    Returns:
+        Série de strings com o mesmo índice e nome
+    """
+    formatted = format_currency_array(values.to_numpy(), currency_code, show_symbol, decimal_places)
+    return pd.Series(formatted, index=values.index, name=values.name, dtype=object)
+
+def format_currency_array(
+    values: Union[np.ndarray, List],
+    currency_code: str = "BRL",
+    show_symbol: bool = True,
+    decimal_places: int = 2
+) -> np.ndarray:
+    """
+    Formata um array de valores monetários de uma vez.
+    
+    O arredondamento é feito sobre o array inteiro; apenas valores muito próximos
+    de um empate de arredondamento (ou não numéricos) passam pelo Decimal, como em
+    format_currency, de modo que o resultado de cada elemento é idêntico.
+    
+    Args:
+        values: Array (ou lista) com os valores
+        currency_code: Código ISO da moeda (padrão: BRL)
+        show_symbol: Se True, inclui o símbolo da moeda
+        decimal_places: Número de casas decimais
+    
+    Returns:
+        Array de strings (dtype object) com o mesmo formato
+    """
+    values = np.asarray(values)
+    result = np.empty(values.shape, dtype=object)
+    if values.size == 0:
+        return result
+    
+    flat_values = values.ravel()
+    flat_result = result.ravel()
+    scale = 10 ** decimal_places
+    
+    if values.dtype.kind in "iu":
+        magnitudes = np.abs(flat_values.astype(np.float64)) * scale
+        units = np.abs(flat_values.astype(np.int64)) * scale
+        negative = flat_values < 0
+        exact = magnitudes < 2 ** 53
+    elif values.dtype.kind == "f":
+        # Centavos arredondados "para cima" no empate, como ROUND_HALF_UP
+        magnitudes = np.abs(flat_values.astype(np.float64)) * scale
+        exact = np.isfinite(magnitudes) & (magnitudes < 2 ** 52)
+        magnitudes = np.where(exact, magnitudes, 0)
+        units = np.floor(magnitudes + 0.5).astype(np.int64)
+        
+        # Perto de x.5 o erro do float pode mudar o arredondamento: usa o Decimal
+        exact &= np.abs(magnitudes - np.floor(magnitudes) - 0.5) > magnitudes * 1e-15 + 1e-9
+        negative = np.signbit(flat_values)
+    else:
+        for index, value in enumerate(flat_values):
+            flat_result[index] = format_currency(value, currency_code, show_symbol, decimal_places)
+        return result
+    
+    # Separadores de milhares e decimal de cada moeda (milhares formatados com "_")
+    if currency_code in ["BRL", "EUR"]:
+        thousands, decimal_point = ".", ","
+    else:
+        thousands, decimal_point = ",", "."
+    
+    if not show_symbol:
+        prefix = ""
+    elif currency_code == "BRL":
+        prefix = "R$ "
+    elif currency_code == "USD":
+        prefix = "$ "
+    elif currency_code == "EUR":
+        prefix = "€ "
+    else:
+        prefix = f"{currency_code} "
+    
+    if decimal_places > 0:
+        template = prefix + "{}{:_}" + decimal_point + "{:0" + str(decimal_places) + "d}"
+    else:
+        template = prefix + "{}{:_}"
+    
+    formatted = map(
+        template.format,
+        np.where(negative, "-", "").tolist(),
+        (units // scale).tolist(),
+        (units % scale).tolist()
+    )
+    flat_result[:] = [value.replace("_", thousands) for value in formatted]
+    
+    for index in np.flatnonzero(~exact):
+        flat_result[index] = format_currency(
+            flat_values[index], currency_code, show_symbol, decimal_places
+        )
+    
+    return result
+
 def parse_currency(value_str: str, currency_code: str = "BRL") -> Optional[Decimal]:
     """
     Converte uma string formatada como moeda para um valor Decimal.
@@ -255,4 +372,202 @@ def get_currency_options() -> List[Dict[str, str]]:
         {"value": "ARS", "label": "Peso Argentino ($)"}
     ]
     
-    return currencies 
\ No newline at end of file
+    return currencies 
+
+class CurrencyConversionError(ValueError):
+    """
+    Erro de conversão: a tabela de cotações não está disponível ou não tem cotação
+    para alguma das moedas. Somar os valores sem conversão misturaria moedas.
+    """
+
+class CurrencyConverter:
+    """
+    Conversão vetorizada de valores entre moedas a partir de cotações diárias.
+    
+    O arquivo de cotações é um CSV com as colunas date (YYYY-MM-DD), currency e rate,
+    em que rate é o valor de uma unidade da moeda na moeda base (BRL) naquele dia.
+    As cotações são carregadas uma única vez em um array ordenado de datas
+    (datetime64) e uma matriz dia x moeda; dias sem cotação usam a última cotação
+    anterior (ou a primeira disponível, para datas anteriores à tabela).
+    """
+    
+    BASE_CURRENCY = "BRL"
+    DEFAULT_RATES_PATH = Path(__file__).parent.parent / "config" / "currency_rates.csv"
+    
+    # Tabela de cotações: datas ordenadas, matriz dia x moeda e coluna de cada moeda
+    _dates: Optional[np.ndarray] = None
+    _rates: Optional[np.ndarray] = None
+    _currency_columns: Dict[str, int] = {}
+    _load_attempted = False
+    
+    # Colunas convertidas por (usuário, moeda): (origem dos valores, valores convertidos)
+    _columns: Dict[tuple, tuple] = {}
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def get_rates_path() -> str:
+        """
+        Retorna o caminho do arquivo de cotações (variável CURRENCY_RATES_PATH).
+        """
+        return os.getenv("CURRENCY_RATES_PATH") or str(CurrencyConverter.DEFAULT_RATES_PATH)
+    
+    @staticmethod
+    def load(path: Optional[str] = None) -> bool:
+        """
+        Carrega (ou recarrega) a tabela de cotações diárias.
+        
+        Args:
+            path: Caminho do CSV de cotações (opcional, padrão: get_rates_path())
+        
+        Returns:
+            True se a tabela foi carregada, False caso contrário
+        """
+        path = path or CurrencyConverter.get_rates_path()
+        
+        with CurrencyConverter._lock:
+            CurrencyConverter._load_attempted = True
+            
+            try:
+                rates = pd.read_csv(path, dtype={"currency": str, "rate": float})
+                rates["date"] = pd.to_datetime(rates["date"], format="ISO8601")
+                rates["currency"] = rates["currency"].str.strip().str.upper()
+                
+                # Uma linha por dia e uma coluna por moeda
+                table = rates.pivot_table(index="date", columns="currency", values="rate", aggfunc="last")
+                table[CurrencyConverter.BASE_CURRENCY] = 1.0
+                table = table.sort_index().ffill().bfill()
+            except Exception as e:
+                print(f"Erro ao carregar cotações de {path}: {e}")
+                return False
+            
+            CurrencyConverter._dates = table.index.to_numpy().astype("datetime64[D]")
+            CurrencyConverter._rates = table.to_numpy(dtype=np.float64)
+            CurrencyConverter._currency_columns = {
+                currency: column for column, currency in enumerate(table.columns)
+            }
+            CurrencyConverter._columns.clear()
+            
+            return True
+    
+    @staticmethod
+    def _ensure_loaded() -> bool:
+        with CurrencyConverter._lock:
+            if CurrencyConverter._rates is None and not CurrencyConverter._load_attempted:
+                CurrencyConverter.load()
+            return CurrencyConverter._rates is not None
+    
+    @staticmethod
+    def get_currencies() -> List[str]:
+        """
+        Retorna os códigos das moedas com cotação disponível.
+        """
+        if not CurrencyConverter._ensure_loaded():
+            return [CurrencyConverter.BASE_CURRENCY]
+        return sorted(CurrencyConverter._currency_columns)
+    
+    @staticmethod
+    def convert(
+        amounts: Union[np.ndarray, pd.Series, List],
+        dates: Union[np.ndarray, pd.Series, List],
+        from_currencies: Union[np.ndarray, pd.Series, List, str],
+        to_currency: str
+    ) -> np.ndarray:
+        """
+        Converte valores para uma moeda usando a cotação do dia de cada valor.
+        
+        Args:
+            amounts: Valores a converter
+            dates: Data de cada valor (datetime64 ou strings YYYY-MM-DD)
+            from_currencies: Moeda de cada valor (ou uma única moeda para todos)
+            to_currency: Moeda de destino
+        
+        Returns:
+            Array float64 com os valores convertidos. Levanta CurrencyConversionError se
+            não houver tabela de cotações ou cotação para alguma das moedas
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        currencies = np.broadcast_to(np.asarray(from_currencies, dtype=object), amounts.shape)
+        
+        # Valores que já estão na moeda de destino não precisam da tabela
+        if amounts.size == 0 or (currencies == to_currency).all():
+            return amounts.copy()
+        
+        if not CurrencyConverter._ensure_loaded():
+            raise CurrencyConversionError(
+                f"Tabela de cotações indisponível: {CurrencyConverter.get_rates_path()}"
+            )
+        
+        codes, inverse = np.unique(currencies.astype(str), return_inverse=True)
+        columns = CurrencyConverter._currency_columns
+        missing = [code for code in list(codes) + [to_currency] if code not in columns]
+        if missing:
+            raise CurrencyConversionError(
+                f"Cotação não encontrada para as moedas: {', '.join(sorted(set(missing)))}"
+            )
+        
+        # Linha da tabela de cada valor: último dia com cotação até a data do valor
+        table_dates = CurrencyConverter._dates
+        day_index = np.searchsorted(
+            table_dates,
+            np.asarray(dates, dtype="datetime64[D]"),
+            side="right"
+        ) - 1
+        day_index = np.clip(day_index, 0, len(table_dates) - 1)
+        
+        from_columns = np.array([columns[code] for code in codes])[inverse.reshape(amounts.shape)]
+        rates = CurrencyConverter._rates
+        
+        return amounts * rates[day_index, from_columns] / rates[day_index, columns[to_currency]]
+    
+    @staticmethod
+    def convert_column(
+        user_id: str,
+        to_currency: str,
+        amounts: Union[np.ndarray, pd.Series],
+        dates: Union[np.ndarray, pd.Series],
+        from_currencies: Union[np.ndarray, pd.Series],
+        source: object
+    ) -> np.ndarray:
+        """
+        Converte uma coluna de valores do usuário, reaproveitando o resultado enquanto
+        a origem dos dados não mudar.
+        
+        Args:
+            user_id: ID do usuário
+            to_currency: Moeda de destino
+            amounts: Valores a converter
+            dates: Data de cada valor
+            from_currencies: Moeda de cada valor
+            source: Objeto de origem dos valores (ex: o DataFrame); um objeto
+                diferente invalida a coluna convertida
+        
+        Returns:
+            Array com os valores convertidos (não deve ser modificado). Levanta
+            CurrencyConversionError se não houver cotação
+        """
+        key = (user_id, to_currency)
+        
+        with CurrencyConverter._lock:
+            cached = CurrencyConverter._columns.get(key)
+            if cached is not None and cached[0] is source:
+                return cached[1]
+            
+            converted = CurrencyConverter.convert(amounts, dates, from_currencies, to_currency)
+            CurrencyConverter._columns[key] = (source, converted)
+            
+            return converted
+    
+    @staticmethod
+    def invalidate(user_id: Optional[str] = None) -> None:
+        """
+        Descarta as colunas convertidas de um usuário (ou de todos).
+        
+        Args:
+            user_id: ID do usuário (opcional, padrão: todos)
+        """
+        with CurrencyConverter._lock:
+            if user_id is None:
+                CurrencyConverter._columns.clear()
+            else:
+                for key in [key for key in CurrencyConverter._columns if key[0] == user_id]:
+                    del CurrencyConverter._columns[key]
@@ -0,0 +1,67 @@
+import os
+from typing import Optional
+
+import streamlit as st
+
+def keep_download(state_key: str, path: str) -> None:
+    """
+    Guarda o caminho de um arquivo gerado para download, removendo o arquivo
+    anterior com a mesma chave.
+    
+    Apenas o caminho fica no session_state: o conteúdo é lido do disco quando o
+    botão de download é exibido.
+    
+    Args:
+        state_key: Chave do arquivo no session_state
+        path: Caminho do arquivo temporário gerado
+    """
+    discard_download(state_key)
+    st.session_state[state_key] = path
+
+def discard_download(state_key: str) -> None:
+    """
+    Remove o arquivo guardado com a chave informada e o seu caminho do session_state.
+    
+    Args:
+        state_key: Chave do arquivo no session_state
+    """
+    path = st.session_state.pop(state_key, None)
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def download_button(state_key: str, label: str, file_name: str, mime: str, **kwargs) -> Optional[bool]:
+    """
+    Exibe o botão de download do arquivo guardado com a chave informada.
+    
+    O arquivo é passado ao Streamlit pelo handle aberto e removido, junto com o
+    caminho no session_state, quando o download é servido (o Streamlit mantém o
+    conteúdo disponível até o fim do rerun seguinte ao clique).
+    
+    Args:
+        state_key: Chave do arquivo no session_state
+        label: Texto do botão
+        file_name: Nome do arquivo baixado
+        mime: Tipo MIME do arquivo
+        **kwargs: Demais argumentos de st.download_button
+    
+    Returns:
+        Retorno de st.download_button ou None se não houver arquivo guardado
+    """
+    path = st.session_state.get(state_key)
+    if not path:
+        return None
+    
+    if not os.path.exists(path):
+        st.session_state.pop(state_key, None)
+        return None
+    
+    with open(path, "rb") as file:
+        return st.download_button(
+            label,
+            data=file,
+            file_name=file_name,
+            mime=mime,
+            on_click=discard_download,
+            args=(state_key,),
+            **kwargs
+        )
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Dict
+from pathlib import Path
+import sys
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Adiciona o diretório raiz ao path para importar os serviços
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from services.subscription_service import SubscriptionService
+
+# Intervalo de verificação de alterações pendentes; as alterações recebidas nesse
+# intervalo resultam em um único rerun da sessão
+POLL_INTERVAL_SECONDS = 2
+
+# Sessões sem verificação nesse tempo são consideradas encerradas
+SESSION_TIMEOUT_SECONDS = 300
+
+# Estado de cada sessão assinante: session_id -> {token, user_id, pending, ...}
+_sessions: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+def watch_user_data(user_id: str) -> None:
+    """
+    Faz a sessão atual do Streamlit ser recarregada quando os dados do usuário
+    forem alterados em outra sessão ou dispositivo.
+    
+    Deve ser chamada a cada execução da página; a assinatura é criada uma única vez
+    por sessão. As alterações são acumuladas e verificadas a cada
+    POLL_INTERVAL_SECONDS por um fragmento da página, que solicita um único rerun
+    com a API pública do Streamlit. Alterações recebidas durante uma execução da
+    própria sessão (ex: as gravações feitas por ela) não geram rerun.
+    
+    Args:
+        user_id: ID do usuário logado
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not user_id:
+        return
+    
+    session_id = ctx.session_id
+    
+    with _lock:
+        state = _sessions.get(session_id)
+        if state is not None and state["user_id"] == user_id:
+            # A execução atual já lê os dados atualizados
+            state["pending"] = False
+            state["running"] = True
+            state["inline"] = True
+            state["last_seen"] = time.monotonic()
+    
+    if state is None or state["user_id"] != user_id:
+        stop_watching()
+        state = _subscribe(session_id, user_id)
+        if state is None:
+            return
+        st.session_state.realtime_token = state["token"]
+        st.session_state.realtime_user_id = user_id
+    
+    _poll_changes()
+
+def stop_watching() -> None:
+    """
+    Cancela a assinatura de alterações da sessão atual (ex: no logout).
+    """
+    token = st.session_state.pop("realtime_token", None)
+    st.session_state.pop("realtime_user_id", None)
+    
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        with _lock:
+            _sessions.pop(ctx.session_id, None)
+    
+    if token:
+        SubscriptionService.unsubscribe(token)
+
+def _subscribe(session_id: str, user_id: str) -> Dict:
+    """
+    Assina as alterações do usuário para uma sessão.
+    
+    Returns:
+        Estado da sessão ou None se o backend não suportar listeners
+    """
+    state = {
+        "token": None,
+        "user_id": user_id,
+        "pending": False,
+        "running": True,
+        "inline": True,
+        "last_seen": time.monotonic()
+    }
+    
+    def on_change(event: Dict) -> None:
+        with _lock:
+            expired = time.monotonic() - state["last_seen"] > SESSION_TIMEOUT_SECONDS
+            if expired:
+                if _sessions.get(session_id) is state:
+                    del _sessions[session_id]
+            elif not state["running"]:
+                state["pending"] = True
+        
+        if expired and state["token"]:
+            # Sessão encerrada: cancela a assinatura fora da thread do listener
+            threading.Thread(
+                target=SubscriptionService.unsubscribe,
+                args=(state["token"],),
+                daemon=True
+            ).start()
+    
+    token = SubscriptionService.subscribe(user_id, on_change)
+    if not token:
+        return None
+    
+    with _lock:
+        state["token"] = token
+        _sessions[session_id] = state
+    
+    return state
+
+@st.fragment(run_every=POLL_INTERVAL_SECONDS)
+def _poll_changes() -> None:
+    """
+    Solicita um rerun da sessão se houver alterações pendentes.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    
+    with _lock:
+        state = _sessions.get(ctx.session_id)
+        if state is None:
+            return
+        
+        state["last_seen"] = time.monotonic()
+        
+        # Chamada dentro da execução da página: a execução ainda não terminou
+        if state["inline"]:
+            state["inline"] = False
+            return
+        
+        # Primeira verificação após a execução da página
+        state["running"] = False
+        
+        pending = state["pending"]
+        state["pending"] = False
+    
+    if pending:
+        st.rerun()